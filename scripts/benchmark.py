@@ -0,0 +1,422 @@
+"""热点路径基准测试
+
+用途：离线、可复现地测量抓取、排序和本地查询的耗时，并与保存的基线比较
+项目：
+    harvest      collect_tags 吞吐（tracks/s），请求由 cassette 离线回放（合成数据时打到 fake_jamendo）
+    rank-1k/10k/100k
+                 pick_score + 全排序，以及 rank_tracks（向量化 Top-K，dict 与 JamendoTrack 两种输入）
+    index-query  离线标签倒排索引 AND / 加权查询延迟
+    tags-dump    写出 jamendo_tags.json 与紧凑统计，以及 load_tags 读取
+数据：默认使用录制的真实响应（data/cassettes/benchmark，见 jamendo_cassette.py）——抓取按录制回放，
+      排序与索引用 cassette 中的 track（不够时平铺复制，副本 ID 按最大 ID 错开）；
+      --dataset synthetic 改用固定随机种子合成的数据（标签分布取自 data/jamendo_tags.json）。
+      两种数据各用各的基线文件，互不比较；都不访问网络（--record 除外）
+统计：每项报告 p50 / p95 / p99（毫秒）和峰值 RSS；每个项目在独立子进程中运行，
+      峰值 RSS 互不干扰
+回归：与基线（默认 data/benchmark_baseline.json，合成数据为 benchmark_baseline.synthetic.json）比较 p50，
+      超过阈值（默认 +20%）时以退出码 1 结束；基线与机器相关，不提交到仓库
+
+用法：
+    python scripts/benchmark.py --record             # 联网录制一次抓取，作为默认数据集
+    python scripts/benchmark.py                      # 运行全部并与基线比较
+    python scripts/benchmark.py --dataset synthetic  # 用合成数据运行
+    python scripts/benchmark.py --only rank index    # 只跑名称包含 rank / index 的项目
+    python scripts/benchmark.py --save-baseline      # 把本次结果写为基线
+"""
+import io
+import os
+import sys
+import json
+import math
+import time
+import random
+import argparse
+import tempfile
+import platform
+from pathlib import Path
+from contextlib import redirect_stdout
+from urllib.parse import urlsplit
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Dict, List, Optional, Sequence
+
+try:
+    import resource
+except ImportError:  # pragma: no cover - Windows 没有 resource 模块
+    resource = None
+
+DATA_DIR = Path(__file__).parent.parent / "data"
+DEFAULT_CASSETTE_PATH = DATA_DIR / "cassettes" / "benchmark"
+DATASETS = ("recorded", "synthetic")
+DEFAULT_THRESHOLD = 0.20
+DEFAULT_REPEAT = 20
+SEED = 20240601
+# harvest 项目与 --record 使用同一组参数，回放时请求才能与录制一一对应
+HARVEST_PARAMS = {"concurrency": 4, "max_pages": 2, "page_size": 50}
+
+
+def percentile(samples: Sequence[float], q: float) -> float:
+    """最近秩法分位数"""
+    ordered = sorted(samples)
+    if not ordered:
+        return 0.0
+    rank = max(1, math.ceil(q / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def peak_rss_mb() -> Optional[float]:
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux 单位为 KB，macOS 为字节
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def measure(func: Callable[[], object], repeat: int, warmup: int = 2) -> List[float]:
+    """运行 warmup 次预热后计时 repeat 次，返回每次的毫秒数"""
+    for _ in range(warmup):
+        func()
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - started) * 1000)
+    return samples
+
+
+def summarize(samples: List[float], **extra) -> Dict:
+    return {
+        "p50": round(percentile(samples, 50), 4),
+        "p95": round(percentile(samples, 95), 4),
+        "p99": round(percentile(samples, 99), 4),
+        "runs": len(samples),
+        "peak_rss_mb": peak_rss_mb(),
+        **extra,
+    }
+
+
+# ---------- 合成数据 ----------
+
+def synthetic_tracks(count: int, seed: int = SEED) -> List[Dict]:
+    """带各种推荐度字段组合的 track（覆盖 pick_score 的每个降级分支）"""
+    rng = random.Random(seed)
+    tracks = []
+    for i in range(count):
+        track = {"id": str(i), "name": f"t{i}", "artist_name": f"a{i % 97}"}
+        branch = rng.random()
+        if branch < 0.4:
+            track[rng.choice(("popularity_total", "popularity_month", "likes", "listens"))] = rng.randint(1, 10 ** 6)
+        elif branch < 0.7:
+            track["position"] = rng.randint(1, 999)
+        if rng.random() < 0.8:
+            track["releasedate"] = f"{rng.randint(2005, 2025)}-{rng.randint(1, 12):02d}-01"
+        tracks.append(track)
+    return tracks
+
+
+def _catalog(count: int):
+    from fake_jamendo import TrackCatalog, load_vocabulary
+    return TrackCatalog(load_vocabulary(), count=count, seed=SEED)
+
+
+# ---------- 录制数据 ----------
+
+def recorded_tracks(cassette_path: Path) -> List[Dict]:
+    """cassette 中所有 /tracks/ 成功响应里的 track（按 ID 去重、升序）"""
+    from fast_json import loads
+    from jamendo_cassette import Cassette
+
+    cassette = Cassette(cassette_path)
+    tracks: Dict[int, Dict] = {}
+    for key, entry in cassette.entries().items():
+        if entry["status"] != 200 or "/tracks" not in urlsplit(entry["url"]).path:
+            continue
+        data = loads(cassette.load(key)["content"])
+        for track in data.get("results") or ():
+            if track.get("id") is not None:
+                tracks.setdefault(int(track["id"]), track)
+    return [tracks[track_id] for track_id in sorted(tracks)]
+
+
+def scale_tracks(tracks: List[Dict], count: int) -> List[Dict]:
+    """把录制的 track 平铺到 count 条；第 n 份副本的 ID 加 n × (最大 ID + 1)，保持原有的 ID 间隔"""
+    stride = max(int(track["id"]) for track in tracks) + 1
+    return [
+        dict(track, id=str(copy * stride + int(track["id"])))
+        for copy, track in ((i // len(tracks), tracks[i % len(tracks)]) for i in range(count))
+    ]
+
+
+class Dataset:
+    """基准数据来源：recorded（cassette 中录制的真实响应）或 synthetic（固定种子合成）"""
+
+    def __init__(self, kind: str = "recorded", cassette: Path = DEFAULT_CASSETTE_PATH):
+        self.kind = kind
+        self.cassette = Path(cassette)
+        self._recorded: Optional[List[Dict]] = None
+
+    def _recorded_tracks(self) -> List[Dict]:
+        if self._recorded is None:
+            self._recorded = recorded_tracks(self.cassette)
+        return self._recorded
+
+    def rank_tracks(self, count: int) -> List[Dict]:
+        if self.kind == "synthetic":
+            return synthetic_tracks(count)
+        return scale_tracks(self._recorded_tracks(), count)
+
+    def store_tracks(self, count: int) -> List[Dict]:
+        if self.kind == "synthetic":
+            return _catalog(count).tracks
+        return scale_tracks(self._recorded_tracks(), count)
+
+    def check(self) -> Optional[str]:
+        """数据不可用时返回原因"""
+        if self.kind == "synthetic":
+            return None
+        if not (self.cassette / "index.json").exists():
+            return f"未找到 cassette {self.cassette}"
+        if not self._recorded_tracks():
+            return f"cassette {self.cassette} 中没有 /tracks/ 响应"
+        return None
+
+
+def record_cassette(cassette_path: Path) -> int:
+    """联网按 HARVEST_PARAMS 跑一次 collect_tags 并录制，返回录制的请求数"""
+    os.environ["JAMENDO_CACHE"] = "0"
+    os.environ["JAMENDO_CASSETTE"] = str(cassette_path)
+    os.environ["JAMENDO_CASSETTE_MODE"] = "record"
+    from fetch_jamendo_tags import DEFAULT_RATE_LIMIT, collect_tags
+    from jamendo_cassette import Cassette
+
+    collect_tags(rate_limit=DEFAULT_RATE_LIMIT, **HARVEST_PARAMS)
+    return len(Cassette(cassette_path))
+
+
+# ---------- 各项基准 ----------
+
+def bench_harvest(repeat: int, dataset: Dataset) -> Dict:
+    os.environ["JAMENDO_CACHE"] = "0"
+    stop = None
+    if dataset.kind == "synthetic":
+        from fake_jamendo import FakeJamendoServer, run_in_thread
+
+        base_url, stop = run_in_thread(FakeJamendoServer(_catalog(5000)))
+        os.environ["JAMENDO_BASE_URL"] = base_url
+    else:
+        os.environ["JAMENDO_CASSETTE"] = str(dataset.cassette)
+        os.environ["JAMENDO_CASSETTE_MODE"] = "replay"
+    from fetch_jamendo_tags import collect_tags
+
+    counted = []
+
+    def run():
+        with redirect_stdout(io.StringIO()):
+            data = collect_tags(rate_limit=None, **HARVEST_PARAMS)
+        counted.append(data["statistics"]["total_hits"])
+
+    try:
+        samples = measure(run, repeat=max(3, repeat // 4), warmup=1)
+    finally:
+        if stop is not None:
+            stop()
+    tracks = counted[-1]
+    return summarize(samples, tracks=tracks, tracks_per_s=round(tracks / (percentile(samples, 50) / 1000), 1))
+
+
+def bench_rank(size: int) -> Callable[[int, Dataset], Dict]:
+    def bench(repeat: int, dataset: Dataset) -> Dict:
+        from ranking import pick_score, rank_tracks
+        from track_model import from_results
+
+        tracks = dataset.rank_tracks(size)
+        models = from_results(tracks)
+        runs = max(3, repeat if size <= 10000 else repeat // 4)
+        sort_samples = measure(lambda: sorted(tracks, key=lambda t: pick_score(t)[0], reverse=True), runs)
+        top_samples = measure(lambda: rank_tracks(tracks, k=5), runs)
+        model_samples = measure(lambda: rank_tracks(models, k=5), runs)
+        result = summarize(sort_samples)
+        result["rank_tracks"] = summarize(top_samples)
+        result["rank_tracks_model"] = summarize(model_samples)
+        return result
+    return bench
+
+
+def bench_index_query(repeat: int, dataset: Dataset) -> Dict:
+    from tag_index import TagIndex
+    from track_store import TrackStore, TrackStoreBuilder
+
+    tracks = dataset.store_tracks(50000)
+    builder = TrackStoreBuilder()
+    for track in tracks:
+        builder.add(track)
+    with tempfile.TemporaryDirectory() as tmp:
+        store = TrackStore(builder.save(Path(tmp) / "tracks.bin"))
+        index = TagIndex.from_store(store)
+        rng = random.Random(SEED)
+        names = sorted({tag for _, tag in index.postings})
+        queries = [rng.sample(names, 2) for _ in range(200)]
+        weighted = [{tag: rng.uniform(0.5, 2) for tag in rng.sample(names, 3)} for _ in range(50)]
+
+        and_samples = []
+        for _ in range(max(1, repeat // 10)):
+            for query in queries:
+                started = time.perf_counter()
+                index.query_and(query)
+                and_samples.append((time.perf_counter() - started) * 1000)
+        weighted_samples = []
+        for query in weighted:
+            started = time.perf_counter()
+            index.query_weighted(query, k=20)
+            weighted_samples.append((time.perf_counter() - started) * 1000)
+        del store, index
+    result = summarize(and_samples, tracks=len(tracks), tags=len(names))
+    result["query_weighted"] = summarize(weighted_samples)
+    return result
+
+
+def bench_tags_dump(repeat: int, dataset: Dataset) -> Dict:
+    from fast_json import dump_file, load_file
+    from tag_stats import load_tags, save_tag_stats, stats_path_for
+
+    tags_data = load_file(DATA_DIR / "jamendo_tags.json")
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "jamendo_tags.json"
+
+        def run():
+            # 与抓取脚本相同：带缩进的 JSON + 紧凑统计
+            dump_file(tags_data, path, pretty=True)
+            save_tag_stats(tags_data, stats_path_for(path))
+
+        samples = measure(run, repeat)
+        load_samples = measure(lambda: load_tags(path), repeat)
+        size = path.stat().st_size
+        compact_size = stats_path_for(path).stat().st_size
+    result = summarize(samples, bytes=size, compact_bytes=compact_size)
+    result["load_tags"] = summarize(load_samples)
+    return result
+
+
+BENCHMARKS: Dict[str, Callable[[int, Dataset], Dict]] = {
+    "harvest": bench_harvest,
+    "rank-1k": bench_rank(1000),
+    "rank-10k": bench_rank(10000),
+    "rank-100k": bench_rank(100000),
+    "index-query": bench_index_query,
+    "tags-dump": bench_tags_dump,
+}
+
+
+def run_benchmark(name: str, repeat: int, dataset: Dataset) -> Dict:
+    """子进程入口"""
+    return BENCHMARKS[name](repeat, dataset)
+
+
+def compare(results: Dict[str, Dict], baseline: Dict[str, Dict], threshold: float) -> List[str]:
+    """比较 p50，返回回归描述列表（含嵌套的子项，如 rank_tracks）"""
+    regressions = []
+
+    def check(label: str, current: Dict, previous: Dict):
+        if not previous or not previous.get("p50"):
+            return
+        ratio = current["p50"] / previous["p50"] - 1
+        if ratio > threshold:
+            regressions.append(
+                f"{label}: p50 {previous['p50']:.3f} → {current['p50']:.3f} ms（+{ratio:.0%}）"
+            )
+
+    for name, current in results.items():
+        previous = baseline.get(name, {})
+        check(name, current, previous)
+        for key, value in current.items():
+            if isinstance(value, dict) and "p50" in value:
+                check(f"{name}/{key}", value, previous.get(key, {}))
+    return regressions
+
+
+def print_result(name: str, result: Dict) -> None:
+    rss = f"{result['peak_rss_mb']} MB" if result.get("peak_rss_mb") is not None else "-"
+    extras = {k: v for k, v in result.items()
+              if k not in ("p50", "p95", "p99", "runs", "peak_rss_mb") and not isinstance(v, dict)}
+    suffix = "  " + "  ".join(f"{k}={v}" for k, v in extras.items()) if extras else ""
+    print(f"{name:<22} p50 {result['p50']:>10.3f}  p95 {result['p95']:>10.3f}  "
+          f"p99 {result['p99']:>10.3f} ms  RSS {rss}{suffix}")
+    for key, value in result.items():
+        if isinstance(value, dict) and "p50" in value:
+            print_result(f"  └ {key}", value)
+
+
+def main():
+    """命令行：运行基准并与基线比较"""
+    parser = argparse.ArgumentParser(description="热点路径基准测试")
+    parser.add_argument("--only", nargs="*", default=None, help="只运行名称包含这些关键字的项目")
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT, help="每项计时次数")
+    parser.add_argument("--dataset", choices=DATASETS, default="recorded",
+                        help="recorded：回放录制的 cassette（默认）；synthetic：固定种子合成")
+    parser.add_argument("--cassette", default=str(DEFAULT_CASSETTE_PATH), help="录制数据所在的 cassette 目录")
+    parser.add_argument("--record", action="store_true", help="联网录制一次抓取到 --cassette 后退出")
+    parser.add_argument("--baseline", default=None,
+                        help="基线文件（默认 data/benchmark_baseline.json，合成数据为 .synthetic.json）")
+    parser.add_argument("--save-baseline", action="store_true", help="把本次结果写为基线")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD, help="p50 回归阈值（比例）")
+    parser.add_argument("--json", dest="json_path", default=None, help="把结果写入 JSON 文件")
+    args = parser.parse_args()
+
+    if args.record:
+        count = record_cassette(Path(args.cassette))
+        print(f"[录制] {count} 个请求已录制到 {args.cassette}")
+        return
+
+    dataset = Dataset(args.dataset, Path(args.cassette))
+    problem = dataset.check()
+    if problem:
+        print(f"[错误] {problem}")
+        print("请先联网运行 --record 录制，或使用 --dataset synthetic")
+        sys.exit(1)
+
+    names = [name for name in BENCHMARKS
+             if not args.only or any(key in name for key in args.only)]
+    print(f"[基准] Python {platform.python_version()} / {platform.machine()}，"
+          f"数据 {args.dataset}，共 {len(names)} 项")
+    print("-" * 100)
+
+    results: Dict[str, Dict] = {}
+    for name in names:
+        # 每项用新的子进程，峰值 RSS 只反映该项本身
+        with ProcessPoolExecutor(max_workers=1) as executor:
+            results[name] = executor.submit(run_benchmark, name, args.repeat, dataset).result()
+        print_result(name, results[name])
+
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2, ensure_ascii=False)
+
+    suffix = "" if args.dataset == "recorded" else f".{args.dataset}"
+    baseline_path = Path(args.baseline or DATA_DIR / f"benchmark_baseline{suffix}.json")
+    if args.save_baseline:
+        baseline = {}
+        if baseline_path.exists():
+            with open(baseline_path, "r", encoding="utf-8") as f:
+                baseline = json.load(f)
+        baseline.update(results)
+        baseline_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(baseline_path, "w", encoding="utf-8") as f:
+            json.dump(baseline, f, indent=2, ensure_ascii=False)
+        print(f"\n[基线] 已保存到 {baseline_path}")
+        return
+
+    if not baseline_path.exists():
+        print(f"\n[基线] 未找到 {baseline_path}，使用 --save-baseline 生成")
+        return
+    with open(baseline_path, "r", encoding="utf-8") as f:
+        baseline = json.load(f)
+    regressions = compare(results, baseline, args.threshold)
+    if regressions:
+        print(f"\n[回归] 超过阈值 +{args.threshold:.0%}:")
+        for line in regressions:
+            print(f"  - {line}")
+        sys.exit(1)
+    print(f"\n[基线] 与 {baseline_path.name} 相比无超过 +{args.threshold:.0%} 的回归")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,219 @@
+"""Jamendo API 能力探测与能力矩阵
+
+用途：并发探测 /tracks/ 的 orderby 取值是否可用、每个 include 会额外带来哪些字段，
+      结果写入带版本号的 data/jamendo_capabilities.json；
+      再次运行时只重新探测超过 TTL 的条目（以及上次因 429 / 网络错误没有结论的条目）
+读取：排序 / 搜索代码启动时调用 usable_orderbys() 直接读矩阵，
+      跳过已知不可用的排序方式，不再发试探请求
+
+矩阵格式：
+    {"version": 1, "updated_at": ...,
+     "orderby": {"popularity_total_desc": {"ok": true, "error": null, "checked_at": ...}, ...},
+     "include": {"stats": {"ok": true, "fields": ["stats", "stats.likes", ...], "checked_at": ...}, ...}}
+    ok 为 null 表示探测时遇到瞬时错误，尚无结论
+
+用法：
+    python scripts/capability_probe.py              # 只探测过期条目
+    python scripts/capability_probe.py --force      # 全部重新探测
+"""
+import json
+import time
+import argparse
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+from jamendo_client import JamendoAPIError, get_client
+
+MATRIX_VERSION = 1
+DEFAULT_MATRIX_PATH = Path(__file__).parent.parent / "data" / "jamendo_capabilities.json"
+DEFAULT_TTL = 7 * 24 * 3600
+DEFAULT_MAX_WORKERS = 8
+PROBE_KEYWORD = "lofi"
+
+ORDERBY_CANDIDATES = (
+    "relevance", "buzzrate",
+    "popularity_total_desc", "popularity_total_asc", "popularity_month_desc", "popularity_week_desc",
+    "listens_total_desc", "listens_month_desc", "listens_week_desc",
+    "downloads_total_desc", "downloads_month_desc", "downloads_week_desc",
+    "listens_desc", "listens_asc", "downloads_desc", "downloads_asc",
+    "rating_desc", "rating_asc",
+    "releasedate_desc", "releasedate_asc",
+    "position_asc", "position_desc",
+    "name", "duration", "id",
+)
+INCLUDE_CANDIDATES = ("musicinfo", "stats", "licenses", "lyrics", "popularity")
+
+# ok 取值 → 显示标记（None 表示尚无结论）
+STATUS_MARKS = {True: "✅", False: "❌", None: "❔"}
+
+# 这些状态码说明是瞬时问题，不能据此判断参数不可用
+_TRANSIENT_STATUSES = (429, 500, 502, 503, 504)
+
+
+def field_paths(obj, prefix: str = "") -> Set[str]:
+    """展开字段路径（列表只看第一个元素）"""
+    paths: Set[str] = set()
+    if isinstance(obj, dict):
+        for key, value in obj.items():
+            path = f"{prefix}.{key}" if prefix else key
+            paths.add(path)
+            paths |= field_paths(value, path)
+    elif isinstance(obj, list) and obj:
+        paths |= field_paths(obj[0], prefix)
+    return paths
+
+
+def empty_matrix() -> Dict:
+    return {"version": MATRIX_VERSION, "updated_at": 0, "orderby": {}, "include": {}}
+
+
+def load_matrix(path: Path = DEFAULT_MATRIX_PATH) -> Dict:
+    """读取能力矩阵；文件不存在、损坏或版本不符时返回空矩阵"""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            matrix = json.load(f)
+    except (OSError, ValueError):
+        return empty_matrix()
+    if not isinstance(matrix, dict) or matrix.get("version") != MATRIX_VERSION:
+        return empty_matrix()
+    return matrix
+
+
+def save_matrix(matrix: Dict, path: Path = DEFAULT_MATRIX_PATH) -> None:
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(path.suffix + ".tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(matrix, f, indent=2, ensure_ascii=False, sort_keys=True)
+    tmp_path.replace(path)
+
+
+def is_stale(entry: Optional[Dict], ttl: float, now: float) -> bool:
+    return entry is None or entry.get("ok") is None or now - entry.get("checked_at", 0) > ttl
+
+
+def _outcome(error: Optional[JamendoAPIError]) -> Tuple[Optional[bool], Optional[str]]:
+    """把请求结果转成 (ok, error)；瞬时错误返回 ok=None"""
+    if error is None:
+        return True, None
+    if error.status_code is None or error.status_code in _TRANSIENT_STATUSES:
+        return None, str(error)
+    return False, str(error)
+
+
+def probe_orderby(client, orderby: str) -> Dict:
+    try:
+        client.tracks(limit=1, search=PROBE_KEYWORD, orderby=orderby, refresh=True)
+        ok, error = _outcome(None)
+    except JamendoAPIError as e:
+        ok, error = _outcome(e)
+    return {"ok": ok, "error": error, "checked_at": time.time()}
+
+
+def probe_include(client, include: str, base_fields: Set[str]) -> Dict:
+    try:
+        data = client.tracks(limit=3, search=PROBE_KEYWORD, include=include, refresh=True)
+    except JamendoAPIError as e:
+        ok, error = _outcome(e)
+        return {"ok": ok, "error": error, "fields": [], "checked_at": time.time()}
+    fields: Set[str] = set()
+    for track in data.get("results") or []:
+        fields |= field_paths(track)
+    added = sorted(fields - base_fields)
+    return {"ok": bool(added), "error": None, "fields": added, "checked_at": time.time()}
+
+
+def probe_matrix(
+    client=None,
+    orderbys: Sequence[str] = ORDERBY_CANDIDATES,
+    includes: Sequence[str] = INCLUDE_CANDIDATES,
+    path: Path = DEFAULT_MATRIX_PATH,
+    ttl: float = DEFAULT_TTL,
+    force: bool = False,
+    max_workers: int = DEFAULT_MAX_WORKERS,
+) -> Tuple[Dict, int]:
+    """并发探测过期条目并写回矩阵，返回 (matrix, 本次探测的条目数)"""
+    client = client or get_client()
+    matrix = load_matrix(path)
+    now = time.time()
+    stale_orderbys = [o for o in orderbys if force or is_stale(matrix["orderby"].get(o), ttl, now)]
+    stale_includes = [i for i in includes if force or is_stale(matrix["include"].get(i), ttl, now)]
+    if not stale_orderbys and not stale_includes:
+        return matrix, 0
+
+    base_fields: Set[str] = set()
+    if stale_includes:
+        # 基准字段：不带 include 时返回的字段，include 带来的字段 = 差集
+        for track in client.tracks(limit=3, search=PROBE_KEYWORD, refresh=True).get("results") or []:
+            base_fields |= field_paths(track)
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        orderby_futures = {o: executor.submit(probe_orderby, client, o) for o in stale_orderbys}
+        include_futures = {i: executor.submit(probe_include, client, i, base_fields) for i in stale_includes}
+        for orderby, future in orderby_futures.items():
+            matrix["orderby"][orderby] = future.result()
+        for include, future in include_futures.items():
+            matrix["include"][include] = future.result()
+
+    matrix["updated_at"] = time.time()
+    save_matrix(matrix, path)
+    return matrix, len(stale_orderbys) + len(stale_includes)
+
+
+def usable_orderbys(
+    candidates: Iterable[Optional[str]],
+    path: Path = DEFAULT_MATRIX_PATH,
+) -> Tuple[List[Optional[str]], List[str]]:
+    """按能力矩阵过滤排序方式，返回 (可用, 已知不可用)
+
+    None（默认排序）和矩阵里没有结论的取值都视为可用；不发任何请求。
+    """
+    known = load_matrix(path)["orderby"]
+    usable, skipped = [], []
+    for orderby in candidates:
+        if orderby is not None and (known.get(orderby) or {}).get("ok") is False:
+            skipped.append(orderby)
+        else:
+            usable.append(orderby)
+    return usable, skipped
+
+
+def print_matrix(matrix: Dict) -> None:
+    print("\norderby:")
+    for orderby, entry in sorted(matrix["orderby"].items()):
+        mark = STATUS_MARKS[entry.get("ok")]
+        suffix = f"  ({entry['error'][:60]})" if entry.get("error") else ""
+        print(f"  {mark} {orderby}{suffix}")
+    print("\ninclude:")
+    for include, entry in sorted(matrix["include"].items()):
+        mark = STATUS_MARKS[entry.get("ok")]
+        fields = ", ".join(entry.get("fields", [])[:8])
+        more = f" 等 {len(entry['fields'])} 个" if len(entry.get("fields", [])) > 8 else ""
+        print(f"  {mark} {include}: {fields or entry.get('error') or '无新增字段'}{more}")
+
+
+def main():
+    """命令行：探测并打印能力矩阵"""
+    parser = argparse.ArgumentParser(description="Jamendo API 能力探测")
+    parser.add_argument("--force", action="store_true", help="忽略 TTL，全部重新探测")
+    parser.add_argument("--ttl", type=float, default=DEFAULT_TTL / 3600, help="条目有效期（小时）")
+    parser.add_argument("--workers", type=int, default=DEFAULT_MAX_WORKERS)
+    parser.add_argument("--path", default=str(DEFAULT_MATRIX_PATH))
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    try:
+        matrix, probed = probe_matrix(
+            path=Path(args.path), ttl=args.ttl * 3600, force=args.force, max_workers=args.workers,
+        )
+    except JamendoAPIError as e:
+        print(f"[错误] 基准请求失败: {e}")
+        return
+    elapsed = time.perf_counter() - started
+    print(f"[探测] 本次探测 {probed} 项（{elapsed:.1f} s），矩阵: {args.path}")
+    print_matrix(matrix)
+
+
+if __name__ == "__main__":
+    main()
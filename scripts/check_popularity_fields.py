@@ -13,13 +13,15 @@ if sys.platform == 'win32':
     sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
     sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8')
 
-import requests
 from dotenv import load_dotenv
 
+from capability_probe import DEFAULT_MATRIX_PATH, STATUS_MARKS, probe_matrix
+from jamendo_client import DEFAULT_CLIENT_ID, JamendoAPIError, get_client
+from schema_infer import SchemaInferrer
+
 load_dotenv()
 
-CLIENT_ID = os.environ.get("JAMENDO_CLIENT_ID", "f2567443")
-BASE_URL = "https://api.jamendo.com/v3.0"
+CLIENT_ID = os.environ.get("JAMENDO_CLIENT_ID", DEFAULT_CLIENT_ID)
 
 
 def test_api_fields():
@@ -86,7 +88,7 @@ def test_api_fields():
         }
     ]
     
-    all_fields = set()
+    schema = SchemaInferrer()
     sample_track = None
     
     for test_case in test_cases:
@@ -94,42 +96,29 @@ def test_api_fields():
         print("-" * 80)
         
         try:
-            url = f"{BASE_URL}/tracks/"
-            response = requests.get(url, params=test_case['params'], timeout=30)
-            response.raise_for_status()
-            data = response.json()
+            data = get_client(CLIENT_ID).tracks(**test_case['params'])
             
             if data.get("results") and len(data["results"]) > 0:
                 track = data["results"][0]
                 if not sample_track:
                     sample_track = track
                 
-                # 收集所有字段
-                def collect_fields(obj, prefix=""):
-                    if isinstance(obj, dict):
-                        for key, value in obj.items():
-                            full_key = f"{prefix}.{key}" if prefix else key
-                            all_fields.add(full_key)
-                            if isinstance(value, (dict, list)):
-                                collect_fields(value, full_key)
-                    elif isinstance(obj, list) and len(obj) > 0:
-                        collect_fields(obj[0], prefix)
-                
-                collect_fields(track)
+                # 所有结果逐个折叠进字段结构（不再只看第一条 / 列表第一个元素）
+                schema.fold_many(data["results"])
                 
                 print(f"✅ 成功获取 {len(data['results'])} 首音乐")
                 print(f"   第一个结果包含 {len(track)} 个顶级字段")
             else:
                 print("⚠️  未返回结果")
                 
-        except requests.exceptions.RequestException as e:
+        except JamendoAPIError as e:
             print(f"❌ 请求失败: {e}")
-            if hasattr(e, 'response') and e.response is not None:
+            if e.body:
                 try:
-                    error_data = e.response.json()
+                    error_data = json.loads(e.body)
                     print(f"   错误信息: {json.dumps(error_data, indent=2, ensure_ascii=False)}")
-                except:
-                    print(f"   响应内容: {e.response.text[:200]}")
+                except ValueError:
+                    print(f"   响应内容: {e.body[:200]}")
         except Exception as e:
             print(f"❌ 错误: {e}")
     
@@ -139,21 +128,11 @@ def test_api_fields():
     print("=" * 80)
     
     # 按类别分组
-    popularity_fields = []
-    basic_fields = []
-    musicinfo_fields = []
-    other_fields = []
-    
-    for field in sorted(all_fields):
-        field_lower = field.lower()
-        if any(keyword in field_lower for keyword in ['popular', 'listen', 'download', 'rating', 'score', 'view', 'play', 'like', 'favorite', 'trend']):
-            popularity_fields.append(field)
-        elif 'musicinfo' in field_lower:
-            musicinfo_fields.append(field)
-        elif field in ['id', 'name', 'artist_name', 'duration', 'audio', 'image', 'releasedate', 'position', 'license']:
-            basic_fields.append(field)
-        else:
-            other_fields.append(field)
+    grouped = schema.by_category()
+    popularity_fields = grouped.get("popularity", [])
+    basic_fields = grouped.get("basic", [])
+    musicinfo_fields = grouped.get("musicinfo", [])
+    other_fields = grouped.get("other", [])
     
     if popularity_fields:
         print("\n🎯 受欢迎度相关字段:")
@@ -201,23 +180,13 @@ def test_api_fields():
         "position_asc", "position_desc"
     ]
     
+    # 并发探测，结果写入能力矩阵（未过期的条目直接读缓存）
+    matrix, probed = probe_matrix(get_client(CLIENT_ID), orderbys=orderby_options, includes=())
+    print(f"（本次探测 {probed} 项，其余读自 {DEFAULT_MATRIX_PATH.name}）")
     for orderby in orderby_options:
-        try:
-            url = f"{BASE_URL}/tracks/"
-            params = {
-                "client_id": CLIENT_ID,
-                "format": "json",
-                "limit": 1,
-                "search": "lofi",
-                "orderby": orderby
-            }
-            response = requests.get(url, params=params, timeout=10)
-            if response.status_code == 200:
-                print(f"✅ {orderby}")
-            else:
-                print(f"❌ {orderby} (状态码: {response.status_code})")
-        except Exception as e:
-            print(f"❌ {orderby} (错误: {str(e)[:50]})")
+        entry = matrix["orderby"][orderby]
+        suffix = f" ({entry['error'][:50]})" if entry.get("error") else ""
+        print(f"{STATUS_MARKS[entry.get('ok')]} {orderby}{suffix}")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,385 @@
+"""本地 Jamendo API 模拟服务
+
+用途：离线、可复现地压测和计时。基于 asyncio 实现 /v3.0/tracks/ 端点，
+      合成的 track 标签按 data/jamendo_tags.json 中的真实频率分布抽样
+支持参数：search、limit（≤200）、offset、orderby（与官方文档一致的取值，可带 _asc / _desc）、
+      include（musicinfo / stats）、id（空格、+ 或逗号分隔，可重复）
+故障注入：固定延迟 + 随机抖动、按比例返回 500、按每秒请求数限流返回 429（带 Retry-After）
+统计：GET /_stats 返回各状态码计数
+
+脚本通过环境变量指向本服务：
+    python scripts/fake_jamendo.py --port 8766 --latency 50 --error-rate 0.05 --rate-limit 20
+    JAMENDO_BASE_URL=http://127.0.0.1:8766/v3.0 JAMENDO_CACHE=0 python scripts/fetch_jamendo_tags.py
+"""
+import time
+import random
+import asyncio
+import argparse
+import threading
+from pathlib import Path
+from collections import Counter
+from typing import Callable, Dict, List, Optional, Sequence, Set, Tuple
+from urllib.parse import parse_qsl, urlsplit
+
+from fast_json import dumps
+from tag_stats import load_tags
+
+DEFAULT_TAGS_PATH = Path(__file__).parent.parent / "data" / "jamendo_tags.json"
+DEFAULT_PORT = 8766
+DEFAULT_TRACKS = 5000
+MAX_LIMIT = 200
+
+# 官方文档中 /tracks/ 支持的 orderby 字段
+ORDER_FIELDS = (
+    "relevance", "buzzrate", "downloads_week", "downloads_month", "downloads_total",
+    "listens_week", "listens_month", "listens_total", "popularity_week", "popularity_month",
+    "popularity_total", "name", "album_name", "artist_name", "releasedate", "duration", "id",
+)
+
+_WORDS = (
+    "morning", "night", "dream", "river", "city", "summer", "rain", "light", "ocean", "memory",
+    "road", "fire", "golden", "silent", "blue", "lost", "wild", "neon", "paper", "echo",
+)
+
+
+def load_vocabulary(path: Path = DEFAULT_TAGS_PATH) -> Dict[str, Dict[str, int]]:
+    data = load_tags(path)
+    return {kind: data.get(kind, {}) for kind in ("genres", "instruments", "vartags")}
+
+
+def _sample(rng: random.Random, weights: Dict[str, int], low: int, high: int) -> List[str]:
+    if not weights:
+        return []
+    picked = rng.choices(list(weights), weights=list(weights.values()), k=rng.randint(low, high))
+    return list(dict.fromkeys(picked))
+
+
+class TrackCatalog:
+    """合成 track 库 + 按词的倒排表 + 各 orderby 的预排序"""
+
+    def __init__(self, vocabulary: Dict[str, Dict[str, int]], count: int = DEFAULT_TRACKS, seed: int = 0):
+        rng = random.Random(seed)
+        artists = [f"{rng.choice(_WORDS).title()} {rng.choice(_WORDS).title()}" for _ in range(max(1, count // 10))]
+        self.tracks: List[Dict] = []
+        for i in range(count):
+            track_id = 1000000 + i * 7
+            artist_index = rng.randrange(len(artists))
+            year, month, day = rng.randint(2008, 2025), rng.randint(1, 12), rng.randint(1, 28)
+            popularity = int(rng.paretovariate(1.2) * 10)
+            self.tracks.append({
+                "id": str(track_id),
+                "name": f"{rng.choice(_WORDS).title()} {rng.choice(_WORDS).title()}",
+                "duration": rng.randint(30, 420),
+                "artist_id": str(1000 + artist_index),
+                "artist_name": artists[artist_index],
+                "album_id": str(50000 + i // 8),
+                "album_name": f"Album {i // 8}",
+                "position": i % 8 + 1,
+                "releasedate": f"{year:04d}-{month:02d}-{day:02d}",
+                "license_ccurl": "http://creativecommons.org/licenses/by/3.0/",
+                "audio": f"https://prod-1.storage.jamendo.com/?trackid={track_id}&format=mp31",
+                "audiodownload": f"https://prod-1.storage.jamendo.com/download/track/{track_id}/mp32/",
+                "shareurl": f"https://www.jamendo.com/track/{track_id}",
+                "image": f"https://usercontent.jamendo.com?type=album&id={50000 + i // 8}&width=300",
+                "musicinfo": {
+                    "vocalinstrumental": rng.choice(("vocal", "instrumental")),
+                    "lang": rng.choice(("en", "fr", "")),
+                    "gender": rng.choice(("male", "female", "")),
+                    "acousticelectric": rng.choice(("acoustic", "electric", "")),
+                    "speed": rng.choice(("low", "medium", "high", "veryhigh")),
+                    "tags": {
+                        "genres": _sample(rng, vocabulary["genres"], 1, 3),
+                        "instruments": _sample(rng, vocabulary["instruments"], 0, 3),
+                        "vartags": _sample(rng, vocabulary["vartags"], 0, 4),
+                    },
+                },
+                "stats": {
+                    "rate_downloads_total": popularity * rng.randint(1, 5),
+                    "rate_listened_total": popularity * rng.randint(10, 50),
+                    "playlisted": rng.randint(0, popularity + 1),
+                    "favorited": rng.randint(0, popularity + 1),
+                    "likes": rng.randint(0, popularity + 1),
+                    "dislikes": rng.randint(0, 3),
+                    "avgnote": round(rng.uniform(2, 5), 2),
+                    "notes": rng.randint(0, 50),
+                },
+                "_popularity": {
+                    "total": popularity,
+                    "month": rng.randint(0, popularity),
+                    "week": rng.randint(0, popularity // 4 + 1),
+                },
+            })
+
+        self.by_id = {int(t["id"]): i for i, t in enumerate(self.tracks)}
+        self.tokens: Dict[str, Set[int]] = {}
+        for i, track in enumerate(self.tracks):
+            words = f"{track['name']} {track['artist_name']}".lower().split()
+            for tags in track["musicinfo"]["tags"].values():
+                words.extend(tags)
+            for word in words:
+                self.tokens.setdefault(word, set()).add(i)
+        self._orders: Dict[str, List[int]] = {}
+
+    def _sort_value(self, field: str, track: Dict):
+        if field in ("name", "album_name", "artist_name", "releasedate", "duration"):
+            return track[field]
+        if field == "id":
+            return int(track["id"])
+        if field.startswith("popularity_"):
+            return track["_popularity"][field.split("_", 1)[1]]
+        if field.startswith(("downloads_", "listens_", "buzzrate")):
+            stats = track["stats"]
+            base = stats["rate_downloads_total"] if field.startswith("downloads") else stats["rate_listened_total"]
+            period = field.rsplit("_", 1)[-1]
+            return base // {"week": 50, "month": 12}.get(period, 1)
+        return 0  # relevance：保持库内顺序
+
+    def order(self, field: str) -> List[int]:
+        """某个 orderby 字段的升序下标（惰性计算后缓存）"""
+        if field not in self._orders:
+            self._orders[field] = sorted(
+                range(len(self.tracks)), key=lambda i: (self._sort_value(field, self.tracks[i]), i)
+            )
+        return self._orders[field]
+
+    def search(self, text: str) -> Optional[Set[int]]:
+        """全部关键词都命中（标签、歌名、艺术家）；整个搜索词连写后作为标签也算命中"""
+        words = text.lower().split()
+        if not words:
+            return None
+        joined = self.tokens.get("".join(words), set())
+        matched: Optional[Set[int]] = None
+        for word in words:
+            hits = self.tokens.get(word, set())
+            matched = hits if matched is None else matched & hits
+        return (matched or set()) | joined
+
+
+def _render(track: Dict, includes: Set[str]) -> Dict:
+    rendered = {k: v for k, v in track.items() if k not in ("musicinfo", "stats", "_popularity")}
+    for name in ("musicinfo", "stats"):
+        if name in includes:
+            rendered[name] = track[name]
+    return rendered
+
+
+def _failed(code: int, message: str) -> Dict:
+    return {
+        "headers": {"status": "failed", "code": code, "error_message": message,
+                    "warnings": "", "results_count": 0},
+        "results": [],
+    }
+
+
+def query_tracks(catalog: TrackCatalog, params: Sequence[Tuple[str, str]]) -> Dict:
+    """按 Jamendo 的语义处理 /tracks/ 查询，返回响应 JSON"""
+    single = dict(params)
+    if not single.get("client_id"):
+        return _failed(5, "client_id is required")
+    try:
+        limit = min(MAX_LIMIT, max(1, int(single.get("limit", 10))))
+        offset = max(0, int(single.get("offset", 0)))
+    except ValueError:
+        return _failed(5, "limit and offset must be integers")
+
+    orderby = single.get("orderby", "relevance")
+    field, _, direction = orderby.rpartition("_")
+    if direction not in ("asc", "desc"):
+        field, direction = orderby, "asc"
+    if field not in ORDER_FIELDS:
+        return _failed(5, f"Invalid value for orderby: {orderby}")
+
+    ids: Set[int] = set()
+    for key, value in params:
+        if key in ("id", "id[]"):
+            ids.update(int(v) for v in value.replace(",", " ").replace("+", " ").split() if v.isdigit())
+
+    candidates = catalog.search(single.get("search", ""))
+    if ids:
+        id_rows = {catalog.by_id[i] for i in ids if i in catalog.by_id}
+        candidates = id_rows if candidates is None else candidates & id_rows
+
+    ordered = catalog.order(field)
+    if direction == "desc":
+        ordered = ordered[::-1]
+    if candidates is not None:
+        ordered = [i for i in ordered if i in candidates]
+    page = ordered[offset:offset + limit]
+
+    includes = set(single.get("include", "").replace(",", " ").split())
+    return {
+        "headers": {"status": "success", "code": 0, "error_message": "", "warnings": "",
+                    "results_count": len(page)},
+        "results": [_render(catalog.tracks[i], includes) for i in page],
+    }
+
+
+class FaultInjector:
+    """延迟、随机 500 与 429 限流（固定 1 秒窗口计数）"""
+
+    def __init__(self, latency: float = 0.0, jitter: float = 0.0, error_rate: float = 0.0,
+                 rate_limit: float = 0.0, seed: Optional[int] = None):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.rate_limit = rate_limit
+        self._rng = random.Random(seed)
+        self._window = 0
+        self._count = 0
+
+    def delay(self) -> float:
+        return max(0.0, self.latency + self._rng.uniform(-self.jitter, self.jitter))
+
+    def throttled(self) -> bool:
+        if not self.rate_limit:
+            return False
+        window = int(time.monotonic())
+        if window != self._window:
+            self._window, self._count = window, 0
+        self._count += 1
+        return self._count > self.rate_limit
+
+    def failed(self) -> bool:
+        return self.error_rate > 0 and self._rng.random() < self.error_rate
+
+
+class FakeJamendoServer:
+    """asyncio HTTP/1.1 服务（支持 keep-alive）"""
+
+    def __init__(self, catalog: TrackCatalog, faults: Optional[FaultInjector] = None):
+        self.catalog = catalog
+        self.faults = faults or FaultInjector()
+        self.stats: Counter = Counter()
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                if int(headers.get("content-length") or 0):
+                    await reader.readexactly(int(headers["content-length"]))
+
+                method, target, version = (request_line.decode("latin-1").split() + ["", "", ""])[:3]
+                status, payload, extra = await self.respond(method, target)
+                self.stats[status] += 1
+                body = dumps(payload)
+                keep_alive = version == "HTTP/1.1" and headers.get("connection", "").lower() != "close"
+                head = [
+                    f"HTTP/1.1 {status} {_REASONS.get(status, '')}",
+                    "Content-Type: application/json; charset=utf-8",
+                    f"Content-Length: {len(body)}",
+                    f"Connection: {'keep-alive' if keep_alive else 'close'}",
+                    *(f"{k}: {v}" for k, v in extra.items()),
+                ]
+                writer.write(("\r\n".join(head) + "\r\n\r\n").encode("latin-1") + body)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, asyncio.CancelledError):
+            pass
+        finally:
+            writer.close()
+
+    async def respond(self, method: str, target: str) -> Tuple[int, Dict, Dict]:
+        parts = urlsplit(target)
+        path = parts.path.rstrip("/")
+        if method != "GET":
+            return 405, {"error": "method not allowed"}, {}
+        if path == "/_stats":
+            return 200, {str(k): v for k, v in sorted(self.stats.items())}, {}
+        if path != "/v3.0/tracks":
+            return 404, {"error": "not found"}, {}
+
+        delay = self.faults.delay()
+        if delay:
+            await asyncio.sleep(delay)
+        if self.faults.throttled():
+            return 429, _failed(429, "Too Many Requests"), {"Retry-After": "1"}
+        if self.faults.failed():
+            return 500, _failed(500, "Internal Server Error"), {}
+        return 200, query_tracks(self.catalog, parse_qsl(parts.query, keep_blank_values=True)), {}
+
+    async def start(self, host: str = "127.0.0.1", port: int = DEFAULT_PORT) -> asyncio.AbstractServer:
+        return await asyncio.start_server(self.handle, host, port)
+
+
+_REASONS = {200: "OK", 404: "Not Found", 405: "Method Not Allowed", 429: "Too Many Requests",
+            500: "Internal Server Error"}
+
+
+def run_in_thread(server: FakeJamendoServer, host: str = "127.0.0.1", port: int = 0) -> Tuple[str, Callable[[], None]]:
+    """在后台线程启动服务，返回 (base_url, stop)；port=0 时自动分配端口（供基准测试使用）"""
+    loop = asyncio.new_event_loop()
+    ready = threading.Event()
+    holder = {}
+
+    def run():
+        asyncio.set_event_loop(loop)
+        holder["server"] = loop.run_until_complete(server.start(host, port))
+        ready.set()
+        loop.run_forever()
+
+    thread = threading.Thread(target=run, daemon=True, name="fake-jamendo")
+    thread.start()
+    ready.wait()
+    bound_port = holder["server"].sockets[0].getsockname()[1]
+
+    def stop():
+        async def shutdown():
+            holder["server"].close()
+            # keep-alive 连接上的处理协程不会随监听关闭而结束，需要显式取消
+            tasks = [t for t in asyncio.all_tasks() if t is not asyncio.current_task()]
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            await holder["server"].wait_closed()
+        asyncio.run_coroutine_threadsafe(shutdown(), loop).result()
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join()
+        loop.close()
+
+    return f"http://{host}:{bound_port}/v3.0", stop
+
+
+def main():
+    """命令行：启动模拟服务"""
+    parser = argparse.ArgumentParser(description="本地 Jamendo API 模拟服务")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--tracks", type=int, default=DEFAULT_TRACKS, help="合成 track 数量")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--latency", type=float, default=0.0, help="每个请求的延迟（毫秒）")
+    parser.add_argument("--jitter", type=float, default=0.0, help="延迟的随机抖动（±毫秒）")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="返回 500 的比例（0~1）")
+    parser.add_argument("--rate-limit", type=float, default=0.0, help="每秒最多请求数，超出返回 429；0 不限")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    catalog = TrackCatalog(load_vocabulary(), count=args.tracks, seed=args.seed)
+    faults = FaultInjector(args.latency / 1000, args.jitter / 1000, args.error_rate, args.rate_limit, args.seed)
+    server = FakeJamendoServer(catalog, faults)
+    print(f"[模拟] 生成 {len(catalog.tracks)} 首合成音乐（{(time.perf_counter() - started) * 1000:.0f} ms）")
+    print(f"[服务] 监听 http://{args.host}:{args.port}/v3.0/tracks/")
+    print(f"[提示] JAMENDO_BASE_URL=http://{args.host}:{args.port}/v3.0")
+
+    async def serve():
+        listener = await server.start(args.host, args.port)
+        async with listener:
+            await listener.serve_forever()
+
+    try:
+        asyncio.run(serve())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
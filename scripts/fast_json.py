@@ -0,0 +1,52 @@
+"""JSON 编解码（可选 orjson 加速）
+
+用途：API 响应、检查点 / sidecar 的 JSONL 行和 jamendo_tags.json 统一经这里编解码。
+      安装了 orjson 时直接从 bytes 解码（不再先猜编码、解码成 str），
+      编码也比标准库快得多；未安装时退回标准库，输出内容一致
+"""
+import json
+from pathlib import Path
+from typing import Any, Union
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - 仅在未安装 orjson 时走标准库
+    orjson = None
+
+
+def loads(data: Union[bytes, bytearray, memoryview, str]) -> Any:
+    """解码 JSON；bytes 按 UTF-8 处理
+
+    Raises:
+        ValueError: 不是合法 JSON（orjson.JSONDecodeError 也是 ValueError 的子类）
+    """
+    if orjson is not None:
+        return orjson.loads(data)
+    if isinstance(data, (bytes, bytearray, memoryview)):
+        data = bytes(data).decode("utf-8")
+    return json.loads(data)
+
+
+def dumps(obj: Any, pretty: bool = False) -> bytes:
+    """编码为 UTF-8 bytes：默认紧凑单行，pretty=True 时两空格缩进（与 json.dump(indent=2) 相同）"""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2 if pretty else 0)
+    if pretty:
+        return json.dumps(obj, indent=2, ensure_ascii=False).encode("utf-8")
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def load_file(path: Union[str, Path]) -> Any:
+    with open(path, "rb") as f:
+        return loads(f.read())
+
+
+def dump_file(obj: Any, path: Union[str, Path], pretty: bool = False) -> Path:
+    """原子写出（先写临时文件再替换）"""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(path.suffix + ".tmp")
+    with open(tmp_path, "wb") as f:
+        f.write(dumps(obj, pretty=pretty))
+    tmp_path.replace(path)
+    return path
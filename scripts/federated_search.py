@@ -0,0 +1,237 @@
+"""多源联合搜索：Jamendo + YouTube Music
+
+用途：并发查询各个音乐源（provider adapter），结果统一成 UnifiedTrack，
+      按标题 + 艺术家的规范化 key 去重后合并（对应架构文档中的 Merge + Dedup 阶段）
+时限：整体延迟预算到期时只返回已经到达的结果，慢的源不会拖住整个响应；
+      每个源还可以单独设置更短的截止时间
+
+用法：
+    python scripts/federated_search.py lofi
+    python scripts/federated_search.py "piano calm" --budget 1.5 --providers jamendo
+"""
+import re
+import sys
+import time
+import argparse
+import threading
+import unicodedata
+from concurrent.futures import FIRST_COMPLETED, Future, wait
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from jamendo_client import get_client
+from ranking import rank_tracks
+from track_model import YTMusicTrack, from_results
+
+DEFAULT_BUDGET = 3.0
+DEFAULT_LIMIT = 20
+
+
+def _submit(func: Callable, *args) -> Future:
+    """在守护线程中运行 func
+
+    超时的源继续在后台跑完，不阻塞本次响应；守护线程也不会在解释器退出时被等待，
+    整体耗时真正受延迟预算约束（ThreadPoolExecutor 的工作线程在退出时总会被 join）。
+    """
+    future: Future = Future()
+
+    def run():
+        if not future.set_running_or_notify_cancel():
+            return
+        try:
+            future.set_result(func(*args))
+        except BaseException as e:
+            future.set_exception(e)
+
+    threading.Thread(target=run, name=f"provider-{getattr(func, '__name__', 'task')}", daemon=True).start()
+    return future
+
+
+class UnifiedTrack:
+    """各音乐源统一后的 track 记录"""
+
+    __slots__ = (
+        "provider", "id", "title", "artist", "duration",
+        "audio_url", "page_url", "cover_url", "score", "tags",
+    )
+
+    def __init__(
+        self, provider, id, title, artist, duration=0,
+        audio_url="", page_url="", cover_url="", score=0, tags=(),
+    ):
+        self.provider = provider
+        self.id = id
+        self.title = title
+        self.artist = artist
+        self.duration = duration
+        self.audio_url = audio_url
+        self.page_url = page_url
+        self.cover_url = cover_url
+        self.score = score
+        self.tags = tags
+
+    def __repr__(self) -> str:
+        return f"UnifiedTrack({self.provider}:{self.id}, {self.title!r} - {self.artist!r})"
+
+
+# 括号里的附加信息（feat. / remix / official audio 等）不参与去重
+_BRACKETS = re.compile(r"[\(\[【（].*?[\)\]】）]")
+_NON_WORD = re.compile(r"[\W_]+", re.UNICODE)
+# 不在括号里的 feat / ft 署名：只匹配独立的单词，不误伤 feather / ftp 之类
+_FEATURING = re.compile(r"\s(?:feat|ft)\.?(?:\s|$)")
+
+
+def normalize_text(text: str) -> str:
+    text = unicodedata.normalize("NFKC", text or "").lower()
+    text = _BRACKETS.sub("", text)
+    text = _FEATURING.split(text, maxsplit=1)[0]
+    return _NON_WORD.sub("", text)
+
+
+def dedup_key(track: UnifiedTrack) -> int:
+    """标题 + 艺术家规范化后的哈希，用于跨源去重"""
+    return hash((normalize_text(track.title), normalize_text(track.artist)))
+
+
+def search_jamendo(keyword: str, limit: int) -> List[UnifiedTrack]:
+    """Jamendo 源：搜索后按推荐度排序"""
+    results = from_results(get_client().search_tracks(keyword, limit=limit).get("results"))
+    ranked, _ = rank_tracks(results, k=limit)
+    return [
+        UnifiedTrack(
+            provider="jamendo",
+            id=str(track.id),
+            title=track.name,
+            artist=track.artist_name,
+            duration=track.duration,
+            audio_url=track.audio,
+            page_url=track.shareurl,
+            cover_url=track.image,
+            score=score,
+            tags=track.tags,
+        )
+        for score, _, _, track in ranked
+    ]
+
+
+def search_ytmusic(keyword: str, limit: int) -> List[UnifiedTrack]:
+    """YouTube Music 源：保持搜索返回的相关度顺序"""
+    from ytmusic_pool import get_pool
+
+    with get_pool().checkout() as ytmusic:
+        results = ytmusic.search(keyword, filter="songs", limit=limit) or []
+    tracks = []
+    for rank, track in enumerate(map(YTMusicTrack.from_dict, results[:limit])):
+        if not track.video_id:
+            continue
+        tracks.append(UnifiedTrack(
+            provider="ytmusic",
+            id=track.video_id,
+            title=track.title,
+            artist=track.artist,
+            duration=track.duration,
+            page_url=track.page_url,
+            cover_url=track.cover_url,
+            score=limit - rank,
+        ))
+    return tracks
+
+
+PROVIDERS: Dict[str, Callable[[str, int], List[UnifiedTrack]]] = {
+    "jamendo": search_jamendo,
+    "ytmusic": search_ytmusic,
+}
+
+
+def merge_results(results: Sequence[List[UnifiedTrack]]) -> List[UnifiedTrack]:
+    """按源轮流交错合并，同一首歌只保留第一次出现的版本"""
+    merged: List[UnifiedTrack] = []
+    seen = set()
+    longest = max((len(r) for r in results), default=0)
+    for i in range(longest):
+        for tracks in results:
+            if i >= len(tracks):
+                continue
+            key = dedup_key(tracks[i])
+            if key in seen:
+                continue
+            seen.add(key)
+            merged.append(tracks[i])
+    return merged
+
+
+def federated_search(
+    keyword: str,
+    providers: Sequence[str] = ("jamendo", "ytmusic"),
+    budget: float = DEFAULT_BUDGET,
+    deadlines: Optional[Dict[str, float]] = None,
+    limit: int = DEFAULT_LIMIT,
+) -> Tuple[List[UnifiedTrack], Dict[str, str]]:
+    """并发查询多个源，在延迟预算内返回合并去重后的结果
+
+    Args:
+        providers: 要查询的源，顺序决定合并时的优先级
+        budget: 整体延迟预算（秒）
+        deadlines: 各源单独的截止时间（秒），不超过 budget
+    Returns:
+        (tracks, status)：status 记录每个源的结果（ok / timeout / error: ...）
+    """
+    started = time.monotonic()
+    deadlines = deadlines or {}
+    futures = {_submit(PROVIDERS[name], keyword, limit): name for name in providers}
+    due = {name: started + min(deadlines.get(name, budget), budget) for name in providers}
+    results: Dict[str, List[UnifiedTrack]] = {}
+    status: Dict[str, str] = {}
+
+    pending = set(futures)
+    while pending:
+        now = time.monotonic()
+        for future in [f for f in pending if due[futures[f]] <= now]:
+            pending.discard(future)
+            status[futures[future]] = "timeout"
+        if not pending:
+            break
+        timeout = min(due[futures[f]] for f in pending) - now
+        done, pending = wait(pending, timeout=max(timeout, 0), return_when=FIRST_COMPLETED)
+        for future in done:
+            name = futures[future]
+            try:
+                results[name] = future.result()
+                status[name] = "ok"
+            except Exception as e:
+                status[name] = f"error: {e}"
+
+    merged = merge_results([results[name] for name in providers if name in results])
+    return merged, status
+
+
+def main():
+    """命令行：联合搜索并输出结果"""
+    parser = argparse.ArgumentParser(description="Jamendo + YouTube Music 联合搜索")
+    parser.add_argument("keyword")
+    parser.add_argument("--budget", type=float, default=DEFAULT_BUDGET, help="整体延迟预算（秒）")
+    parser.add_argument("--limit", type=int, default=DEFAULT_LIMIT, help="每个源取多少条")
+    parser.add_argument("--providers", default="jamendo,ytmusic", help="逗号分隔的源列表")
+    parser.add_argument("--top", type=int, default=10)
+    args = parser.parse_args()
+
+    providers = [p for p in args.providers.split(",") if p]
+    unknown = [p for p in providers if p not in PROVIDERS]
+    if unknown:
+        print(f"[错误] 未知的源: {', '.join(unknown)}（可选: {', '.join(PROVIDERS)}）")
+        sys.exit(1)
+
+    started = time.perf_counter()
+    tracks, status = federated_search(args.keyword, providers, args.budget, limit=args.limit)
+    elapsed = (time.perf_counter() - started) * 1000
+
+    print(f"[搜索] '{args.keyword}' → {len(tracks)} 首（{elapsed:.0f} ms）")
+    for name, state in status.items():
+        print(f"  - {name}: {state}")
+    print("-" * 80)
+    for rank, track in enumerate(tracks[:args.top], 1):
+        print(f"[{rank}] {track.title} - {track.artist}  ({track.provider}, {track.duration}s)")
+        print(f"     {track.audio_url or track.page_url}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,14 +1,20 @@
 """获取 Jamendo API 实际标签数据
 
 用途：从 Jamendo API 收集所有 genres, instruments, vartags
-输出：data/jamendo_tags.json
+输出：data/jamendo_tags.json（以及紧凑统计 data/jamendo_tags.stats.bin、标签共现矩阵 data/jamendo_tags.cooc.npz）
 """
 import os
 import sys
-import json
+import time
+import argparse
+import threading
+from array import array
+from bisect import bisect_left
+from heapq import merge
 from pathlib import Path
 from collections import Counter
-from typing import Dict, List, Set
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Set, Tuple
 
 # 修复 Windows 控制台编码问题
 if sys.platform == 'win32':
@@ -16,13 +22,16 @@ if sys.platform == 'win32':
     sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
     sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8')
 
-import requests
 from dotenv import load_dotenv
 
-load_dotenv()
+from fast_json import dump_file, dumps, loads
+from jamendo_client import JamendoAPIError, get_client
+from tag_cooccurrence import DEFAULT_COOC_PATH, CooccurrenceMatrix
+from tag_stats import load_tags, save_tag_stats, stats_path_for
+from track_model import JamendoTrack, lower_tags
+from track_store import DEFAULT_STORE_PATH, TrackStore, TrackStoreBuilder
 
-CLIENT_ID = os.environ.get("JAMENDO_CLIENT_ID", "f2567443")
-BASE_URL = "https://api.jamendo.com/v3.0"
+load_dotenv()
 
 # 搜索关键词列表，覆盖各种音乐类型
 SEARCH_KEYWORDS = [
@@ -33,69 +42,410 @@ SEARCH_KEYWORDS = [
     "vlog", "travel", "food", "sport", "game", "cinematic", "epic"
 ]
 
+# 并发抓取默认值：Jamendo 免费额度较紧，默认限速保守一些
+DEFAULT_CONCURRENCY = 4
+DEFAULT_RATE_LIMIT = 5.0  # 每秒最多请求数
 
-def search_jamendo(keyword: str, limit: int = 50) -> Dict:
-    """调用 Jamendo API 搜索音乐"""
-    url = f"{BASE_URL}/tracks/"
-    params = {
-        "client_id": CLIENT_ID,
-        "format": "json",
-        "limit": limit,
-        "search": keyword,
-        "include": "musicinfo"
-    }
-    
+# 深度翻页：Jamendo 单页最多 200 条，默认沿用原来的 50 条
+DEFAULT_PAGE_SIZE = 50
+
+
+class RateLimiter:
+    """线程安全的简单限速器：保证相邻两次请求间隔不小于 1/rate 秒"""
+
+    def __init__(self, rate: float):
+        self.interval = 1.0 / rate if rate and rate > 0 else 0.0
+        self._lock = threading.Lock()
+        self._next_slot = 0.0
+
+    def wait(self) -> None:
+        if not self.interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + self.interval
+        delay = slot - now
+        if delay > 0:
+            time.sleep(delay)
+
+
+def search_jamendo(
+    keyword: str,
+    limit: int = 50,
+    offset: int = 0,
+    orderby: Optional[str] = None,
+    refresh: bool = False,
+) -> Dict:
+    """调用 Jamendo API 搜索音乐（经本地缓存，refresh=True 时跳过缓存）
+
+    重试耗尽后抛出 JamendoAPIError，不再静默返回空结果，避免统计数据悄悄缺失。
+    """
     try:
-        response = requests.get(url, params=params, timeout=30)
-        response.raise_for_status()
-        return response.json()
-    except requests.exceptions.RequestException as e:
-        print(f"[警告] 搜索 '{keyword}' 失败: {e}")
-        return {"results": []}
+        return get_client().search_tracks(
+            keyword, limit=limit, offset=offset, orderby=orderby, refresh=refresh
+        )
+    except JamendoAPIError as e:
+        print(f"[错误] 搜索 '{keyword}' (offset={offset}) 失败: {e}")
+        raise
+
+
+def crawl_keyword(
+    keyword: str,
+    fetch_page: Callable[[str, int], Dict],
+    max_pages: int = 1,
+    page_size: int = DEFAULT_PAGE_SIZE,
+    track_budget: Optional[int] = None,
+) -> Iterator[List[Dict]]:
+    """按 offset 翻页抓取单个关键词，逐页产出新出现的 track
+
+    下一页在当前页被消费（统计标签）之前就已提交请求，实现预取。
+    以下情况提前停止：达到页数上限、达到 track 预算、返回不足一页、
+    或者某一页没有带来任何新的 track ID。
+    """
+    seen_ids: Set = set()
+    collected = 0
+    
+    with ThreadPoolExecutor(max_workers=1) as prefetcher:
+        future = prefetcher.submit(fetch_page, keyword, 0)
+        for page in range(max_pages):
+            results = future.result().get("results") or []
+            
+            new_tracks = []
+            for track in results:
+                track_id = track.get("id")
+                if track_id in seen_ids:
+                    continue
+                seen_ids.add(track_id)
+                new_tracks.append(track)
+            if track_budget is not None:
+                new_tracks = new_tracks[:track_budget - collected]
+            collected += len(new_tracks)
+            
+            has_more = (
+                new_tracks
+                and len(results) >= page_size
+                and page + 1 < max_pages
+                and (track_budget is None or collected < track_budget)
+            )
+            if has_more:
+                # 先提交下一页，再交出当前页给调用方统计
+                future = prefetcher.submit(fetch_page, keyword, (page + 1) * page_size)
+            
+            if new_tracks:
+                yield new_tracks
+            if not has_more:
+                break
+
+
+def fetch_keywords(
+    keywords: List[str],
+    concurrency: int = 1,
+    rate_limit: Optional[float] = None,
+    max_pages: int = 1,
+    page_size: int = DEFAULT_PAGE_SIZE,
+    track_budget: Optional[int] = None,
+) -> Iterator[Tuple[str, Iterable[List[Dict]]]]:
+    """按关键词顺序产出 (keyword, pages)，pages 为逐页的 track 列表
+
+    concurrency > 1 时使用线程池并发抓取各关键词，但结果仍按 keywords 的原始顺序产出，
+    保证后续 Counter 合并顺序与串行模式一致（most_common 的并列顺序依赖插入顺序）。
+    """
+    limiter = RateLimiter(rate_limit) if rate_limit else None
+
+    def fetch_page(keyword: str, offset: int) -> Dict:
+        if limiter:
+            limiter.wait()
+        return search_jamendo(keyword, limit=page_size, offset=offset)
+
+    def crawl(keyword: str) -> Iterator[List[Dict]]:
+        return crawl_keyword(keyword, fetch_page, max_pages, page_size, track_budget)
+
+    if concurrency <= 1:
+        for keyword in keywords:
+            yield keyword, crawl(keyword)
+        return
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        futures = [executor.submit(lambda k: list(crawl(k)), keyword) for keyword in keywords]
+        for keyword, future in zip(keywords, futures):
+            yield keyword, future.result()
+
+
+class SeenTrackIds:
+    """紧凑的已见 track ID 集合：有序 array('I') + 二分查找
+
+    每个 ID 只占 4 字节，远小于 Python set 中的 int 对象。
+    新 ID 先放进一个小 set，积累到主数组的一定比例后再一次性归并进去，
+    避免每次 array.insert 搬移整个数组（逐个插入时整个抓取是 O(n²)）。
+    """
+
+    # 待归并的新 ID 达到 max(该值, 主数组长度 / 4) 时归并
+    MERGE_THRESHOLD = 4096
+
+    def __init__(self, ids: Iterable[int] = ()):
+        self._ids = array("I", sorted(set(ids)))
+        self._pending: Set[int] = set()
+
+    def __len__(self) -> int:
+        return len(self._ids) + len(self._pending)
+
+    def __contains__(self, track_id: int) -> bool:
+        if track_id in self._pending:
+            return True
+        i = bisect_left(self._ids, track_id)
+        return i < len(self._ids) and self._ids[i] == track_id
+
+    def add(self, track_id: int) -> bool:
+        """加入 ID，返回是否为新 ID"""
+        if track_id in self:
+            return False
+        self._pending.add(track_id)
+        if len(self._pending) >= max(self.MERGE_THRESHOLD, len(self._ids) // 4):
+            self._merge()
+        return True
+
+    def _merge(self) -> None:
+        self._ids = array("I", merge(self._ids, sorted(self._pending)))
+        self._pending.clear()
+
+
+class HarvestCheckpoint:
+    """只追加的 JSONL 检查点文件
+
+    每处理完一页写一条 page 记录（只包含本页新计入的 track 及其标签），
+    每个关键词完成后写一条 done 记录。崩溃时最后一行可能不完整，读取时忽略。
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._file = None
+
+    def load(self) -> List[Dict]:
+        """读取已有记录"""
+        if not self.path.exists():
+            return []
+        records = []
+        with open(self.path, "rb") as f:
+            for line in f:
+                try:
+                    records.append(loads(line))
+                except ValueError:
+                    print("[警告] 检查点中存在不完整记录，已忽略")
+        return records
+
+    def open(self, resume: bool) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = open(self.path, "ab" if resume else "wb")
+
+    def append(self, record: Dict) -> None:
+        self._file.write(dumps(record) + b"\n")
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def close(self) -> None:
+        if self._file:
+            self._file.close()
+            self._file = None
+
+    def remove(self) -> None:
+        self.close()
+        if self.path.exists():
+            self.path.unlink()
+
+
+def track_tags(track: JamendoTrack) -> Tuple[List[str], List[str], List[str]]:
+    """提取 track 的 (genres, instruments, vartags)，统一小写"""
+    return lower_tags(track.genres), lower_tags(track.instruments), lower_tags(track.vartags)
+
+
+def track_details(results: List[Dict], counted: List[List]) -> List[List]:
+    """提取本页计入 track 的展示字段，写进检查点以便恢复时重建列式存储"""
+    counted_ids = {row[0] for row in counted}
+    return [
+        [
+            track.get("id"), track.get("name", ""), track.get("artist_name", ""),
+            track.get("duration", 0), track.get("position", 0), track.get("releasedate", ""),
+            (track.get("musicinfo") or {}).get("tags") or {},
+        ]
+        for track in results
+        if track.get("id") in counted_ids
+    ]
+
+
+def details_to_track(row: List) -> Dict:
+    """track_details 的逆操作"""
+    track_id, name, artist_name, duration, position, releasedate, tags = row
+    return {
+        "id": track_id, "name": name, "artist_name": artist_name, "duration": duration,
+        "position": position, "releasedate": releasedate, "musicinfo": {"tags": tags},
+    }
+
+
+def apply_tags(
+    tags: Tuple[List[str], List[str], List[str]],
+    all_genres: Counter,
+    all_instruments: Counter,
+    all_vartags: Counter,
+) -> None:
+    """把单首 track 的标签累加到计数器"""
+    genres, instruments, vartags = tags
+    all_genres.update(genres)
+    all_instruments.update(instruments)
+    all_vartags.update(vartags)
 
 
-def collect_tags() -> Dict[str, Dict]:
-    """收集所有标签并统计频率"""
+def tally_tracks(
+    results: List[Dict],
+    all_genres: Counter,
+    all_instruments: Counter,
+    all_vartags: Counter,
+    seen: Optional[SeenTrackIds] = None,
+    store: Optional[TrackStoreBuilder] = None,
+) -> List[List]:
+    """把一页结果中的标签累加到计数器
+
+    传入 seen 时按 track ID 去重，已计入过的 track 不再重复计数；
+    传入 store 时同时把计入的 track 写入列式存储。
+    返回本页实际计入的 [id, releasedate, genres, instruments, vartags] 列表
+    （用于写检查点和 sidecar）。
+    """
+    counted = []
+    for raw in results:
+        track_id = raw.get("id")
+        if seen is not None and track_id is not None:
+            if not seen.add(int(track_id)):
+                continue
+        # 每首只解码一次，统计标签和写列式存储共用
+        track = JamendoTrack.from_dict(raw)
+        tags = track_tags(track)
+        apply_tags(tags, all_genres, all_instruments, all_vartags)
+        counted.append([track_id, track.releasedate, *tags])
+        if store is not None and track_id is not None:
+            store.add(track)
+    return counted
+
+
+def collect_tags(
+    concurrency: int = 1,
+    rate_limit: Optional[float] = None,
+    max_pages: int = 1,
+    page_size: int = DEFAULT_PAGE_SIZE,
+    track_budget: Optional[int] = None,
+    checkpoint: Optional[HarvestCheckpoint] = None,
+    resume: bool = False,
+    contributions: Optional[List[List]] = None,
+    store: Optional[TrackStoreBuilder] = None,
+) -> Dict[str, Dict]:
+    """收集所有标签并统计频率
+
+    同一首 track 被多个关键词命中时只计数一次。
+
+    Args:
+        concurrency: 并发请求数，1 表示串行
+        rate_limit: 每秒最多请求数，None 表示不限速
+        max_pages: 每个关键词最多翻页数，1 表示只取第一页
+        page_size: 每页条数
+        track_budget: 每个关键词最多收集的 track 数，None 表示不限
+        checkpoint: 检查点文件，None 表示不写检查点
+        resume: 是否从检查点恢复（跳过已完成的关键词）
+        contributions: 传入列表时，追加每首计入 track 的标签贡献（用于写 sidecar）
+        store: 传入时把计入的 track 写入列式存储
+    """
     all_genres: Counter = Counter()
     all_instruments: Counter = Counter()
     all_vartags: Counter = Counter()
+    seen = SeenTrackIds()
+    done_keywords: Set[str] = set()
     
-    total_tracks = 0
+    total_hits = 0
     
     print("开始收集 Jamendo API 标签数据...")
     print(f"搜索关键词数量: {len(SEARCH_KEYWORDS)}")
+    if concurrency > 1:
+        print(f"并发数: {concurrency}，限速: {rate_limit or '不限'} 请求/秒")
+    if max_pages > 1:
+        print(f"深度翻页: 每个关键词最多 {max_pages} 页 × {page_size} 条"
+              + (f"，预算 {track_budget} 首" if track_budget else ""))
+    
+    if checkpoint and resume:
+        # 回放检查点：重建计数器与已见 ID；未完成的关键词会重新抓取，靠 seen 去重
+        # 命中数按 (关键词, 页号) 记录，只累计已完成的关键词，重新抓取的关键词不重复计数
+        page_hits: Dict[Tuple[str, int], int] = {}
+        for record in checkpoint.load():
+            if record.get("type") == "page":
+                page_hits[(record.get("keyword"), record.get("page"))] = record.get("hits", 0)
+                for track_id, releasedate, *tags in record["tracks"]:
+                    if track_id is not None:
+                        seen.add(int(track_id))
+                    apply_tags(tags, all_genres, all_instruments, all_vartags)
+                    if contributions is not None:
+                        contributions.append([track_id, releasedate, *tags])
+                if store is not None:
+                    for row in record.get("details", []):
+                        store.add(details_to_track(row))
+            elif record.get("type") == "done":
+                done_keywords.add(record["keyword"])
+        total_hits = sum(hits for (keyword, _), hits in page_hits.items() if keyword in done_keywords)
+        print(f"从检查点恢复: 已完成 {len(done_keywords)} 个关键词，已计入 {len(seen)} 首音乐")
+    if checkpoint:
+        checkpoint.open(resume)
     print("-" * 80)
     
-    for i, keyword in enumerate(SEARCH_KEYWORDS, 1):
-        print(f"[{i}/{len(SEARCH_KEYWORDS)}] 搜索: {keyword}")
-        data = search_jamendo(keyword)
-        
-        if not data.get("results"):
-            print(f"  未找到结果")
-            continue
-        
-        results = data["results"]
-        total_tracks += len(results)
-        print(f"  找到 {len(results)} 首音乐")
-        
-        for track in results:
-            musicinfo = track.get("musicinfo", {})
-            tags = musicinfo.get("tags", {})
+    keywords = [keyword for keyword in SEARCH_KEYWORDS if keyword not in done_keywords]
+    fetched = fetch_keywords(
+        keywords, concurrency, rate_limit, max_pages, page_size, track_budget
+    )
+    try:
+        for keyword, pages in fetched:
+            i = SEARCH_KEYWORDS.index(keyword) + 1
+            print(f"[{i}/{len(SEARCH_KEYWORDS)}] 搜索: {keyword}")
             
-            # 收集 genres
-            for genre in tags.get("genres", []):
-                all_genres[genre.lower()] += 1
+            keyword_hits = 0
+            keyword_new = 0
+            page_count = 0
+            for results in pages:
+                page_count += 1
+                keyword_hits += len(results)
+                counted = tally_tracks(
+                    results, all_genres, all_instruments, all_vartags, seen, store
+                )
+                keyword_new += len(counted)
+                if contributions is not None:
+                    contributions.extend(counted)
+                if checkpoint:
+                    checkpoint.append({
+                        "type": "page", "keyword": keyword, "page": page_count,
+                        "hits": len(results), "tracks": counted,
+                        "details": track_details(results, counted) if store is not None else [],
+                    })
+            if checkpoint:
+                checkpoint.append({"type": "done", "keyword": keyword})
             
-            # 收集 instruments
-            for instrument in tags.get("instruments", []):
-                all_instruments[instrument.lower()] += 1
+            if not keyword_hits:
+                print(f"  未找到结果")
+                continue
             
-            # 收集 vartags
-            for vartag in tags.get("vartags", []):
-                all_vartags[vartag.lower()] += 1
+            total_hits += keyword_hits
+            pages_note = f"（{page_count} 页）" if page_count > 1 else ""
+            print(f"  找到 {keyword_hits} 首音乐{pages_note}，新计入 {keyword_new} 首")
+    finally:
+        if checkpoint:
+            checkpoint.close()
     
+    return build_tags_data(all_genres, all_instruments, all_vartags, len(seen), total_hits)
+
+
+def build_tags_data(
+    all_genres: Counter,
+    all_instruments: Counter,
+    all_vartags: Counter,
+    total_tracks: int,
+    total_hits: int,
+) -> Dict[str, Dict]:
+    """打印汇总并生成 jamendo_tags.json 的内容"""
     print("-" * 80)
-    print(f"总计处理 {total_tracks} 首音乐")
+    print(f"总计处理 {total_tracks} 首音乐（去重前 {total_hits} 次命中）")
     print(f"收集到 {len(all_genres)} 个 genres")
     print(f"收集到 {len(all_instruments)} 个 instruments")
     print(f"收集到 {len(all_vartags)} 个 vartags")
@@ -106,6 +456,7 @@ def collect_tags() -> Dict[str, Dict]:
         "vartags": dict(all_vartags.most_common()),
         "statistics": {
             "total_tracks": total_tracks,
+            "total_hits": total_hits,
             "total_genres": len(all_genres),
             "total_instruments": len(all_instruments),
             "total_vartags": len(all_vartags)
@@ -113,21 +464,288 @@ def collect_tags() -> Dict[str, Dict]:
     }
 
 
+class TrackSidecar:
+    """记录每首已计入 track 标签贡献的 sidecar 文件（JSONL）
+
+    track 行: [id, releasedate, genres, instruments, vartags]
+    meta 行:  {"type": "meta", "watermark": 最新 releasedate, "last_ids": {关键词: 最新 track ID}}
+    文件只追加；同一 ID 以最后出现的行为准，meta 也以最后一行为准。
+    没有 ID 的 track 无法在增量刷新时对应，不写入 sidecar（旧文件中的此类行读取时忽略）。
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+
+    def exists(self) -> bool:
+        return self.path.exists()
+
+    def load(self) -> Tuple[Dict[int, List], Dict]:
+        rows: Dict[int, List] = {}
+        meta: Dict = {"watermark": "", "last_ids": {}}
+        with open(self.path, "rb") as f:
+            for line in f:
+                try:
+                    record = loads(line)
+                except ValueError:
+                    continue
+                if isinstance(record, dict):
+                    meta = record
+                elif record[0] is not None:
+                    rows[int(record[0])] = record
+        return rows, meta
+
+    def write(self, rows: Iterable[List], meta: Dict, append: bool = False) -> None:
+        with open(self.path, "ab" if append else "wb") as f:
+            f.writelines(dumps(row) + b"\n" for row in rows if row[0] is not None)
+            f.write(dumps({"type": "meta", **meta}) + b"\n")
+
+
+def sidecar_meta(rows: Iterable[List], last_ids: Optional[Dict[str, int]] = None) -> Dict:
+    """根据 track 行计算 sidecar 的 meta（最新发布日期水位线）"""
+    watermark = max((row[1] or "" for row in rows), default="")
+    return {"watermark": watermark, "last_ids": last_ids or {}}
+
+
+def probe_last_ids(keywords: List[str], rate_limit: Optional[float] = None) -> Dict[str, int]:
+    """按 releasedate_desc 各取一条，记录每个关键词当前最新的 track ID
+
+    完整抓取按相关度排序，首条并不是最新的；写 sidecar 前探测一次，
+    之后的增量刷新才有按关键词的停止点。探测失败的关键词只依赖水位线。
+    """
+    limiter = RateLimiter(rate_limit) if rate_limit else None
+    last_ids: Dict[str, int] = {}
+    for keyword in keywords:
+        if limiter:
+            limiter.wait()
+        try:
+            results = search_jamendo(
+                keyword, limit=1, orderby="releasedate_desc", refresh=True,
+            ).get("results") or []
+        except JamendoAPIError:
+            continue
+        for track in map(JamendoTrack.from_dict, results):
+            if track.id is not None:
+                last_ids[keyword] = track.id
+    return last_ids
+
+
+def counters_from(tags_data: Dict) -> Tuple[Counter, Counter, Counter]:
+    """从已有的 jamendo_tags.json 内容恢复计数器"""
+    return (
+        Counter(tags_data.get("genres", {})),
+        Counter(tags_data.get("instruments", {})),
+        Counter(tags_data.get("vartags", {})),
+    )
+
+
+def refresh_tags(
+    existing: Dict,
+    sidecar: TrackSidecar,
+    rate_limit: Optional[float] = None,
+    max_pages: int = 10,
+    page_size: int = DEFAULT_PAGE_SIZE,
+    store: Optional[TrackStoreBuilder] = None,
+) -> Dict[str, Dict]:
+    """增量刷新：只抓取上次运行之后发布或变化的 track，并把差量应用到计数器
+
+    每个关键词按 releasedate_desc 翻页，遇到上次记录的该关键词最新 track ID、
+    或发布日期早于水位线的 track 即停止。已知 track 若标签有变化，先减去旧贡献再加上新贡献。
+    """
+    all_genres, all_instruments, all_vartags = counters_from(existing)
+    rows, meta = sidecar.load()
+    watermark = meta.get("watermark", "")
+    last_ids: Dict[str, int] = dict(meta.get("last_ids", {}))
+    total_hits = existing.get("statistics", {}).get("total_hits", 0)
+    limiter = RateLimiter(rate_limit) if rate_limit else None
+    
+    print("开始增量刷新 Jamendo 标签数据...")
+    print(f"已有 {len(rows)} 首音乐，水位线: {watermark or '无'}")
+    print("-" * 80)
+    
+    changed_rows: List[List] = []
+    for i, keyword in enumerate(SEARCH_KEYWORDS, 1):
+        stop_id = last_ids.get(keyword)
+        added = updated = 0
+        newest_id = None
+        
+        for page in range(max_pages):
+            if limiter:
+                limiter.wait()
+            results = search_jamendo(
+                keyword, limit=page_size, offset=page * page_size,
+                orderby="releasedate_desc", refresh=True,
+            ).get("results") or []
+            
+            reached_known = False
+            for track in map(JamendoTrack.from_dict, results):
+                track_id = track.id
+                if track_id is None:
+                    # 没有 ID 的 track 无法与 sidecar 对应，也不能作为停止点
+                    continue
+                releasedate = track.releasedate
+                if newest_id is None:
+                    newest_id = track_id
+                if track_id == stop_id or (watermark and releasedate < watermark):
+                    reached_known = True
+                    break
+                
+                tags = track_tags(track)
+                old = rows.get(track_id)
+                if old is not None:
+                    if old[2:] == list(tags):
+                        continue
+                    # 标签有变化：撤销旧贡献
+                    all_genres.subtract(old[2])
+                    all_instruments.subtract(old[3])
+                    all_vartags.subtract(old[4])
+                    updated += 1
+                else:
+                    added += 1
+                    total_hits += 1
+                apply_tags(tags, all_genres, all_instruments, all_vartags)
+                row = [track_id, releasedate, *tags]
+                rows[track_id] = row
+                changed_rows.append(row)
+                if store is not None:
+                    store.add(track)
+            
+            if reached_known or len(results) < page_size:
+                break
+        
+        if newest_id is not None:
+            last_ids[keyword] = newest_id
+        print(f"[{i}/{len(SEARCH_KEYWORDS)}] {keyword}: 新增 {added} 首，更新 {updated} 首")
+    
+    # 减法可能留下 0 或负数计数，清理掉
+    for counter in (all_genres, all_instruments, all_vartags):
+        for tag in [tag for tag, count in counter.items() if count <= 0]:
+            del counter[tag]
+    
+    sidecar.write(changed_rows, sidecar_meta(rows.values(), last_ids), append=True)
+    return build_tags_data(all_genres, all_instruments, all_vartags, len(rows), total_hits)
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    """解析命令行参数"""
+    parser = argparse.ArgumentParser(description="从 Jamendo API 收集标签数据")
+    parser.add_argument(
+        "--concurrency", type=int, default=1,
+        help=f"并发请求数（默认 1 即串行，建议 {DEFAULT_CONCURRENCY}）",
+    )
+    parser.add_argument(
+        "--rate-limit", type=float, default=DEFAULT_RATE_LIMIT,
+        help=f"每秒最多请求数，0 表示不限速（默认 {DEFAULT_RATE_LIMIT}）",
+    )
+    parser.add_argument(
+        "--max-pages", type=int, default=1,
+        help="深度翻页：每个关键词最多抓取的页数（默认 1）",
+    )
+    parser.add_argument(
+        "--page-size", type=int, default=DEFAULT_PAGE_SIZE,
+        help=f"每页条数，最大 200（默认 {DEFAULT_PAGE_SIZE}）",
+    )
+    parser.add_argument(
+        "--track-budget", type=int, default=None,
+        help="每个关键词最多收集的 track 数（默认不限）",
+    )
+    parser.add_argument(
+        "--resume", action="store_true",
+        help="从上次中断的检查点继续（data/jamendo_tags.checkpoint.jsonl）",
+    )
+    parser.add_argument(
+        "--no-checkpoint", action="store_true",
+        help="不写检查点文件",
+    )
+    parser.add_argument(
+        "--incremental", action="store_true",
+        help="增量模式：基于已有 jamendo_tags.json 和 sidecar，只抓取新发布或变化的 track",
+    )
+    return parser.parse_args(argv)
+
+
 def main():
     """主函数"""
+    args = parse_args()
+    
     # 创建 data 目录
     data_dir = Path(__file__).parent.parent / "data"
     data_dir.mkdir(exist_ok=True)
     
-    # 收集标签
-    tags_data = collect_tags()
-    
-    # 保存到 JSON 文件
     output_file = data_dir / "jamendo_tags.json"
-    with open(output_file, "w", encoding="utf-8") as f:
-        json.dump(tags_data, f, indent=2, ensure_ascii=False)
+    sidecar = TrackSidecar(data_dir / "jamendo_tags.tracks.jsonl")
+    store_path = DEFAULT_STORE_PATH
+    page_size = min(200, max(1, args.page_size))
+    checkpoint = None
+    
+    if args.incremental:
+        if not (output_file.exists() and sidecar.exists()):
+            print(f"[错误] 增量模式需要已有的 {output_file.name} 和 {sidecar.path.name}")
+            print("请先不带 --incremental 完整运行一次")
+            sys.exit(1)
+        existing = load_tags(output_file)
+        store = None
+        if store_path.exists():
+            store = TrackStoreBuilder()
+            store.extend_from(TrackStore(store_path))
+        else:
+            print(f"[提示] 未找到 {store_path.name}，本次不更新列式存储")
+        try:
+            tags_data = refresh_tags(
+                existing,
+                sidecar,
+                rate_limit=args.rate_limit or None,
+                # 增量模式下翻页一般很浅，未显式指定时给 10 页的上限兜底
+                max_pages=args.max_pages if args.max_pages > 1 else 10,
+                page_size=page_size,
+                store=store,
+            )
+        except JamendoAPIError:
+            sys.exit(1)
+    else:
+        if not args.no_checkpoint:
+            checkpoint = HarvestCheckpoint(data_dir / "jamendo_tags.checkpoint.jsonl")
+        
+        # 收集标签
+        contributions: List[List] = []
+        store = TrackStoreBuilder()
+        try:
+            tags_data = collect_tags(
+                concurrency=max(1, args.concurrency),
+                rate_limit=args.rate_limit or None,
+                max_pages=max(1, args.max_pages),
+                page_size=page_size,
+                track_budget=args.track_budget,
+                checkpoint=checkpoint,
+                resume=args.resume,
+                contributions=contributions,
+                store=store,
+            )
+        except JamendoAPIError:
+            if checkpoint:
+                print("[提示] 进度已保存，可使用 --resume 从检查点继续")
+            sys.exit(1)
+        last_ids = probe_last_ids(SEARCH_KEYWORDS, rate_limit=args.rate_limit or None)
+        sidecar.write(contributions, sidecar_meta(contributions, last_ids))
+    
+    # 保存到 JSON 文件，旁边再写一份读取更快的紧凑统计
+    dump_file(tags_data, output_file, pretty=True)
+    stats_path = save_tag_stats(tags_data, stats_path_for(output_file))
+    
+    print(f"\n标签数据已保存到: {output_file}（紧凑统计: {stats_path.name}）")
+    
+    # 共现矩阵基于全部已计入 track 重建（增量模式下从 sidecar 读取完整的行）
+    rows = sidecar.load()[0].values() if args.incremental else contributions
+    matrix = CooccurrenceMatrix.from_rows(rows)
+    matrix.save(DEFAULT_COOC_PATH)
+    print(f"标签共现矩阵已保存到: {DEFAULT_COOC_PATH}（{len(matrix)} 个标签，{len(matrix.data) // 2} 组共现）")
+    
+    if store is not None:
+        store.save(store_path)
+        print(f"列式 track 存储已保存到: {store_path}（{len(store)} 首）")
     
-    print(f"\n标签数据已保存到: {output_file}")
+    # 结果已完整落盘，检查点不再需要
+    if checkpoint:
+        checkpoint.remove()
     
     # 打印 Top 20
     print("\n=== Top 20 Genres ===")
@@ -0,0 +1,215 @@
+"""Jamendo API 本地磁盘响应缓存
+
+用途：所有 Jamendo 脚本共享的 HTTP GET 缓存，避免重复消耗 API 额度
+存储：SQLite（默认 data/cache/jamendo_http.sqlite3），按规范化 URL + 参数做 key
+策略：TTL 过期 + 按总大小的 LRU 淘汰；过期条目带 ETag / Last-Modified 做条件请求复验
+
+环境变量：
+    JAMENDO_CACHE=0          关闭缓存
+    JAMENDO_CACHE_PATH       缓存文件路径
+    JAMENDO_CACHE_TTL        过期时间（秒，默认 86400）
+    JAMENDO_CACHE_MAX_MB     缓存总大小上限（MB，默认 50）
+"""
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+DEFAULT_CACHE_PATH = Path(__file__).parent.parent / "data" / "cache" / "jamendo_http.sqlite3"
+DEFAULT_TTL = 24 * 3600
+DEFAULT_MAX_BYTES = 50 * 1024 * 1024
+
+# 复验时需要保留的响应头
+_KEPT_HEADERS = ("Content-Type", "ETag", "Last-Modified")
+
+
+def normalize_request(url: str, params: Optional[Dict] = None) -> str:
+    """规范化 URL + 参数：小写 scheme/host，参数排序后拼接"""
+    parts = urlsplit(url)
+    path = parts.path or "/"
+    items = [(str(k), str(v)) for k, v in (params or {}).items() if v is not None]
+    items = sorted(items + parse_qsl(parts.query, keep_blank_values=True))
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), path, urlencode(items), ""))
+
+
+def cache_key(url: str, params: Optional[Dict] = None) -> str:
+    return hashlib.sha1(normalize_request(url, params).encode("utf-8")).hexdigest()
+
+
+def build_response(url: str, status_code: int, body: bytes, headers: Dict) -> requests.Response:
+    """把缓存内容还原为 requests.Response，调用方代码无需区分是否命中缓存"""
+    response = requests.Response()
+    response.status_code = status_code
+    response._content = body
+    response.headers = CaseInsensitiveDict(headers)
+    response.url = url
+    response.encoding = "utf-8"
+    return response
+
+
+class ResponseCache:
+    """基于 SQLite 的 HTTP 响应缓存（线程安全，多进程共享同一文件）"""
+
+    def __init__(
+        self,
+        path: Path = DEFAULT_CACHE_PATH,
+        ttl: float = DEFAULT_TTL,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+    ):
+        self.path = Path(path)
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                url TEXT NOT NULL,
+                status INTEGER NOT NULL,
+                headers TEXT NOT NULL,
+                body BLOB NOT NULL,
+                size INTEGER NOT NULL,
+                expires_at REAL NOT NULL,
+                last_access REAL NOT NULL
+            )
+            """
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_last_access ON responses(last_access)")
+        self._conn.commit()
+
+    def lookup(self, key: str) -> Optional[Tuple[str, int, Dict, bytes, bool]]:
+        """查询缓存，返回 (url, status, headers, body, 是否仍新鲜)"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT url, status, headers, body, expires_at FROM responses WHERE key = ?",
+                (key,),
+            ).fetchone()
+            if row is None:
+                return None
+            self._conn.execute(
+                "UPDATE responses SET last_access = ? WHERE key = ?", (time.time(), key)
+            )
+            self._conn.commit()
+        url, status, headers, body, expires_at = row
+        return url, status, json.loads(headers), bytes(body), expires_at > time.time()
+
+    def store(self, key: str, url: str, status: int, headers: Dict, body: bytes) -> None:
+        kept = {name: headers[name] for name in _KEPT_HEADERS if name in headers}
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, url, status, json.dumps(kept), body, len(body), now + self.ttl, now),
+            )
+            self._evict()
+            self._conn.commit()
+
+    def touch(self, key: str) -> None:
+        """304 复验成功：延长过期时间"""
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "UPDATE responses SET expires_at = ?, last_access = ? WHERE key = ?",
+                (now + self.ttl, now, key),
+            )
+            self._conn.commit()
+
+    def _evict(self) -> None:
+        """总大小超限时按最近访问时间淘汰（调用方持有锁）"""
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        rows = self._conn.execute("SELECT key, size FROM responses ORDER BY last_access").fetchall()
+        for key, size in rows:
+            if total <= self.max_bytes:
+                break
+            self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+            total -= size
+
+    def invalidate(self, key: str) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+            self._conn.commit()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM responses")
+            self._conn.commit()
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+def cached_get(
+    url: str,
+    params: Optional[Dict] = None,
+    timeout: float = 30,
+    cache: Optional["ResponseCache"] = None,
+    refresh: bool = False,
+    session: Optional[requests.Session] = None,
+) -> requests.Response:
+    """带缓存的 GET，接口与 requests.get 对齐
+
+    新鲜命中直接返回；过期条目带 If-None-Match / If-Modified-Since 复验，304 时沿用旧内容。
+    只缓存 200 响应，其他状态码原样返回。传入 session 时复用其连接池。
+    """
+    http = session if session is not None else requests
+    cache = cache if cache is not None else get_default_cache()
+    if cache is None:
+        return http.get(url, params=params, timeout=timeout)
+
+    key = cache_key(url, params)
+    cached = None if refresh else cache.lookup(key)
+    headers = {}
+    if cached:
+        cached_url, status, cached_headers, body, fresh = cached
+        if fresh:
+            response = build_response(cached_url, status, body, cached_headers)
+            response.from_cache = True
+            return response
+        if "ETag" in cached_headers:
+            headers["If-None-Match"] = cached_headers["ETag"]
+        if "Last-Modified" in cached_headers:
+            headers["If-Modified-Since"] = cached_headers["Last-Modified"]
+
+    response = http.get(url, params=params, timeout=timeout, headers=headers or None)
+    if cached and response.status_code == 304:
+        cache.touch(key)
+        response = build_response(cached_url, status, body, cached_headers)
+        response.from_cache = True
+        return response
+    if response.status_code == 200:
+        cache.store(key, response.url, response.status_code, response.headers, response.content)
+    response.from_cache = False
+    return response
+
+
+_default_cache: Optional[ResponseCache] = None
+_default_lock = threading.Lock()
+
+
+def get_default_cache() -> Optional[ResponseCache]:
+    """按环境变量创建进程内共享的缓存实例；JAMENDO_CACHE=0 时返回 None"""
+    global _default_cache
+    if os.environ.get("JAMENDO_CACHE", "1") == "0":
+        return None
+    with _default_lock:
+        if _default_cache is None:
+            _default_cache = ResponseCache(
+                path=Path(os.environ.get("JAMENDO_CACHE_PATH", DEFAULT_CACHE_PATH)),
+                ttl=float(os.environ.get("JAMENDO_CACHE_TTL", DEFAULT_TTL)),
+                max_bytes=int(float(os.environ.get("JAMENDO_CACHE_MAX_MB", 50)) * 1024 * 1024),
+            )
+        return _default_cache
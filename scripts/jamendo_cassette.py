@@ -0,0 +1,219 @@
+"""HTTP 录制 / 回放（cassette）
+
+用途：在 JamendoClient 的共享 Session 上挂一个传输层适配器，把每个请求及其响应
+      录制到本地 cassette，之后完全离线地回放；探测脚本、基准测试和整条抓取流程
+      可以在没有网络的机器上得到确定的结果
+存储：cassette 是一个目录
+    - index.json：请求 key → 状态码、响应头、响应体摘要、录制时的耗时
+    - bodies/<sha256>.gz：gzip 压缩的响应体，按内容寻址（相同内容只存一份）
+    请求 key 由方法 + 规范化 URL（参数排序，去掉 client_id）计算，与所用 client_id 无关
+模式：
+    once     已录制的直接回放，未录制的发真实请求并录制（默认）
+    record   全部发真实请求并覆盖录制
+    replay   只回放，未录制的请求报错（不访问网络）
+说明：429 / 5xx 这类瞬时错误不录制，避免回放时反复出现；
+      命中本地响应缓存的请求不会到达传输层，录制时建议 JAMENDO_CACHE=0
+
+环境变量（JamendoClient 构造时读取）：
+    JAMENDO_CASSETTE             cassette 目录，设置后启用
+    JAMENDO_CASSETTE_MODE        once / record / replay
+    JAMENDO_CASSETTE_LATENCY     回放时模拟的延迟：毫秒数，或 recorded（按录制时的耗时）
+
+用法：
+    JAMENDO_CACHE=0 JAMENDO_CASSETTE=data/cassettes/probe python scripts/check_popularity_fields.py
+    JAMENDO_CASSETTE=data/cassettes/probe JAMENDO_CASSETTE_MODE=replay python scripts/check_popularity_fields.py
+    python scripts/jamendo_cassette.py data/cassettes/probe     # 查看 cassette 内容
+"""
+import os
+import sys
+import gzip
+import json
+import time
+import hashlib
+import argparse
+import threading
+from pathlib import Path
+from datetime import timedelta
+from typing import Dict, Optional, Union
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from jamendo_cache import build_response
+
+MODES = ("once", "record", "replay")
+# 不参与请求 key 的参数
+IGNORED_PARAMS = ("client_id",)
+# 不录制的瞬时错误状态码
+TRANSIENT_STATUSES = (429, 500, 502, 503, 504)
+_KEPT_HEADERS = ("Content-Type", "ETag", "Last-Modified")
+
+
+def normalize_url(url: str) -> str:
+    """参数排序并去掉 client_id（cassette 里不保存凭据）"""
+    parts = urlsplit(url)
+    query = sorted((k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True) if k not in IGNORED_PARAMS)
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), parts.path or "/", urlencode(query), ""))
+
+
+def request_key(method: str, url: str) -> str:
+    return hashlib.sha1(f"{method.upper()} {normalize_url(url)}".encode("utf-8")).hexdigest()
+
+
+class CassetteMiss(requests.exceptions.ConnectionError):
+    """回放模式下请求未录制"""
+
+
+class Cassette:
+    """cassette 目录的读写（线程安全）"""
+
+    def __init__(self, path: Union[str, Path]):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._index: Dict[str, Dict] = {}
+        index_path = self.path / "index.json"
+        if index_path.exists():
+            with open(index_path, "r", encoding="utf-8") as f:
+                self._index = json.load(f)
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._index
+
+    def entries(self) -> Dict[str, Dict]:
+        return dict(self._index)
+
+    def _body_path(self, digest: str) -> Path:
+        return self.path / "bodies" / f"{digest}.gz"
+
+    def load(self, key: str) -> Optional[Dict]:
+        """返回录制的条目（附带解压后的 body），不存在时返回 None"""
+        entry = self._index.get(key)
+        if entry is None:
+            return None
+        with gzip.open(self._body_path(entry["body"]), "rb") as f:
+            return {**entry, "content": f.read()}
+
+    def save(self, key: str, method: str, url: str, status: int, headers: Dict,
+             content: bytes, elapsed: float) -> None:
+        digest = hashlib.sha256(content).hexdigest()
+        body_path = self._body_path(digest)
+        with self._lock:
+            if not body_path.exists():
+                body_path.parent.mkdir(parents=True, exist_ok=True)
+                tmp_path = body_path.with_suffix(".tmp")
+                with gzip.open(tmp_path, "wb", compresslevel=9) as f:
+                    f.write(content)
+                tmp_path.replace(body_path)
+            self._index[key] = {
+                "method": method,
+                "url": normalize_url(url),
+                "status": status,
+                "headers": {name: headers[name] for name in _KEPT_HEADERS if name in headers},
+                "body": digest,
+                "elapsed": round(elapsed, 4),
+            }
+            index_path = self.path / "index.json"
+            tmp_path = index_path.with_suffix(".tmp")
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(self._index, f, indent=1, ensure_ascii=False, sort_keys=True)
+            tmp_path.replace(index_path)
+
+
+class CassetteAdapter(HTTPAdapter):
+    """录制 / 回放的传输适配器，录制时沿用 HTTPAdapter 的连接池与重试策略"""
+
+    def __init__(self, cassette: Cassette, mode: str = "once",
+                 latency: Union[float, str, None] = None, **kwargs):
+        if mode not in MODES:
+            raise ValueError(f"未知的 cassette 模式: {mode}（可选: {', '.join(MODES)}）")
+        super().__init__(**kwargs)
+        self.cassette = cassette
+        self.mode = mode
+        self.latency = latency
+
+    def send(self, request, **kwargs):
+        key = request_key(request.method, request.url)
+        if self.mode != "record" and key in self.cassette:
+            return self._replay(request, key)
+        if self.mode == "replay":
+            raise CassetteMiss(f"cassette 中没有该请求: {request.method} {request.url}", request=request)
+
+        started = time.perf_counter()
+        response = super().send(request, **kwargs)
+        elapsed = time.perf_counter() - started
+        if response.status_code not in TRANSIENT_STATUSES:
+            self.cassette.save(
+                key, request.method, response.url, response.status_code,
+                response.headers, response.content, elapsed,
+            )
+        return response
+
+    def _replay(self, request, key: str) -> requests.Response:
+        entry = self.cassette.load(key)
+        delay = entry["elapsed"] if self.latency == "recorded" else (self.latency or 0)
+        if delay:
+            time.sleep(delay)
+        response = build_response(request.url, entry["status"], entry["content"], entry["headers"])
+        response.request = request
+        response.elapsed = timedelta(seconds=delay)
+        return response
+
+
+def parse_latency(value: Optional[str]) -> Union[float, str, None]:
+    """'recorded' 原样返回，数字按毫秒转成秒"""
+    if not value:
+        return None
+    if value == "recorded":
+        return value
+    return float(value) / 1000
+
+
+def install_cassette(
+    session: requests.Session,
+    path: Union[str, Path],
+    mode: str = "once",
+    latency: Union[float, str, None] = None,
+    **adapter_kwargs,
+) -> CassetteAdapter:
+    """把 cassette 适配器挂到 session 的 http:// 与 https:// 上"""
+    adapter = CassetteAdapter(Cassette(path), mode=mode, latency=latency, **adapter_kwargs)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return adapter
+
+
+def cassette_from_env() -> Optional[Dict]:
+    """读取环境变量，未设置 JAMENDO_CASSETTE 时返回 None"""
+    path = os.environ.get("JAMENDO_CASSETTE")
+    if not path:
+        return None
+    return {
+        "path": path,
+        "mode": os.environ.get("JAMENDO_CASSETTE_MODE", "once"),
+        "latency": parse_latency(os.environ.get("JAMENDO_CASSETTE_LATENCY")),
+    }
+
+
+def main():
+    """命令行：查看 cassette 内容"""
+    parser = argparse.ArgumentParser(description="查看 HTTP cassette")
+    parser.add_argument("path")
+    args = parser.parse_args()
+
+    cassette = Cassette(args.path)
+    if not len(cassette):
+        print(f"[错误] {args.path} 中没有录制内容")
+        sys.exit(1)
+    bodies = list((Path(args.path) / "bodies").glob("*.gz"))
+    size = sum(p.stat().st_size for p in bodies)
+    print(f"[cassette] {len(cassette)} 个请求，{len(bodies)} 个响应体，压缩后 {size / 1024:.1f} KB")
+    for entry in sorted(cassette.entries().values(), key=lambda e: e["url"]):
+        print(f"  {entry['status']} {entry['elapsed'] * 1000:>7.1f} ms  {entry['method']} {entry['url']}")
+
+
+if __name__ == "__main__":
+    main()
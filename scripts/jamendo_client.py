@@ -0,0 +1,215 @@
+"""Jamendo API 共享客户端
+
+用途：所有 Python 脚本统一通过 JamendoClient 访问 Jamendo API
+特性：
+    - requests.Session 连接池 + HTTP/1.1 keep-alive，避免每次请求重新握手
+    - 429 / 5xx / 连接错误自动重试，指数退避 + 随机抖动，遵守 Retry-After
+    - 经 jamendo_cache 本地缓存
+    - 可挂载 jamendo_cassette 录制 / 回放，离线得到确定的响应
+    - 响应体经 fast_json 直接从 bytes 解码（安装 orjson 时更快）
+    - 所有失败统一抛出 JamendoAPIError，不再静默返回空结果
+
+环境变量：
+    JAMENDO_CLIENT_ID        client_id（默认使用公共测试 ID）
+    JAMENDO_CASSETTE         cassette 目录，设置后录制 / 回放（另见 jamendo_cassette.py）
+    JAMENDO_BASE_URL         API 根地址，可指向本地模拟服务（scripts/fake_jamendo.py），
+                             如 http://127.0.0.1:8766/v3.0
+"""
+import os
+import threading
+from typing import Dict, Iterable, Iterator, List, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from fast_json import loads
+from jamendo_cache import ResponseCache, cache_key, cached_get, get_default_cache
+from jamendo_cassette import cassette_from_env, install_cassette
+
+DEFAULT_CLIENT_ID = "f2567443"
+BASE_URL = "https://api.jamendo.com/v3.0"
+
+DEFAULT_TIMEOUT = 30
+DEFAULT_MAX_RETRIES = 3
+DEFAULT_BACKOFF = 0.5
+DEFAULT_POOL_SIZE = 16
+
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+
+class JamendoAPIError(Exception):
+    """Jamendo API 调用失败（网络错误、HTTP 错误或 API 返回 status=failed）"""
+
+    def __init__(
+        self,
+        message: str,
+        status_code: Optional[int] = None,
+        url: Optional[str] = None,
+        body: Optional[str] = None,
+    ):
+        super().__init__(message)
+        self.status_code = status_code
+        self.url = url
+        self.body = body
+
+
+class JamendoClient:
+    """带连接池、重试和缓存的 Jamendo API 客户端（线程安全，可跨线程共享）"""
+
+    def __init__(
+        self,
+        client_id: Optional[str] = None,
+        base_url: Optional[str] = None,
+        timeout: float = DEFAULT_TIMEOUT,
+        max_retries: int = DEFAULT_MAX_RETRIES,
+        backoff: float = DEFAULT_BACKOFF,
+        pool_size: int = DEFAULT_POOL_SIZE,
+        cache: Optional[ResponseCache] = None,
+        use_cache: bool = True,
+    ):
+        # 在构造时才读环境变量，保证脚本里的 load_dotenv() 已经生效
+        self.client_id = client_id or os.environ.get("JAMENDO_CLIENT_ID", DEFAULT_CLIENT_ID)
+        self.base_url = (base_url or os.environ.get("JAMENDO_BASE_URL") or BASE_URL).rstrip("/")
+        self.timeout = timeout
+        self.cache = (cache or get_default_cache()) if use_cache else None
+
+        retry = Retry(
+            total=max_retries,
+            connect=max_retries,
+            read=max_retries,
+            status=max_retries,
+            status_forcelist=RETRY_STATUSES,
+            allowed_methods=frozenset(["GET"]),
+            backoff_factor=backoff,
+            backoff_jitter=backoff,
+            respect_retry_after_header=True,
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+        self.session = requests.Session()
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        cassette = cassette_from_env()
+        if cassette is not None:
+            install_cassette(
+                self.session, **cassette,
+                pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry,
+            )
+
+    def get(self, endpoint: str, params: Optional[Dict] = None, refresh: bool = False) -> Dict:
+        """GET 任意端点（如 "tracks"），返回解析后的 JSON
+
+        Raises:
+            JamendoAPIError: 网络错误、非 200 状态码、非 JSON 响应或 API 返回失败
+        """
+        url = f"{self.base_url}/{endpoint.strip('/')}/"
+        query = {"client_id": self.client_id, "format": "json"}
+        query.update({k: v for k, v in (params or {}).items() if v is not None})
+
+        try:
+            if self.cache is None:
+                # cached_get 把 cache=None 当作"用默认缓存"，关闭缓存时直接走 session
+                response = self.session.get(url, params=query, timeout=self.timeout)
+            else:
+                response = cached_get(
+                    url, params=query, timeout=self.timeout,
+                    cache=self.cache, refresh=refresh, session=self.session,
+                )
+        except requests.exceptions.RequestException as e:
+            raise JamendoAPIError(f"请求失败: {e}", url=url) from e
+
+        if response.status_code != 200:
+            raise JamendoAPIError(
+                f"HTTP {response.status_code}",
+                status_code=response.status_code,
+                url=response.url,
+                body=response.text[:500],
+            )
+        try:
+            # 直接从 bytes 解码，跳过 requests 的编码探测和 str 中间副本
+            data = loads(response.content)
+        except ValueError as e:
+            raise JamendoAPIError(
+                "响应不是合法 JSON", status_code=200, url=response.url, body=response.text[:500]
+            ) from e
+
+        # Jamendo 出错时也可能返回 200，错误信息在 headers 字段里
+        headers = data.get("headers", {}) if isinstance(data, dict) else {}
+        if headers.get("status") == "failed":
+            if self.cache is not None:
+                self.cache.invalidate(cache_key(url, query))
+            raise JamendoAPIError(
+                f"API 错误 {headers.get('code')}: {headers.get('error_message', '')}",
+                status_code=200,
+                url=response.url,
+                body=response.text[:500],
+            )
+        return data
+
+    def tracks(self, refresh: bool = False, **params) -> Dict:
+        """调用 /tracks/ 端点"""
+        return self.get("tracks", params, refresh=refresh)
+
+    def search_tracks(
+        self,
+        keyword: str,
+        limit: int = 50,
+        offset: int = 0,
+        orderby: Optional[str] = None,
+        include: Optional[str] = "musicinfo",
+        refresh: bool = False,
+    ) -> Dict:
+        """按关键词搜索 track"""
+        return self.tracks(
+            refresh=refresh,
+            search=keyword,
+            limit=limit,
+            offset=offset or None,
+            orderby=orderby,
+            include=include,
+        )
+
+    def iter_search_pages(
+        self,
+        keywords: Iterable[str],
+        orderbys: Iterable[Optional[str]] = (None,),
+        max_pages: int = 1,
+        page_size: int = 50,
+        include: Optional[str] = "musicinfo",
+    ) -> Iterator[List[Dict]]:
+        """惰性地逐页产出多个关键词 × 多种排序方式的搜索结果
+
+        每页只在上一页被消费后才请求，不足一页时提前结束该组合。
+        """
+        orderbys = list(orderbys)
+        for keyword in keywords:
+            for orderby in orderbys:
+                for page in range(max_pages):
+                    results = self.search_tracks(
+                        keyword,
+                        limit=page_size,
+                        offset=page * page_size,
+                        orderby=orderby,
+                        include=include,
+                    ).get("results") or []
+                    if results:
+                        yield results
+                    if len(results) < page_size:
+                        break
+
+    def close(self) -> None:
+        self.session.close()
+
+
+_clients: Dict[Optional[str], JamendoClient] = {}
+_clients_lock = threading.Lock()
+
+
+def get_client(client_id: Optional[str] = None) -> JamendoClient:
+    """进程内共享的客户端（每个 client_id 一个，复用同一连接池）"""
+    with _clients_lock:
+        client = _clients.get(client_id)
+        if client is None:
+            client = _clients[client_id] = JamendoClient(client_id=client_id)
+        return client
@@ -0,0 +1,339 @@
+"""标签映射结果的跨进程缓存服务
+
+用途：mapTagsWithAI 每次搜索 / 刷新都要调用一次 DeepSeek，同样的界面标签 + 偏好会反复请求。
+      本服务把映射结果按 "规范化后排序的标签集合 + 偏好哈希" 缓存到 SQLite，
+      多个进程（前端 dev server、Python 脚本）通过本地 HTTP 接口共享
+存储：SQLite（默认 data/cache/tag_mapping.sqlite3），TTL 过期 + 按条目数的 LRU 淘汰
+预热：启动时把 data/tag_mapping.json 中每个单独的界面标签写入静态映射（不带偏好）；
+      多标签、带偏好的意图精确 key 未命中时，若其中每个标签都有静态映射，
+      就把各标签的静态结果合并后返回（source 为 "static"），不必走 LLM
+
+接口（默认 http://127.0.0.1:8765）：
+    POST /lookup   {"tags": UserSelectedTags, "preferences": UserPreferences}
+                   命中 → 200 {"hit": true, "key", "source", "result"}；未命中 → 404 {"hit": false, "key"}
+    POST /store    {"tags", "preferences", "result": MusicTags, "source": "llm"} → 200 {"key"}
+    GET  /stats    条目数、命中率
+    DELETE /cache  清空
+
+环境变量：
+    MAPPING_CACHE_PATH       缓存文件路径
+    MAPPING_CACHE_TTL        LLM 结果过期时间（秒，默认 7 天）
+    MAPPING_CACHE_MAX        最多保留的条目数（默认 5000）
+
+用法：
+    python scripts/mapping_cache.py --port 8765
+"""
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import argparse
+import threading
+from pathlib import Path
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Iterable, Optional, Tuple
+
+from tag_resolver import DEFAULT_MAPPING_PATH, load_resolver, normalize_key
+
+DEFAULT_CACHE_PATH = Path(__file__).parent.parent / "data" / "cache" / "tag_mapping.sqlite3"
+DEFAULT_TTL = 7 * 24 * 3600
+DEFAULT_MAX_ENTRIES = 5000
+DEFAULT_PORT = 8765
+
+# 参与缓存 key 的界面标签类别（duration 不影响映射结果）
+INTENT_FIELDS = ("genres", "moods", "themes")
+PREFERENCE_FIELDS = ("genres", "instruments", "vartags")
+
+
+def canonical_tags(values: Optional[Dict], fields: Iterable[str]) -> Dict[str, list]:
+    """每个类别的标签规范化、去重、排序；空类别省略"""
+    canonical = {}
+    for field in fields:
+        labels = sorted({normalize_key(label) for label in (values or {}).get(field) or []} - {""})
+        if labels:
+            canonical[field] = labels
+    return canonical
+
+
+def preferences_hash(preferences: Optional[Dict]) -> str:
+    canonical = canonical_tags(preferences, PREFERENCE_FIELDS)
+    if not canonical:
+        return "-"
+    return hashlib.sha1(json.dumps(canonical, sort_keys=True).encode("utf-8")).hexdigest()[:16]
+
+
+def mapping_key(tags: Optional[Dict], preferences: Optional[Dict] = None) -> str:
+    """缓存 key：规范化后的标签集合 + 偏好哈希"""
+    intent = json.dumps(canonical_tags(tags, INTENT_FIELDS), sort_keys=True, separators=(",", ":"))
+    return f"{hashlib.sha1(intent.encode('utf-8')).hexdigest()}:{preferences_hash(preferences)}"
+
+
+class MappingCache:
+    """基于 SQLite 的映射结果缓存（线程安全，多进程共享同一文件）"""
+
+    def __init__(
+        self,
+        path: Path = DEFAULT_CACHE_PATH,
+        ttl: float = DEFAULT_TTL,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+    ):
+        self.path = Path(path)
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS mappings (
+                key TEXT PRIMARY KEY,
+                intent TEXT NOT NULL,
+                result TEXT NOT NULL,
+                source TEXT NOT NULL,
+                expires_at REAL NOT NULL,
+                last_access REAL NOT NULL
+            )
+            """
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_mapping_access ON mappings(last_access)")
+        self._conn.commit()
+
+    def get(self, tags: Dict, preferences: Optional[Dict] = None) -> Optional[Tuple[str, Dict]]:
+        """查询，返回 (source, result)；过期条目视为未命中并删除
+
+        精确 key 未命中时退回到逐标签的静态映射合并（见 _compose_static）。
+        """
+        key = mapping_key(tags, preferences)
+        now = time.time()
+        with self._lock:
+            row = self._row(key, now)
+            cached = (row[1], json.loads(row[0])) if row is not None else self._compose_static(tags, now)
+            self._conn.commit()
+            if cached is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        return cached
+
+    def _row(self, key: str, now: float) -> Optional[Tuple[str, str]]:
+        """读取未过期的条目 (result, source) 并刷新访问时间（调用方持有锁）"""
+        row = self._conn.execute(
+            "SELECT result, source, expires_at FROM mappings WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return None
+        if row[2] <= now:
+            self._conn.execute("DELETE FROM mappings WHERE key = ?", (key,))
+            return None
+        self._conn.execute("UPDATE mappings SET last_access = ? WHERE key = ?", (now, key))
+        return row[0], row[1]
+
+    def _compose_static(self, tags: Dict, now: float) -> Optional[Tuple[str, Dict]]:
+        """意图中每个标签都有静态映射时，按顺序合并各标签的结果（调用方持有锁）
+
+        静态映射不依赖偏好，因此任何偏好都可以复用；只要有一个标签没有静态映射就视为未命中。
+        """
+        merged: Dict[str, list] = {}
+        found = False
+        # 按原始标签顺序合并，与 TagResolver.expand 的输出顺序一致
+        for category in INTENT_FIELDS:
+            for label in (tags or {}).get(category) or []:
+                if not normalize_key(label):
+                    continue
+                row = self._row(mapping_key({category: [label]}), now)
+                if row is None or row[1] != "static":
+                    return None
+                found = True
+                for kind, values in json.loads(row[0]).items():
+                    bucket = merged.setdefault(kind, [])
+                    bucket.extend(v for v in values if v not in bucket)
+        return ("static", merged) if found else None
+
+    def put(
+        self,
+        tags: Dict,
+        preferences: Optional[Dict],
+        result: Dict,
+        source: str = "llm",
+        ttl: Optional[float] = None,
+    ) -> str:
+        key = mapping_key(tags, preferences)
+        now = time.time()
+        intent = json.dumps(canonical_tags(tags, INTENT_FIELDS), ensure_ascii=False)
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO mappings VALUES (?, ?, ?, ?, ?, ?)",
+                (key, intent, json.dumps(result, ensure_ascii=False), source,
+                 now + (self.ttl if ttl is None else ttl), now),
+            )
+            self._evict()
+            self._conn.commit()
+        return key
+
+    def _evict(self) -> None:
+        """条目数超限时按最近访问时间淘汰（调用方持有锁）"""
+        count = self._conn.execute("SELECT COUNT(*) FROM mappings").fetchone()[0]
+        if count > self.max_entries:
+            self._conn.execute(
+                "DELETE FROM mappings WHERE key IN "
+                "(SELECT key FROM mappings ORDER BY last_access LIMIT ?)",
+                (count - self.max_entries,),
+            )
+
+    def warm(self, mapping_path: Path = DEFAULT_MAPPING_PATH) -> int:
+        """把 tag_mapping.json 中每个界面标签的静态映射写入缓存（已有 LLM 结果不覆盖）
+
+        静态映射经 tag_resolver 校验，只保留词表中存在的标签；源文件不变时结果不变，
+        因此不设过期（到源文件变化、重新预热时覆盖）。
+        """
+        resolver = load_resolver(mapping_path)
+        with open(mapping_path, "r", encoding="utf-8") as f:
+            mappings = json.load(f).get("mappings", {})
+        warmed = 0
+        for category in INTENT_FIELDS:
+            for label in mappings.get(category, {}):
+                tags = {category: [label]}
+                key = mapping_key(tags)
+                with self._lock:
+                    row = self._conn.execute(
+                        "SELECT source FROM mappings WHERE key = ?", (key,)
+                    ).fetchone()
+                if row is not None and row[0] != "static":
+                    continue
+                result, _ = resolver.expand(tags)
+                self.put(tags, None, result, source="static", ttl=float("inf"))
+                warmed += 1
+        return warmed
+
+    def stats(self) -> Dict:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT source, COUNT(*) FROM mappings GROUP BY source"
+            ).fetchall()
+        total = self.hits + self.misses
+        return {
+            "entries": dict(rows),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0,
+        }
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM mappings")
+            self._conn.commit()
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+def make_handler(cache: MappingCache):
+    """生成绑定到 cache 的请求处理类"""
+
+    class MappingCacheHandler(BaseHTTPRequestHandler):
+        def _send(self, status: int, payload: Optional[Dict] = None) -> None:
+            body = json.dumps(payload or {}, ensure_ascii=False).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            # 前端 dev server 跨域访问
+            self.send_header("Access-Control-Allow-Origin", "*")
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _read_json(self) -> Optional[Dict]:
+            length = int(self.headers.get("Content-Length") or 0)
+            try:
+                data = json.loads(self.rfile.read(length) or b"{}")
+            except json.JSONDecodeError:
+                return None
+            return data if isinstance(data, dict) else None
+
+        def do_OPTIONS(self):
+            self.send_response(204)
+            self.send_header("Access-Control-Allow-Origin", "*")
+            self.send_header("Access-Control-Allow-Methods", "GET, POST, DELETE, OPTIONS")
+            self.send_header("Access-Control-Allow-Headers", "Content-Type")
+            self.end_headers()
+
+        def do_GET(self):
+            if self.path == "/stats":
+                self._send(200, cache.stats())
+            else:
+                self._send(404, {"error": "not found"})
+
+        def do_POST(self):
+            data = self._read_json()
+            if data is None:
+                self._send(400, {"error": "请求体必须是 JSON 对象"})
+                return
+            tags, preferences = data.get("tags") or {}, data.get("preferences")
+            if self.path == "/lookup":
+                key = mapping_key(tags, preferences)
+                cached = cache.get(tags, preferences)
+                if cached is None:
+                    self._send(404, {"hit": False, "key": key})
+                else:
+                    source, result = cached
+                    self._send(200, {"hit": True, "key": key, "source": source, "result": result})
+            elif self.path == "/store":
+                result = data.get("result")
+                if not isinstance(result, dict):
+                    self._send(400, {"error": "缺少 result"})
+                    return
+                key = cache.put(tags, preferences, result, source=str(data.get("source") or "llm"))
+                self._send(200, {"key": key})
+            else:
+                self._send(404, {"error": "not found"})
+
+        def do_DELETE(self):
+            if self.path == "/cache":
+                cache.clear()
+                self._send(200, {"cleared": True})
+            else:
+                self._send(404, {"error": "not found"})
+
+        def log_message(self, format, *args):
+            pass
+
+    return MappingCacheHandler
+
+
+def serve(cache: MappingCache, host: str = "127.0.0.1", port: int = DEFAULT_PORT) -> ThreadingHTTPServer:
+    """创建服务（调用方负责 serve_forever / shutdown）"""
+    return ThreadingHTTPServer((host, port), make_handler(cache))
+
+
+def main():
+    """命令行：启动映射缓存服务"""
+    parser = argparse.ArgumentParser(description="标签映射结果缓存服务")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--no-warm", action="store_true", help="启动时不从 tag_mapping.json 预热")
+    args = parser.parse_args()
+
+    cache = MappingCache(
+        path=Path(os.environ.get("MAPPING_CACHE_PATH", DEFAULT_CACHE_PATH)),
+        ttl=float(os.environ.get("MAPPING_CACHE_TTL", DEFAULT_TTL)),
+        max_entries=int(os.environ.get("MAPPING_CACHE_MAX", DEFAULT_MAX_ENTRIES)),
+    )
+    if not args.no_warm:
+        print(f"[预热] 写入 {cache.warm()} 条静态映射")
+    server = serve(cache, args.host, args.port)
+    print(f"[服务] 映射缓存监听 http://{args.host}:{args.port}（Ctrl+C 退出）")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        cache.close()
+
+
+if __name__ == "__main__":
+    main()
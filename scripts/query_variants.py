@@ -0,0 +1,214 @@
+"""查询变体生成与批量执行
+
+用途：把一个搜索意图（界面上选的 genres / moods / themes 标签）展开成 N 个查询变体，
+      再作为一个去重后的批次统一执行，替代 useSearch.refresh 里随机抽标签、盲目发起的实时搜索
+展开：标签经编译好的映射解析器（tag_resolver.py）映射为 Jamendo 标签，按 data/jamendo_tags.json
+      中的频率加权抽样（不在词表里的标签直接丢弃，避免零命中查询）
+执行：
+    - 本地模式：用离线倒排索引（tag_index.py）算出每个变体的候选集合，
+      贪心挑选能带来新候选的变体，已被覆盖的变体直接剪掉，不发任何请求
+    - 在线模式：按规范化后的标签集合去重，并发请求（经本地缓存，重复查询不耗额度）；
+      某个变体零结果时，包含它全部标签的更严格变体直接剪掉
+
+用法：
+    python scripts/query_variants.py --genres Rock --moods Chill -n 6
+    python scripts/query_variants.py --genres Jazz --moods Romantic --local
+"""
+import sys
+import math
+import random
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, FrozenSet, List, Optional, Sequence, Set, Tuple
+
+from tag_resolver import DEFAULT_TAGS_PATH, TagResolver, load_resolver
+from tag_stats import load_tags
+
+# 可选乐器取 jamendo_tags.json 中最常见的前若干个
+INSTRUMENT_POOL = 12
+
+Variant = Tuple[str, ...]
+
+
+class VariantGenerator:
+    """按频率加权，把界面标签意图展开为多个 Jamendo 查询变体"""
+
+    def __init__(self, resolver: TagResolver, frequencies: Dict):
+        self.resolver = resolver
+        self.frequencies = frequencies
+        self.instruments = list(frequencies.get("instruments", {}))[:INSTRUMENT_POOL]
+
+    def weight(self, kind: str, tag: str) -> float:
+        """标签在已抓取样本中的频率权重，不在词表中返回 0"""
+        return math.log1p(self.frequencies.get(kind, {}).get(tag, 0))
+
+    def candidates(self, intent: Dict[str, Sequence[str]]) -> Dict[str, List[Tuple[str, float]]]:
+        """把意图展开成每个界面类别的 (tag, 权重) 候选列表"""
+        pools: Dict[str, Dict[str, float]] = {}
+        for category, labels in intent.items():
+            for label in labels:
+                for kind, tag in self.resolver.resolve(category, label):
+                    weight = self.weight(kind, tag)
+                    if weight > 0:
+                        pools.setdefault(category, {})[tag] = weight
+        return {category: sorted(tags.items(), key=lambda x: -x[1]) for category, tags in pools.items()}
+
+    def generate(
+        self,
+        intent: Dict[str, Sequence[str]],
+        n: int = 6,
+        seed: Optional[int] = None,
+        instrument_rate: float = 0.5,
+    ) -> List[Variant]:
+        """生成至多 n 个互不相同的变体，每个变体从每个界面类别各取一个标签"""
+        pools = self.candidates(intent)
+        if not pools:
+            return []
+        rng = random.Random(seed)
+        variants: List[Variant] = []
+        seen: Set[FrozenSet[str]] = set()
+        for _ in range(n * 10):
+            if len(variants) >= n:
+                break
+            tags = [
+                rng.choices([t for t, _ in pool], weights=[w for _, w in pool])[0]
+                for pool in pools.values()
+            ]
+            if self.instruments and rng.random() < instrument_rate:
+                tags.append(rng.choice(self.instruments))
+            key = frozenset(tags)
+            if key in seen:
+                continue
+            seen.add(key)
+            variants.append(tuple(sorted(key)))
+        return variants
+
+
+class BatchResult:
+    """一次批量执行的结果与统计"""
+
+    __slots__ = ("tracks", "executed", "pruned", "requests")
+
+    def __init__(self):
+        self.tracks: List = []        # 合并去重后的候选（本地模式为 track ID，在线模式为 track dict）
+        self.executed: List[Variant] = []
+        self.pruned: List[Variant] = []
+        self.requests = 0
+
+
+def plan(variants: Sequence[Variant]) -> List[Variant]:
+    """规范化并去重：标签集合相同的变体只保留一个"""
+    planned: List[Variant] = []
+    seen: Set[FrozenSet[str]] = set()
+    for variant in variants:
+        key = frozenset(tag.lower() for tag in variant)
+        if key and key not in seen:
+            seen.add(key)
+            planned.append(tuple(sorted(key)))
+    return planned
+
+
+def execute_local(variants: Sequence[Variant], index) -> BatchResult:
+    """在离线倒排索引上执行：贪心覆盖，没有新增候选的变体被剪掉"""
+    result = BatchResult()
+    sets = {variant: set(index.query_and(variant).to_array().tolist()) for variant in plan(variants)}
+    covered: Set[int] = set()
+    remaining = dict(sets)
+    while remaining:
+        best = max(remaining, key=lambda v: len(remaining[v] - covered))
+        gain = remaining.pop(best) - covered
+        if not gain:
+            result.pruned.extend([best, *remaining])
+            break
+        result.executed.append(best)
+        result.tracks.extend(sorted(gain))
+        covered |= gain
+    return result
+
+
+def execute_live(
+    variants: Sequence[Variant],
+    client=None,
+    limit: int = 20,
+    orderby: str = "popularity_total_desc",
+    max_workers: int = 4,
+) -> BatchResult:
+    """在线执行：去重后按标签数从少到多分轮并发请求
+
+    同一轮内并发；某个变体零结果时，后续轮次中包含它全部标签的变体直接剪掉。
+    """
+    from jamendo_client import JamendoAPIError, get_client
+
+    client = client or get_client()
+    result = BatchResult()
+    empty: List[FrozenSet[str]] = []
+    seen_ids: Set = set()
+
+    def search(variant: Variant) -> List[Dict]:
+        try:
+            return client.search_tracks(" ".join(variant), limit=limit, orderby=orderby).get("results") or []
+        except JamendoAPIError as e:
+            print(f"[警告] 变体 {' + '.join(variant)} 查询失败: {e}")
+            return []
+
+    by_size: Dict[int, List[Variant]] = {}
+    for variant in plan(variants):
+        by_size.setdefault(len(variant), []).append(variant)
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        for size in sorted(by_size):
+            batch = []
+            for variant in by_size[size]:
+                if any(e <= frozenset(variant) for e in empty):
+                    result.pruned.append(variant)
+                else:
+                    batch.append(variant)
+            for variant, tracks in zip(batch, executor.map(search, batch)):
+                result.requests += 1
+                result.executed.append(variant)
+                if not tracks:
+                    empty.append(frozenset(variant))
+                for track in tracks:
+                    if track.get("id") not in seen_ids:
+                        seen_ids.add(track.get("id"))
+                        result.tracks.append(track)
+    return result
+
+
+def main():
+    """命令行：生成变体并批量执行"""
+    parser = argparse.ArgumentParser(description="查询变体生成与批量执行")
+    parser.add_argument("--genres", nargs="*", default=[])
+    parser.add_argument("--moods", nargs="*", default=[])
+    parser.add_argument("--themes", nargs="*", default=[])
+    parser.add_argument("-n", type=int, default=6, help="变体数量")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--local", action="store_true", help="只用离线倒排索引，不发请求")
+    args = parser.parse_args()
+
+    intent = {"genres": args.genres, "moods": args.moods, "themes": args.themes}
+    generator = VariantGenerator(load_resolver(), load_tags(DEFAULT_TAGS_PATH))
+    variants = generator.generate(intent, n=args.n, seed=args.seed)
+    if not variants:
+        print("[错误] 意图中的标签都不在 jamendo_tags.json 词表里")
+        sys.exit(1)
+
+    print(f"[变体] 生成 {len(variants)} 个:")
+    for variant in variants:
+        print(f"  - {' + '.join(variant)}")
+
+    if args.local:
+        from tag_index import load_index
+        index, _ = load_index()
+        batch = execute_local(variants, index)
+    else:
+        batch = execute_live(variants)
+
+    print(f"[执行] 实际执行 {len(batch.executed)} 个，剪掉 {len(batch.pruned)} 个，"
+          f"发出请求 {batch.requests} 次，得到 {len(batch.tracks)} 个不重复候选")
+    for variant in batch.pruned:
+        print(f"  [剪掉] {' + '.join(variant)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,221 @@
+"""Jamendo 结果推荐度排序
+
+用途：把一页（或多页合并的）track 转成列式数组，向量化计算推荐度，
+      再用 argpartition 取 Top-K，避免对整个候选池做全排序
+输入：API 返回的 track dict，或 track_model.JamendoTrack（按属性取值，省去 dict 查找）
+依赖：numpy（未安装时退化为逐条 pick_score + heapq，结果一致）
+"""
+import heapq
+from typing import Callable, Dict, Iterable, Iterator, List, Sequence, Tuple, Union
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - 仅在未安装 numpy 时走纯 Python 路径
+    np = None
+
+from track_model import POPULARITY_KEYS, JamendoTrack
+
+SCORE_SOURCES = POPULARITY_KEYS + ("position_inverted", "release_year", "fallback_rank")
+
+Track = Union[Dict, JamendoTrack]
+# 排名结果: (score, score_source, 原始位置, track)
+Ranked = Tuple[int, str, int, Track]
+
+
+def _getter(track: Track) -> Callable[[Track, str], object]:
+    """dict 用 dict.get，JamendoTrack 用 getattr（字段名相同）"""
+    return getattr if isinstance(track, JamendoTrack) else dict.get
+
+
+def pick_score(track: Track) -> Tuple[int, str]:
+    """从 track 中提取推荐度分数，按优先级降级策略"""
+    get = _getter(track)
+    # 优先级1: popularity 相关字段
+    for key in POPULARITY_KEYS:
+        value = get(track, key)
+        if isinstance(value, (int, float)) and value > 0:
+            return int(value), key
+
+    # 优先级2: position 字段（越小越靠前，转换为分数：1000 - position）
+    position = get(track, "position")
+    if isinstance(position, int) and position > 0:
+        # position 越小越好，所以用 1000 - position 作为分数
+        return 1000 - position, "position_inverted"
+
+    # 优先级3: 使用 releasedate 的年份（较新的可能更受欢迎）
+    releasedate = get(track, "releasedate") or ""
+    if releasedate:
+        try:
+            year = int(releasedate.split("-")[0])
+            # 2020年后的音乐给更高分数
+            if year >= 2020:
+                return year, "release_year"
+        except (ValueError, IndexError):
+            pass
+
+    return 0, "fallback_rank"
+
+
+def _numeric(value) -> float:
+    """与 pick_score 相同的数值判定：只接受 int/float，其余视为 0"""
+    return value if isinstance(value, (int, float)) else 0
+
+
+def _release_year(releasedate) -> int:
+    if not releasedate:
+        return 0
+    try:
+        return int(releasedate.split("-")[0])
+    except (ValueError, IndexError, AttributeError):
+        return 0
+
+
+def to_columns(tracks: Sequence[Track]) -> Dict[str, "np.ndarray"]:
+    """把 track 列表转成列式数组（每个字段一次遍历；同一批 track 须为同一种类型）"""
+    get = _getter(tracks[0]) if len(tracks) else dict.get
+    columns = {
+        key: np.fromiter((_numeric(get(t, key)) for t in tracks), dtype=np.float64, count=len(tracks))
+        for key in POPULARITY_KEYS
+    }
+    columns["position"] = np.fromiter(
+        (p if isinstance(p, int) else 0 for p in (get(t, "position") for t in tracks)),
+        dtype=np.int64, count=len(tracks),
+    )
+    columns["release_year"] = np.fromiter(
+        (_release_year(get(t, "releasedate")) for t in tracks), dtype=np.int64, count=len(tracks)
+    )
+    return columns
+
+
+def score_columns(columns: Dict[str, "np.ndarray"]) -> Tuple["np.ndarray", "np.ndarray"]:
+    """向量化计算推荐度
+
+    Returns:
+        (scores, sources)：int64 分数列，以及 SCORE_SOURCES 下标组成的来源列
+    """
+    conditions = [columns[key] > 0 for key in POPULARITY_KEYS]
+    choices = [columns[key] for key in POPULARITY_KEYS]
+    conditions.append(columns["position"] > 0)
+    choices.append(1000 - columns["position"])
+    conditions.append(columns["release_year"] >= 2020)
+    choices.append(columns["release_year"])
+
+    # np.select 按条件顺序取第一个满足的分支，等价于 pick_score 的逐级降级
+    scores = np.select(conditions, [np.trunc(c) for c in choices], default=0).astype(np.int64)
+    sources = np.select(conditions, range(len(conditions)), default=len(conditions)).astype(np.int8)
+    return scores, sources
+
+
+def score_batch(tracks: Sequence[Track]) -> Tuple["np.ndarray", "np.ndarray"]:
+    """对一批 track 打分，返回 (scores, sources)"""
+    return score_columns(to_columns(tracks))
+
+
+def top_k_indices(scores: "np.ndarray", k: int) -> "np.ndarray":
+    """按 (分数降序, 原始位置升序) 取前 k 个下标
+
+    把分数和位置压进同一个 int64 键后用 argpartition 选出前 k，再只对这 k 个排序。
+    """
+    n = len(scores)
+    if n == 0 or k <= 0:
+        return np.empty(0, dtype=np.int64)
+    # 分数相同则原始位置越靠前键越大
+    keys = scores.astype(np.int64) * n + (n - 1 - np.arange(n, dtype=np.int64))
+    if k < n:
+        candidates = np.argpartition(-keys, k - 1)[:k]
+    else:
+        candidates = np.arange(n)
+    return candidates[np.argsort(-keys[candidates], kind="stable")]
+
+
+def rank_tracks(tracks: Sequence[Track], k: int = 5) -> Tuple[List[Ranked], Dict[str, int]]:
+    """对 track 列表排名并取 Top-K
+
+    Returns:
+        (top_k, 来源分布)：top_k 元素为 (score, score_source, 原始位置, track)，
+        排序规则与原先的 sort(key=(score, -i), reverse=True) 一致
+    """
+    if np is None:
+        scored = [(*pick_score(track), i, track) for i, track in enumerate(tracks)]
+        distribution: Dict[str, int] = {}
+        for _, source, _, _ in scored:
+            distribution[source] = distribution.get(source, 0) + 1
+        top = heapq.nsmallest(k, scored, key=lambda x: (-x[0], x[2]))
+        return top, distribution
+
+    scores, sources = score_batch(tracks)
+    top = [
+        (int(scores[i]), SCORE_SOURCES[sources[i]], int(i), tracks[i])
+        for i in top_k_indices(scores, k)
+    ]
+    counts = np.bincount(sources, minlength=len(SCORE_SOURCES))
+    distribution = {SCORE_SOURCES[i]: int(c) for i, c in enumerate(counts) if c}
+    return top, distribution
+
+
+class StreamingTopK:
+    """有界小顶堆维护的流式 Top-K
+
+    按到达顺序给每个 track 编全局位置，排序规则与 rank_tracks 一致：
+    分数降序，分数相同则先到达的优先。内存只与 k 有关，与拉取的页数无关。
+    同一 track ID 重复到达（多个关键词/排序方式命中）时只保留得分更高的一条。
+    """
+
+    def __init__(self, k: int = 5):
+        self.k = k
+        self.seen = 0
+        self._heap: List[Tuple[int, int, str, Track]] = []  # (score, -位置, source, track)
+        self._by_id: Dict = {}
+
+    def push(self, score: int, source: str, track: Track) -> bool:
+        """加入一个候选，返回当前 Top-K 是否发生变化"""
+        position = self.seen
+        self.seen += 1
+        entry = (score, -position, source, track)
+        track_id = _getter(track)(track, "id")
+
+        existing = self._by_id.get(track_id) if track_id is not None else None
+        if existing is not None:
+            if entry[:2] <= existing[:2]:
+                return False
+            self._heap.remove(existing)
+            heapq.heapify(self._heap)
+        elif len(self._heap) >= self.k:
+            if entry[:2] <= self._heap[0][:2]:
+                return False
+            evicted = heapq.heappop(self._heap)
+            self._by_id.pop(_getter(evicted[3])(evicted[3], "id"), None)
+
+        heapq.heappush(self._heap, entry)
+        if track_id is not None:
+            self._by_id[track_id] = entry
+        return True
+
+    def push_page(self, tracks: Sequence[Track]) -> bool:
+        """加入一整页候选（整页向量化打分），返回 Top-K 是否发生变化"""
+        if np is None:
+            scored = [pick_score(track) for track in tracks]
+        else:
+            scores, sources = score_batch(tracks)
+            scored = [(int(s), SCORE_SOURCES[c]) for s, c in zip(scores, sources)]
+        changed = False
+        for (score, source), track in zip(scored, tracks):
+            changed = self.push(score, source, track) or changed
+        return changed
+
+    def top(self) -> List[Ranked]:
+        """当前 Top-K，元素为 (score, score_source, 全局位置, track)"""
+        ordered = sorted(self._heap, key=lambda e: e[:2], reverse=True)
+        return [(score, source, -neg_pos, track) for score, neg_pos, source, track in ordered]
+
+
+def stream_top_k(pages: Iterable[Sequence[Track]], k: int = 5) -> Iterator[List[Ranked]]:
+    """消费页迭代器，每当 Top-K 变化时产出当前 Top-K
+
+    pages 可以是多个关键词、多种排序方式拼接起来的生成器，调用方可在
+    最后一页到达前就展示已有结果。
+    """
+    ranker = StreamingTopK(k)
+    for page in pages:
+        if ranker.push_page(page):
+            yield ranker.top()
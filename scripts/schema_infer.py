@@ -0,0 +1,265 @@
+"""流式字段结构推断
+
+用途：把任意多的 track（可以一页一页地流入）折叠成一棵字段路径 trie，
+      每个节点记录出现次数、类型分布、null 比例，并按关键字把字段归类（受欢迎度 / 音乐信息 / 基础 / 其他）；
+      整个抓取过程可以持续观察 API 返回结构有没有变化（新字段、字段消失、类型改变）
+复杂度：每个值只访问一次，内存只与不同字段路径的数量有关，与 track 数量无关
+路径：对象字段用 "."，列表元素统一记为 "[]"，如 musicinfo.tags.genres[]
+
+用法：
+    python scripts/schema_infer.py lofi piano --pages 2
+    python scripts/schema_infer.py lofi --save data/schema.json       # 保存快照
+    python scripts/schema_infer.py lofi --compare data/schema.json    # 与快照比较
+"""
+import sys
+import json
+import argparse
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+POPULARITY_KEYWORDS = (
+    "popular", "listen", "download", "rating", "score", "view", "play", "like", "favorite", "trend",
+)
+BASIC_FIELDS = (
+    "id", "name", "artist_name", "duration", "audio", "image", "releasedate", "position", "license",
+)
+LIST_ITEM = "[]"
+
+
+def type_name(value) -> str:
+    if value is None:
+        return "null"
+    if isinstance(value, bool):
+        return "bool"
+    if isinstance(value, int):
+        return "int"
+    if isinstance(value, float):
+        return "float"
+    if isinstance(value, str):
+        return "str"
+    if isinstance(value, dict):
+        return "object"
+    if isinstance(value, list):
+        return "list"
+    return type(value).__name__
+
+
+def classify(path: str) -> str:
+    """按关键字归类：popularity / musicinfo / basic / other"""
+    lowered = path.lower()
+    if any(keyword in lowered for keyword in POPULARITY_KEYWORDS):
+        return "popularity"
+    if "musicinfo" in lowered:
+        return "musicinfo"
+    if path in BASIC_FIELDS:
+        return "basic"
+    return "other"
+
+
+class FieldNode:
+    """trie 节点：一个字段路径的统计"""
+
+    __slots__ = ("children", "count", "types")
+
+    def __init__(self):
+        self.children: Dict[str, "FieldNode"] = {}
+        self.count = 0
+        self.types: Dict[str, int] = {}
+
+    @property
+    def nulls(self) -> int:
+        return self.types.get("null", 0)
+
+    def child(self, key: str) -> "FieldNode":
+        node = self.children.get(key)
+        if node is None:
+            node = self.children[key] = FieldNode()
+        return node
+
+    def to_dict(self) -> Dict:
+        data = {"count": self.count, "types": dict(self.types)}
+        if self.children:
+            data["children"] = {k: v.to_dict() for k, v in self.children.items()}
+        return data
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "FieldNode":
+        node = cls()
+        node.count = data.get("count", 0)
+        node.types = dict(data.get("types", {}))
+        node.children = {k: cls.from_dict(v) for k, v in data.get("children", {}).items()}
+        return node
+
+
+class SchemaInferrer:
+    """增量折叠 JSON 对象的字段结构"""
+
+    def __init__(self):
+        self.root = FieldNode()
+        self.documents = 0
+
+    def fold(self, document) -> None:
+        """折叠一个对象（通常是一首 track）"""
+        self.documents += 1
+        self.root.count += 1
+        # 显式栈代替递归，避免深层嵌套时的递归开销
+        stack: List[Tuple[FieldNode, object]] = [(self.root, document)]
+        while stack:
+            node, value = stack.pop()
+            if isinstance(value, dict):
+                for key, child_value in value.items():
+                    child = node.child(key)
+                    self._record(child, child_value)
+                    stack.append((child, child_value))
+            elif isinstance(value, list):
+                if value:
+                    item = node.child(LIST_ITEM)
+                    for element in value:
+                        self._record(item, element)
+                        stack.append((item, element))
+
+    def fold_many(self, documents: Iterable) -> "SchemaInferrer":
+        for document in documents:
+            self.fold(document)
+        return self
+
+    @staticmethod
+    def _record(node: FieldNode, value) -> None:
+        node.count += 1
+        name = type_name(value)
+        node.types[name] = node.types.get(name, 0) + 1
+
+    def paths(self) -> Iterator[Tuple[str, FieldNode, FieldNode]]:
+        """深度优先产出 (路径, 节点, 父节点)，同级按字段名排序"""
+        def push(prefix: str, parent: FieldNode) -> None:
+            # 逆序压栈，出栈时即为字母序
+            for key in sorted(parent.children, reverse=True):
+                if key == LIST_ITEM:
+                    path = f"{prefix}{LIST_ITEM}"
+                else:
+                    path = f"{prefix}.{key}" if prefix else key
+                stack.append((path, parent.children[key], parent))
+
+        stack: List[Tuple[str, FieldNode, FieldNode]] = []
+        push("", self.root)
+        while stack:
+            path, node, parent = stack.pop()
+            yield path, node, parent
+            if node.children:
+                push(path, node)
+
+    def report(self) -> List[Dict]:
+        """每个路径一行：出现率（相对父节点中对象出现的次数）、null 率、类型分布、归类"""
+        rows = []
+        for path, node, parent in self.paths():
+            parent_objects = parent.types.get("object", 0) if parent is not self.root else self.documents
+            base = parent.count if path.endswith(LIST_ITEM) else parent_objects
+            rows.append({
+                "path": path,
+                "count": node.count,
+                "presence": round(node.count / base, 4) if base and not path.endswith(LIST_ITEM) else None,
+                "null_rate": round(node.nulls / node.count, 4) if node.count else 0.0,
+                "types": dict(sorted(node.types.items(), key=lambda x: -x[1])),
+                "category": classify(path),
+            })
+        return rows
+
+    def by_category(self) -> Dict[str, List[str]]:
+        """按 classify 分组的字段路径（组内按字母序）"""
+        grouped: Dict[str, List[str]] = {}
+        for path, _, _ in self.paths():
+            grouped.setdefault(classify(path), []).append(path)
+        return {category: sorted(paths) for category, paths in grouped.items()}
+
+    def to_dict(self) -> Dict:
+        return {"documents": self.documents, "root": self.root.to_dict()}
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "SchemaInferrer":
+        inferrer = cls()
+        inferrer.documents = data.get("documents", 0)
+        inferrer.root = FieldNode.from_dict(data.get("root", {}))
+        return inferrer
+
+    def drift(self, previous: "SchemaInferrer") -> Dict[str, List]:
+        """与之前的快照比较：新增路径、消失路径、主类型改变的路径"""
+        current = {path: node for path, node, _ in self.paths()}
+        before = {path: node for path, node, _ in previous.paths()}
+
+        def dominant(node: FieldNode) -> Optional[str]:
+            types = {k: v for k, v in node.types.items() if k != "null"}
+            return max(types, key=types.get) if types else None
+
+        changed = []
+        for path in sorted(current.keys() & before.keys()):
+            old, new = dominant(before[path]), dominant(current[path])
+            if old and new and old != new:
+                changed.append((path, old, new))
+        return {
+            "added": sorted(current.keys() - before.keys()),
+            "removed": sorted(before.keys() - current.keys()),
+            "type_changed": changed,
+        }
+
+
+def print_report(inferrer: SchemaInferrer) -> None:
+    print(f"[结构] {inferrer.documents} 个对象，{sum(1 for _ in inferrer.paths())} 个字段路径")
+    for row in inferrer.report():
+        depth = row["path"].count(".") + row["path"].count(LIST_ITEM)
+        types = "/".join(f"{k}:{v}" for k, v in row["types"].items())
+        presence = f"{row['presence']:>6.1%}" if row["presence"] is not None else "     -"
+        nulls = f"null {row['null_rate']:.0%}" if row["null_rate"] else ""
+        marker = " 🎯" if row["category"] == "popularity" else ""
+        label = "  " * depth + row["path"].rsplit(".", 1)[-1]
+        print(f"  {label:<36} {presence}  {types} {nulls}{marker}")
+
+
+def main():
+    """命令行：流式拉取搜索结果并推断结构"""
+    from jamendo_client import JamendoAPIError, get_client
+
+    parser = argparse.ArgumentParser(description="Jamendo 返回结构推断")
+    parser.add_argument("keywords", nargs="+")
+    parser.add_argument("--pages", type=int, default=1, help="每个关键词的页数")
+    parser.add_argument("--include", default="musicinfo stats")
+    parser.add_argument("--save", default=None, help="把结构快照写入 JSON")
+    parser.add_argument("--compare", default=None, help="与之前保存的快照比较")
+    args = parser.parse_args()
+
+    inferrer = SchemaInferrer()
+    pages = get_client().iter_search_pages(args.keywords, max_pages=args.pages, include=args.include)
+    try:
+        for page in pages:
+            inferrer.fold_many(page)
+    except JamendoAPIError as e:
+        print(f"[警告] 拉取中断，使用已有结果: {e}")
+    print_report(inferrer)
+
+    # 先读旧快照再保存：--compare 与 --save 指向同一文件时比较的仍是旧结构
+    previous = None
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            previous = SchemaInferrer.from_dict(json.load(f))
+
+    if args.save:
+        Path(args.save).parent.mkdir(parents=True, exist_ok=True)
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump(inferrer.to_dict(), f, ensure_ascii=False)
+        print(f"\n[快照] 已保存到 {args.save}")
+
+    if previous is not None:
+        drift = inferrer.drift(previous)
+        print(f"\n[变化] 新增 {len(drift['added'])}，消失 {len(drift['removed'])}，"
+              f"类型改变 {len(drift['type_changed'])}")
+        for path in drift["added"]:
+            print(f"  + {path}")
+        for path in drift["removed"]:
+            print(f"  - {path}")
+        for path, old, new in drift["type_changed"]:
+            print(f"  ~ {path}: {old} → {new}")
+        if any(drift.values()):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,207 @@
+"""标签共现矩阵与相关标签推荐
+
+用途：抓取脚本在写 jamendo_tags.json 的同时，把每首 track 上同时出现的
+      genres / instruments / vartags 统计成稀疏共现矩阵（NumPy 实现的 CSR），
+      保存为 data/jamendo_tags.cooc.npz；查询时按 PMI 或 lift 返回最相关的标签，
+      刷新推荐、AI 映射失败时的兜底扩展都可以直接用本地数据，不再额外请求
+格式：indptr / indices / data 为对称共现矩阵（不含对角线），
+      counts 为每个标签出现的 track 数，vocab 为 "kind:tag" 列表
+
+用法：
+    python scripts/tag_cooccurrence.py lofi
+    python scripts/tag_cooccurrence.py instruments:piano --metric lift --top 15
+"""
+import math
+import argparse
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+DEFAULT_COOC_PATH = Path(__file__).parent.parent / "data" / "jamendo_tags.cooc.npz"
+TAG_KINDS = ("genres", "instruments", "vartags")
+METRICS = ("pmi", "lift")
+
+
+class CooccurrenceMatrix:
+    """对称的标签共现矩阵（CSR）"""
+
+    def __init__(
+        self,
+        vocab: List[Tuple[str, str]],
+        counts: np.ndarray,
+        indptr: np.ndarray,
+        indices: np.ndarray,
+        data: np.ndarray,
+        total_tracks: int,
+    ):
+        self.vocab = vocab
+        self.counts = counts
+        self.indptr = indptr
+        self.indices = indices
+        self.data = data
+        self.total_tracks = total_tracks
+        self._ids = {entry: i for i, entry in enumerate(vocab)}
+        self._by_name: Dict[str, List[int]] = {}
+        for i, (_, tag) in enumerate(vocab):
+            self._by_name.setdefault(tag, []).append(i)
+
+    @classmethod
+    def from_rows(cls, rows: Iterable[Sequence]) -> "CooccurrenceMatrix":
+        """由 sidecar 格式的行 [id, releasedate, genres, instruments, vartags] 构建"""
+        vocab_ids: Dict[Tuple[str, str], int] = {}
+        offsets = [0]
+        members: List[int] = []
+        for row in rows:
+            tag_ids = set()
+            for kind, tags in zip(TAG_KINDS, row[2:5]):
+                for tag in tags:
+                    tag_ids.add(vocab_ids.setdefault((kind, tag), len(vocab_ids)))
+            members.extend(sorted(tag_ids))
+            offsets.append(len(members))
+
+        # 词表按 (kind, tag) 排序，保证同一份数据得到同样的文件
+        vocab = sorted(vocab_ids)
+        remap = np.empty(len(vocab), dtype=np.int64)
+        for new_id, entry in enumerate(vocab):
+            remap[vocab_ids[entry]] = new_id
+        members = remap[np.asarray(members, dtype=np.int64)] if members else np.empty(0, dtype=np.int64)
+        offsets = np.asarray(offsets, dtype=np.int64)
+        n = len(vocab)
+
+        counts = np.bincount(members, minlength=n).astype(np.int32)
+        pairs = []
+        for start, end in zip(offsets[:-1], offsets[1:]):
+            if end - start < 2:
+                continue
+            tags = members[start:end]
+            a, b = np.meshgrid(tags, tags, indexing="ij")
+            mask = a != b
+            pairs.append(a[mask] * n + b[mask])
+        keys, values = (
+            np.unique(np.concatenate(pairs), return_counts=True) if pairs
+            else (np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64))
+        )
+        rows_of = keys // n if n else keys
+        indptr = np.searchsorted(rows_of, np.arange(n + 1)).astype(np.int64)
+        return cls(
+            vocab, counts, indptr,
+            (keys % n).astype(np.int32) if n else keys.astype(np.int32),
+            values.astype(np.int32), len(offsets) - 1,
+        )
+
+    def save(self, path: Path = DEFAULT_COOC_PATH) -> Path:
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(path.stem + ".tmp.npz")
+        np.savez_compressed(
+            tmp_path,
+            vocab=np.array([f"{kind}:{tag}" for kind, tag in self.vocab]),
+            counts=self.counts, indptr=self.indptr, indices=self.indices, data=self.data,
+            total_tracks=np.array(self.total_tracks),
+        )
+        tmp_path.replace(path)
+        return path
+
+    @classmethod
+    def load(cls, path: Path = DEFAULT_COOC_PATH) -> "CooccurrenceMatrix":
+        with np.load(path) as f:
+            vocab = [tuple(entry.split(":", 1)) for entry in f["vocab"].tolist()]
+            return cls(
+                vocab, f["counts"], f["indptr"], f["indices"], f["data"], int(f["total_tracks"]),
+            )
+
+    def __len__(self) -> int:
+        return len(self.vocab)
+
+    def resolve(self, tag: str) -> List[int]:
+        """"piano" 匹配所有类别的同名标签，"instruments:piano" 限定类别"""
+        tag = tag.strip().lower()
+        if ":" in tag:
+            kind, name = tag.split(":", 1)
+            i = self._ids.get((kind, name))
+            return [] if i is None else [i]
+        return self._by_name.get(tag, [])
+
+    def count(self, a: str, b: str) -> int:
+        """两个标签同时出现的 track 数"""
+        total = 0
+        targets = set(self.resolve(b))
+        for i in self.resolve(a):
+            row = slice(self.indptr[i], self.indptr[i + 1])
+            total += int(self.data[row][np.isin(self.indices[row], list(targets))].sum())
+        return total
+
+    def related(
+        self,
+        tag: str,
+        k: int = 10,
+        metric: str = "pmi",
+        kinds: Optional[Iterable[str]] = None,
+        min_count: int = 2,
+    ) -> List[Tuple[str, str, float]]:
+        """与 tag 最相关的 k 个标签 [(kind, tag, score)]
+
+        pmi = log(P(a,b) / (P(a)P(b)))，lift = P(a,b) / (P(a)P(b))；
+        共现次数少于 min_count 的组合不参与排序，避免罕见标签靠偶然共现排到前面。
+        """
+        if metric not in METRICS:
+            raise ValueError(f"未知的 metric: {metric}（可选: {', '.join(METRICS)}）")
+        scores: Dict[int, float] = {}
+        n = float(self.total_tracks)
+        for i in self.resolve(tag):
+            row = slice(self.indptr[i], self.indptr[i + 1])
+            neighbors, joint = self.indices[row], self.data[row].astype(np.float64)
+            keep = joint >= min_count
+            neighbors, joint = neighbors[keep], joint[keep]
+            lift = joint * n / (float(self.counts[i]) * self.counts[neighbors])
+            for j, value in zip(neighbors.tolist(), lift.tolist()):
+                scores[j] = max(scores.get(j, 0.0), value)
+
+        allowed = set(kinds) if kinds else None
+        ranked = sorted(
+            ((j, value) for j, value in scores.items()
+             if allowed is None or self.vocab[j][0] in allowed),
+            key=lambda x: (-x[1], self.vocab[x[0]]),
+        )[:k]
+        if metric == "pmi":
+            return [(*self.vocab[j], math.log(value)) for j, value in ranked]
+        return [(*self.vocab[j], value) for j, value in ranked]
+
+    def expand(self, tags: Iterable[str], k: int = 5, metric: str = "pmi") -> List[Tuple[str, str]]:
+        """给一组标签补充相关标签：各自取前 k 个，去掉已有的，按出现先后合并"""
+        tags = list(tags)
+        existing = {self.vocab[i] for tag in tags for i in self.resolve(tag)}
+        expanded: List[Tuple[str, str]] = []
+        for tag in tags:
+            for kind, name, _ in self.related(tag, k=k, metric=metric):
+                if (kind, name) not in existing:
+                    existing.add((kind, name))
+                    expanded.append((kind, name))
+        return expanded
+
+
+def main():
+    """命令行：查询相关标签"""
+    parser = argparse.ArgumentParser(description="标签共现与相关标签查询")
+    parser.add_argument("tags", nargs="+", help="标签，可写 kind:tag")
+    parser.add_argument("--metric", default="pmi", choices=METRICS)
+    parser.add_argument("--top", type=int, default=10)
+    parser.add_argument("--kind", action="append", choices=TAG_KINDS, help="只返回指定类别，可多次指定")
+    parser.add_argument("--min-count", type=int, default=2, help="最少共现次数")
+    parser.add_argument("--path", default=str(DEFAULT_COOC_PATH))
+    args = parser.parse_args()
+
+    matrix = CooccurrenceMatrix.load(Path(args.path))
+    print(f"[共现] {len(matrix)} 个标签，{len(matrix.data) // 2} 组共现，{matrix.total_tracks} 首音乐")
+    for tag in args.tags:
+        if not matrix.resolve(tag):
+            print(f"\n[{tag}] 不在词表中")
+            continue
+        print(f"\n[{tag}] 相关标签（{args.metric}）:")
+        for kind, name, score in matrix.related(tag, args.top, args.metric, args.kind, args.min_count):
+            print(f"  {kind}:{name}  {score:.3f}  (共现 {matrix.count(tag, f'{kind}:{name}')})")
+
+
+if __name__ == "__main__":
+    main()
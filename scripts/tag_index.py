@@ -0,0 +1,285 @@
+"""离线标签倒排索引
+
+用途：基于抓取下来的列式 track 存储（track_store.py），为每个标签建立压缩的
+      track ID 倒排表，本地完成 "lofi + piano + calm" 这类 AND / OR / 加权查询，
+      不再需要发一次 Jamendo 全文搜索请求做候选召回
+压缩：roaring bitmap 思路——按 ID 高 16 位分桶，稀疏桶存有序 uint16 数组，
+      稠密桶（> 4096 个）存 65536 位的位图，交集/并集按桶类型选择算法
+
+用法：
+    python scripts/tag_index.py lofi piano calm          # AND 查询
+    python scripts/tag_index.py lofi chillhop --or       # OR 查询
+    python scripts/tag_index.py lofi:2 piano:1 calm:0.5  # 加权查询（tag:权重）
+"""
+import time
+import argparse
+from pathlib import Path
+from typing import Dict, Iterable, List, Mapping, Optional, Tuple
+
+import numpy as np
+
+from tag_stats import load_tags
+from track_store import DEFAULT_STORE_PATH, TAG_KINDS, TrackStore
+
+DEFAULT_TAGS_PATH = Path(__file__).parent.parent / "data" / "jamendo_tags.json"
+
+# 桶内元素超过该数量时改用位图（与 roaring bitmap 的阈值一致）
+ARRAY_MAX = 4096
+
+
+def _to_bitmap(values: np.ndarray) -> np.ndarray:
+    bits = np.zeros(1 << 16, dtype=bool)
+    bits[values] = True
+    return np.packbits(bits, bitorder="little").view(np.uint64)
+
+
+def _from_bitmap(words: np.ndarray) -> np.ndarray:
+    bits = np.unpackbits(words.view(np.uint8), bitorder="little")
+    return np.flatnonzero(bits).astype(np.uint16)
+
+
+def _container(values: np.ndarray) -> np.ndarray:
+    """按基数选择容器：有序 uint16 数组或 uint64 位图"""
+    if len(values) > ARRAY_MAX:
+        return _to_bitmap(values)
+    return values.astype(np.uint16)
+
+
+def _is_bitmap(container: np.ndarray) -> bool:
+    return container.dtype == np.uint64
+
+
+def _cardinality(container: np.ndarray) -> int:
+    if _is_bitmap(container):
+        return int(np.unpackbits(container.view(np.uint8)).sum())
+    return len(container)
+
+
+class RoaringBitmap:
+    """只读的 roaring 风格压缩整数集合（uint32）"""
+
+    __slots__ = ("_chunks",)
+
+    def __init__(self, chunks: Optional[Dict[int, np.ndarray]] = None):
+        self._chunks: Dict[int, np.ndarray] = chunks or {}
+
+    @classmethod
+    def from_sorted(cls, values: np.ndarray) -> "RoaringBitmap":
+        """由升序、去重的 uint32 数组构建"""
+        values = np.asarray(values, dtype=np.uint32)
+        if not len(values):
+            return cls()
+        high = values >> 16
+        bounds = np.flatnonzero(np.diff(high)) + 1
+        chunks = {}
+        for part in np.split(values, bounds):
+            chunks[int(part[0] >> 16)] = _container((part & 0xFFFF).astype(np.uint16))
+        return cls(chunks)
+
+    def __len__(self) -> int:
+        return sum(_cardinality(c) for c in self._chunks.values())
+
+    def __bool__(self) -> bool:
+        return bool(self._chunks)
+
+    def __contains__(self, value: int) -> bool:
+        container = self._chunks.get(value >> 16)
+        if container is None:
+            return False
+        low = value & 0xFFFF
+        if _is_bitmap(container):
+            return bool(container[low >> 6] >> np.uint64(low & 63) & np.uint64(1))
+        i = np.searchsorted(container, low)
+        return i < len(container) and container[i] == low
+
+    def __and__(self, other: "RoaringBitmap") -> "RoaringBitmap":
+        chunks = {}
+        for high in self._chunks.keys() & other._chunks.keys():
+            a, b = self._chunks[high], other._chunks[high]
+            if _is_bitmap(a) and _is_bitmap(b):
+                words = a & b
+                merged = _from_bitmap(words)
+            elif _is_bitmap(a) or _is_bitmap(b):
+                bitmap, values = (a, b) if _is_bitmap(a) else (b, a)
+                hit = (bitmap[values >> 6] >> (values & 63).astype(np.uint64)) & np.uint64(1)
+                merged = values[hit.astype(bool)]
+            else:
+                merged = np.intersect1d(a, b, assume_unique=True)
+            if len(merged):
+                chunks[high] = _container(merged)
+        return RoaringBitmap(chunks)
+
+    def __or__(self, other: "RoaringBitmap") -> "RoaringBitmap":
+        chunks = dict(self._chunks)
+        for high, b in other._chunks.items():
+            a = chunks.get(high)
+            if a is None:
+                chunks[high] = b
+            elif _is_bitmap(a) or _is_bitmap(b):
+                wa = a if _is_bitmap(a) else _to_bitmap(a)
+                wb = b if _is_bitmap(b) else _to_bitmap(b)
+                chunks[high] = _container(_from_bitmap(wa | wb))
+            else:
+                chunks[high] = _container(np.union1d(a, b))
+        return RoaringBitmap(chunks)
+
+    def to_array(self) -> np.ndarray:
+        """还原为升序 uint32 数组"""
+        parts = []
+        for high in sorted(self._chunks):
+            container = self._chunks[high]
+            low = _from_bitmap(container) if _is_bitmap(container) else container
+            parts.append((np.uint32(high) << np.uint32(16)) | low.astype(np.uint32))
+        return np.concatenate(parts) if parts else np.empty(0, dtype=np.uint32)
+
+    def nbytes(self) -> int:
+        return sum(c.nbytes for c in self._chunks.values())
+
+
+class TagIndex:
+    """标签 → track ID 倒排索引
+
+    标签可写成 "piano"（匹配所有类别中同名标签）或 "instruments:piano"（限定类别）。
+    """
+
+    def __init__(self, postings: Dict[Tuple[str, str], RoaringBitmap]):
+        self.postings = postings
+        self._by_name: Dict[str, List[Tuple[str, str]]] = {}
+        for kind, tag in postings:
+            self._by_name.setdefault(tag, []).append((kind, tag))
+
+    @classmethod
+    def from_store(cls, store: TrackStore, vocabulary: Optional[Dict] = None) -> "TagIndex":
+        """从列式存储构建；vocabulary 为 jamendo_tags.json 内容，其中的标签都会有条目"""
+        offsets = store.columns["tag_offsets"].astype(np.int64)
+        tag_ids = np.asarray(store.columns["tag_ids"], dtype=np.int64)
+        rows = np.repeat(np.arange(store.count), np.diff(offsets))
+        track_ids = np.asarray(store.ids, dtype=np.uint32)[rows]
+
+        # 按 (tag_id, track_id) 排序后切分，每段即一个标签的有序倒排表
+        order = np.lexsort((track_ids, tag_ids))
+        tag_ids, track_ids = tag_ids[order], track_ids[order]
+        bounds = np.flatnonzero(np.diff(tag_ids)) + 1
+        postings: Dict[Tuple[str, str], RoaringBitmap] = {}
+        for start, end in zip(np.r_[0, bounds], np.r_[bounds, len(tag_ids)]):
+            if start == end:
+                continue
+            key = store.vocab.entries[int(tag_ids[start])]
+            postings[key] = RoaringBitmap.from_sorted(np.unique(track_ids[start:end]))
+
+        for kind in TAG_KINDS:
+            for tag in (vocabulary or {}).get(kind, {}):
+                postings.setdefault((kind, tag), RoaringBitmap())
+        return cls(postings)
+
+    def resolve(self, tag: str) -> List[Tuple[str, str]]:
+        """把查询里的标签解析为 (kind, tag) 列表"""
+        tag = tag.strip().lower()
+        if ":" in tag:
+            kind, name = tag.split(":", 1)
+            return [(kind, name)] if (kind, name) in self.postings else []
+        return self._by_name.get(tag, [])
+
+    def lookup(self, tag: str) -> RoaringBitmap:
+        result = RoaringBitmap()
+        for key in self.resolve(tag):
+            result = result | self.postings[key]
+        return result
+
+    def query_and(self, tags: Iterable[str]) -> RoaringBitmap:
+        """同时带有全部标签的 track（从最短的倒排表开始求交）"""
+        bitmaps = sorted((self.lookup(tag) for tag in tags), key=len)
+        if not bitmaps:
+            return RoaringBitmap()
+        result = bitmaps[0]
+        for bitmap in bitmaps[1:]:
+            if not result:
+                break
+            result = result & bitmap
+        return result
+
+    def query_or(self, tags: Iterable[str]) -> RoaringBitmap:
+        """带有任一标签的 track"""
+        result = RoaringBitmap()
+        for tag in tags:
+            result = result | self.lookup(tag)
+        return result
+
+    def query_weighted(self, weights: Mapping[str, float], k: int = 20) -> List[Tuple[int, float]]:
+        """按命中标签的权重和打分，返回前 k 个 (track_id, score)，同分按 ID 升序"""
+        ids, scores = [], []
+        for tag, weight in weights.items():
+            members = self.lookup(tag).to_array()
+            ids.append(members)
+            scores.append(np.full(len(members), weight, dtype=np.float64))
+        if not ids:
+            return []
+        ids = np.concatenate(ids)
+        if not len(ids):
+            return []
+        unique_ids, inverse = np.unique(ids, return_inverse=True)
+        totals = np.bincount(inverse, weights=np.concatenate(scores))
+        top = np.lexsort((unique_ids, -totals))[:k]
+        return [(int(unique_ids[i]), float(totals[i])) for i in top]
+
+
+def load_index(
+    store_path: Path = DEFAULT_STORE_PATH,
+    tags_path: Optional[Path] = DEFAULT_TAGS_PATH,
+) -> Tuple[TagIndex, TrackStore]:
+    """打开列式存储并构建索引"""
+    store = TrackStore(store_path)
+    vocabulary = None
+    if tags_path and Path(tags_path).exists():
+        vocabulary = load_tags(tags_path)
+    return TagIndex.from_store(store, vocabulary), store
+
+
+def main():
+    """命令行：本地标签查询"""
+    parser = argparse.ArgumentParser(description="离线标签倒排索引查询")
+    parser.add_argument("tags", nargs="+", help="标签，可写 kind:tag；加权查询写 tag:权重 或 kind:tag:权重")
+    parser.add_argument("--or", dest="use_or", action="store_true", help="OR 查询（默认 AND）")
+    parser.add_argument("--top", type=int, default=10, help="显示条数")
+    parser.add_argument("--store", default=str(DEFAULT_STORE_PATH))
+    args = parser.parse_args()
+
+    # 任一标签带权重即为加权查询；不带权重的标签（tag 或 kind:tag）按权重 1 计
+    weights: Dict[str, float] = {}
+    weighted = False
+    for arg in args.tags:
+        name, sep, weight = arg.rpartition(":")
+        if not sep or name.strip().lower() in TAG_KINDS:
+            weights[arg] = 1.0
+            continue
+        try:
+            weights[name] = float(weight)
+        except ValueError:
+            parser.error(f"无法解析权重: {arg!r}（加权查询写 tag:权重 或 kind:tag:权重）")
+        weighted = True
+
+    started = time.perf_counter()
+    index, store = load_index(Path(args.store))
+    print(f"[索引] {len(index.postings)} 个标签，{len(store)} 首音乐，"
+          f"构建耗时 {(time.perf_counter() - started) * 1000:.1f} ms")
+
+    started = time.perf_counter()
+    if weighted:
+        hits = index.query_weighted(weights, k=args.top)
+        mode = "加权"
+    else:
+        bitmap = index.query_or(args.tags) if args.use_or else index.query_and(args.tags)
+        hits = [(int(track_id), None) for track_id in bitmap.to_array()[:args.top]]
+        mode = f"{'OR' if args.use_or else 'AND'}（共 {len(bitmap)} 条）"
+    elapsed_us = (time.perf_counter() - started) * 1e6
+    print(f"[查询] {mode}: {' '.join(args.tags)} → {len(hits)} 条（{elapsed_us:.0f} µs）")
+
+    for track_id, score in hits:
+        record = store.find(track_id)
+        label = f"{record.name} - {record.artist_name}" if record else "?"
+        suffix = f"  (得分 {score:g})" if score is not None else ""
+        print(f"  [{track_id}] {label}{suffix}")
+
+
+if __name__ == "__main__":
+    main()
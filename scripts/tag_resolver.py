@@ -0,0 +1,318 @@
+"""预编译的标签映射解析器
+
+用途：把 data/tag_mapping.json（界面标签 → Jamendo 标签）与 data/jamendo_tags.json
+      （已抓取的标签词表）编译成一张规范化 key → 标签元组的查找表，查询时只需一次 dict 查找
+编译：
+    - key 规范化：NFKC + 小写 + 去掉空格和标点（"Hip Hop" → "hiphop"），
+      "Hip Hop/Rap" 这类复合标签的每一段也单独建 key
+    - 映射中的标签按词表校验，不在词表里的直接剔除（编译报告里列出），
+      类别放错的（如 moods 映射到了只出现在 genres 里的标签）按词表纠正
+    - 词表里的原始标签本身也建 key，界面传来 "Piano" 也能直接命中
+    - 反向表：Jamendo 标签 → 对应的界面标签
+    - 未知标签走三元组（trigram）召回 + 编辑距离确认的模糊匹配，结果放进有界的 LRU 缓存，
+      不写回查找表（自由输入的标签再多也不会让查找表无限增长）
+产物：data/tag_mapping.bin —— MAGIC(8 字节) + 长度(uint32) + zlib 压缩的 JSON，
+      记录源文件摘要，源文件变化后自动重新编译
+
+用法：
+    python scripts/tag_resolver.py --build
+    python scripts/tag_resolver.py "Hip Hop" Chill --category genres
+    python scripts/tag_resolver.py --check
+"""
+import re
+import json
+import zlib
+import struct
+import hashlib
+import argparse
+import unicodedata
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+DATA_DIR = Path(__file__).parent.parent / "data"
+DEFAULT_MAPPING_PATH = DATA_DIR / "tag_mapping.json"
+DEFAULT_TAGS_PATH = DATA_DIR / "jamendo_tags.json"
+DEFAULT_ARTIFACT_PATH = DATA_DIR / "tag_mapping.bin"
+
+MAGIC = b"BGMMAP01"
+TAG_KINDS = ("genres", "instruments", "vartags")
+# 界面标签类别 → 首选的 Jamendo 标签类别
+CATEGORIES = {"genres": "genres", "moods": "vartags", "themes": "vartags"}
+# 模糊匹配结果（含未命中）最多缓存的条数
+FUZZY_CACHE_SIZE = 4096
+
+Tag = Tuple[str, str]  # (kind, tag)
+
+_NON_WORD = re.compile(r"[\W_]+", re.UNICODE)
+_PARTS = re.compile(r"[/&,]")
+
+
+def normalize_key(label: str) -> str:
+    """'Hip Hop' / 'hip-hop' / 'HIPHOP' → 'hiphop'"""
+    return _NON_WORD.sub("", unicodedata.normalize("NFKC", label or "").lower())
+
+
+def trigrams(key: str) -> Set[str]:
+    padded = f"  {key} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def edit_distance(a: str, b: str, limit: int) -> int:
+    """Levenshtein 距离，超过 limit 时提前返回 limit + 1"""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i]
+        for j, cb in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ca != cb)))
+        if min(current) > limit:
+            return limit + 1
+        previous = current
+    return previous[-1]
+
+
+def source_digest(*paths: Path) -> str:
+    digest = hashlib.sha1()
+    for path in paths:
+        digest.update(Path(path).read_bytes())
+    return digest.hexdigest()
+
+
+class TagResolver:
+    """界面标签 → Jamendo 标签解析器
+
+    table 的 key 为 "类别\\t规范化标签"，value 为 tags 列表中的下标元组。
+    """
+
+    def __init__(
+        self,
+        tags: List[Tag],
+        table: Dict[str, Tuple[int, ...]],
+        reverse: Dict[int, List[str]],
+        invalid: Dict[str, List[str]],
+        digest: str = "",
+    ):
+        self.tags = tags
+        self.table = table
+        self.reverse = reverse
+        self.invalid = invalid
+        self.digest = digest
+        self._ids = {tag: i for i, tag in enumerate(tags)}
+        self._trigrams: Dict[str, Dict[str, Set[str]]] = {}
+        self._fuzzy_ids = lru_cache(maxsize=FUZZY_CACHE_SIZE)(self._match_ids)
+
+    # ---------- 编译 ----------
+
+    @classmethod
+    def compile(cls, mapping: Dict, vocabulary: Dict, digest: str = "") -> "TagResolver":
+        """由 tag_mapping.json 与 jamendo_tags.json 的内容编译"""
+        kinds_of: Dict[str, List[str]] = {}
+        for kind in TAG_KINDS:
+            for tag in vocabulary.get(kind, {}):
+                kinds_of.setdefault(tag, []).append(kind)
+
+        tags: List[Tag] = []
+        tag_ids: Dict[Tag, int] = {}
+
+        def intern(tag: Tag) -> int:
+            if tag not in tag_ids:
+                tag_ids[tag] = len(tags)
+                tags.append(tag)
+            return tag_ids[tag]
+
+        def validate(category: str, tag: str) -> List[int]:
+            kinds = kinds_of.get(tag.lower(), [])
+            preferred = CATEGORIES[category]
+            if preferred in kinds:
+                kinds = [preferred]
+            return [intern((kind, tag.lower())) for kind in kinds]
+
+        table: Dict[str, Tuple[int, ...]] = {}
+        reverse: Dict[int, List[str]] = {}
+        invalid: Dict[str, List[str]] = {}
+        mappings = mapping.get("mappings", {})
+
+        # 优先级：完整界面标签 > 复合标签的分段 > 词表原始标签（先写入的不被覆盖）
+        for category in CATEGORIES:
+            parts: Dict[str, List[int]] = {}
+            for label, mapped in mappings.get(category, {}).items():
+                resolved: List[int] = []
+                for tag in mapped:
+                    ids = validate(category, tag)
+                    if not ids:
+                        invalid.setdefault(f"{category}/{label}", []).append(tag)
+                    resolved.extend(i for i in ids if i not in resolved)
+                if not resolved:
+                    continue
+                table.setdefault(f"{category}\t{normalize_key(label)}", tuple(resolved))
+                for i in resolved:
+                    reverse.setdefault(i, []).append(f"{category}/{label}")
+                for part in _PARTS.split(label):
+                    key = normalize_key(part)
+                    if key:
+                        parts.setdefault(key, []).extend(i for i in resolved if i not in parts.get(key, []))
+            for key, resolved in parts.items():
+                table.setdefault(f"{category}\t{key}", tuple(resolved))
+            for tag in kinds_of:
+                table.setdefault(f"{category}\t{normalize_key(tag)}", tuple(validate(category, tag)))
+        return cls(tags, table, reverse, invalid, digest)
+
+    # ---------- 序列化 ----------
+
+    def save(self, path: Path = DEFAULT_ARTIFACT_PATH) -> Path:
+        payload = json.dumps({
+            "version": 1,
+            "digest": self.digest,
+            "tags": [list(tag) for tag in self.tags],
+            "table": {key: list(ids) for key, ids in self.table.items()},
+            "reverse": {str(i): labels for i, labels in self.reverse.items()},
+            "invalid": self.invalid,
+        }, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        blob = zlib.compress(payload, 9)
+
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(path.suffix + ".tmp")
+        with open(tmp_path, "wb") as f:
+            f.write(MAGIC + struct.pack("<I", len(blob)) + blob)
+        tmp_path.replace(path)
+        return path
+
+    @classmethod
+    def load(cls, path: Path = DEFAULT_ARTIFACT_PATH) -> "TagResolver":
+        with open(path, "rb") as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                raise ValueError(f"不是标签映射产物: {path}")
+            (length,) = struct.unpack("<I", f.read(4))
+            data = json.loads(zlib.decompress(f.read(length)).decode("utf-8"))
+        return cls(
+            tags=[tuple(tag) for tag in data["tags"]],
+            table={key: tuple(ids) for key, ids in data["table"].items()},
+            reverse={int(i): labels for i, labels in data["reverse"].items()},
+            invalid=data.get("invalid", {}),
+            digest=data.get("digest", ""),
+        )
+
+    # ---------- 查询 ----------
+
+    def resolve(self, category: str, label: str) -> List[Tag]:
+        """解析单个界面标签，未命中时走模糊匹配；都失败返回空列表"""
+        key = normalize_key(label)
+        ids = self.table.get(f"{category}\t{key}")
+        if ids is None:
+            ids = self._fuzzy_ids(category, key)
+        return [self.tags[i] for i in ids]
+
+    def _match_ids(self, category: str, key: str) -> Tuple[int, ...]:
+        match = self.fuzzy_key(category, key)
+        return self.table[f"{category}\t{match}"] if match else ()
+
+    def fuzzy_key(self, category: str, key: str, candidates: int = 8) -> Optional[str]:
+        """三元组召回候选，编辑距离确认；允许的距离随长度增长（至少 1）"""
+        if not key:
+            return None
+        index = self._trigrams.get(category)
+        if index is None:
+            index = {}
+            prefix = f"{category}\t"
+            for full_key, ids in self.table.items():
+                if full_key.startswith(prefix) and ids:
+                    name = full_key[len(prefix):]
+                    for gram in trigrams(name):
+                        index.setdefault(gram, set()).add(name)
+            self._trigrams[category] = index
+
+        grams = trigrams(key)
+        counts: Dict[str, int] = {}
+        for gram in grams:
+            for name in index.get(gram, ()):
+                counts[name] = counts.get(name, 0) + 1
+        ranked = sorted(counts, key=lambda name: (-counts[name], len(name), name))[:candidates]
+
+        limit = max(1, len(key) // 4)
+        best, best_distance = None, limit + 1
+        for name in ranked:
+            distance = edit_distance(key, name, limit)
+            if distance < best_distance:
+                best, best_distance = name, distance
+        return best
+
+    def expand(self, intent: Dict[str, Iterable[str]]) -> Tuple[Dict[str, List[str]], List[str]]:
+        """解析整个意图，返回 ({genres, instruments, vartags}, 未能解析的标签)"""
+        result: Dict[str, List[str]] = {kind: [] for kind in TAG_KINDS}
+        misses: List[str] = []
+        for category, labels in intent.items():
+            if category not in CATEGORIES:
+                continue
+            for label in labels:
+                tags = self.resolve(category, label)
+                if not tags:
+                    misses.append(f"{category}/{label}")
+                for kind, tag in tags:
+                    if tag not in result[kind]:
+                        result[kind].append(tag)
+        return result, misses
+
+    def labels_for(self, kind: str, tag: str) -> List[str]:
+        """反向查询：某个 Jamendo 标签对应哪些界面标签"""
+        i = self._ids.get((kind, tag))
+        return self.reverse.get(i, []) if i is not None else []
+
+
+def load_resolver(
+    mapping_path: Path = DEFAULT_MAPPING_PATH,
+    tags_path: Path = DEFAULT_TAGS_PATH,
+    artifact_path: Optional[Path] = DEFAULT_ARTIFACT_PATH,
+) -> TagResolver:
+    """优先读取编译产物；源文件变化或产物不存在时重新编译并写出"""
+    digest = source_digest(mapping_path, tags_path)
+    if artifact_path and Path(artifact_path).exists():
+        try:
+            resolver = TagResolver.load(artifact_path)
+            if resolver.digest == digest:
+                return resolver
+        except (ValueError, OSError, zlib.error, struct.error):
+            pass
+    with open(mapping_path, "r", encoding="utf-8") as f:
+        mapping = json.load(f)
+    with open(tags_path, "r", encoding="utf-8") as f:
+        vocabulary = json.load(f)
+    resolver = TagResolver.compile(mapping, vocabulary, digest)
+    if artifact_path:
+        resolver.save(artifact_path)
+    return resolver
+
+
+def main():
+    """命令行：编译 / 查询 / 检查映射"""
+    parser = argparse.ArgumentParser(description="标签映射解析器")
+    parser.add_argument("labels", nargs="*", help="要解析的界面标签")
+    parser.add_argument("--category", default="genres", choices=list(CATEGORIES))
+    parser.add_argument("--build", action="store_true", help="强制重新编译产物")
+    parser.add_argument("--check", action="store_true", help="列出映射中不在词表里的标签")
+    args = parser.parse_args()
+
+    if args.build and DEFAULT_ARTIFACT_PATH.exists():
+        DEFAULT_ARTIFACT_PATH.unlink()
+    resolver = load_resolver()
+    if args.build:
+        size = DEFAULT_ARTIFACT_PATH.stat().st_size
+        print(f"[编译] {len(resolver.table)} 个 key，{len(resolver.tags)} 个有效标签 → "
+              f"{DEFAULT_ARTIFACT_PATH}（{size / 1024:.1f} KB）")
+
+    if args.check:
+        if not resolver.invalid:
+            print("[检查] 映射中的标签全部在词表里")
+        for label, tags in sorted(resolver.invalid.items()):
+            print(f"[检查] {label}: 不在词表中 → {', '.join(tags)}")
+
+    for label in args.labels:
+        tags = resolver.resolve(args.category, label)
+        rendered = ", ".join(f"{kind}:{tag}" for kind, tag in tags) or "（无匹配）"
+        print(f"[解析] {args.category}/{label} → {rendered}")
+
+
+if __name__ == "__main__":
+    main()
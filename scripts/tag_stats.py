@@ -0,0 +1,130 @@
+"""标签统计的紧凑二进制格式
+
+用途：抓取脚本写 jamendo_tags.json（给人看、提交到仓库）的同时，在旁边写一份
+      data/jamendo_tags.stats.bin；读取方通过 load_tags() 优先读二进制文件，
+      标签名一次 split、计数一次 frombytes，不再逐项解析 JSON
+文件格式：MAGIC(8 字节) + 头部长度(uint32) + JSON 头部（statistics 与各类别的条数 / 字节数）
+          + 各类别依次为：以 \\0 分隔的 UTF-8 标签名、uint32 小端计数数组
+新旧判断：二进制文件比 JSON 旧（例如手工改过 JSON）时自动回退读 JSON
+
+用法：
+    python scripts/tag_stats.py              # 由 jamendo_tags.json 重新生成并对比读取耗时
+"""
+import sys
+import json
+import time
+import struct
+from array import array
+from pathlib import Path
+from typing import Dict, Union
+
+from fast_json import load_file
+
+MAGIC = b"BGMTAG01"
+DEFAULT_TAGS_PATH = Path(__file__).parent.parent / "data" / "jamendo_tags.json"
+TAG_KINDS = ("genres", "instruments", "vartags")
+
+
+def stats_path_for(tags_path: Union[str, Path]) -> Path:
+    """jamendo_tags.json → jamendo_tags.stats.bin"""
+    return Path(tags_path).with_suffix(".stats.bin")
+
+
+def _counts_bytes(counts) -> bytes:
+    values = array("I", counts)
+    if sys.byteorder == "big":
+        values.byteswap()
+    return values.tobytes()
+
+
+def save_tag_stats(tags_data: Dict, path: Union[str, Path]) -> Path:
+    """写出紧凑格式；各类别保持原有顺序（即 most_common 顺序）"""
+    blocks = []
+    kinds = {}
+    for kind in TAG_KINDS:
+        counter = tags_data.get(kind, {})
+        names = "\0".join(counter).encode("utf-8")
+        counts = _counts_bytes(counter.values())
+        kinds[kind] = {"count": len(counter), "names_bytes": len(names)}
+        blocks += [names, counts]
+    header = json.dumps({
+        "version": 1,
+        "statistics": tags_data.get("statistics", {}),
+        "kinds": kinds,
+    }, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(path.suffix + ".tmp")
+    with open(tmp_path, "wb") as f:
+        f.write(MAGIC + struct.pack("<I", len(header)) + header)
+        for block in blocks:
+            f.write(block)
+    tmp_path.replace(path)
+    return path
+
+
+def load_tag_stats(path: Union[str, Path]) -> Dict:
+    """读取紧凑格式，返回与 jamendo_tags.json 相同结构的 dict"""
+    with open(path, "rb") as f:
+        blob = f.read()
+    if blob[:len(MAGIC)] != MAGIC:
+        raise ValueError(f"不是标签统计文件: {path}")
+    (header_len,) = struct.unpack_from("<I", blob, len(MAGIC))
+    offset = len(MAGIC) + 4
+    header = json.loads(blob[offset:offset + header_len].decode("utf-8"))
+    offset += header_len
+
+    data: Dict = {}
+    for kind in TAG_KINDS:
+        layout = header["kinds"].get(kind, {"count": 0, "names_bytes": 0})
+        count = layout["count"]
+        names_end = offset + layout["names_bytes"]
+        names = blob[offset:names_end].decode("utf-8").split("\0") if count else []
+        counts = array("I")
+        counts.frombytes(blob[names_end:names_end + count * 4])
+        if sys.byteorder == "big":
+            counts.byteswap()
+        data[kind] = dict(zip(names, counts))
+        offset = names_end + count * 4
+    data["statistics"] = header.get("statistics", {})
+    return data
+
+
+def load_tags(tags_path: Union[str, Path] = DEFAULT_TAGS_PATH) -> Dict:
+    """读取标签统计：紧凑文件存在且不比 JSON 旧时读紧凑文件，否则读 JSON"""
+    tags_path = Path(tags_path)
+    stats_path = stats_path_for(tags_path)
+    try:
+        fresh = stats_path.stat().st_mtime_ns >= tags_path.stat().st_mtime_ns
+    except FileNotFoundError:
+        fresh = stats_path.exists() and not tags_path.exists()
+    if fresh:
+        try:
+            return load_tag_stats(stats_path)
+        except (OSError, ValueError, KeyError):
+            pass
+    return load_file(tags_path)
+
+
+def main():
+    """命令行：重新生成紧凑文件并对比两种读取方式的耗时"""
+    tags_data = load_file(DEFAULT_TAGS_PATH)
+    stats_path = save_tag_stats(tags_data, stats_path_for(DEFAULT_TAGS_PATH))
+    assert load_tag_stats(stats_path) == tags_data
+
+    def timed(func) -> float:
+        started = time.perf_counter()
+        for _ in range(200):
+            func()
+        return (time.perf_counter() - started) / 200 * 1000
+
+    json_ms = timed(lambda: load_file(DEFAULT_TAGS_PATH))
+    stats_ms = timed(lambda: load_tag_stats(stats_path))
+    print(f"[标签统计] 已生成 {stats_path}")
+    print(f"  JSON   {DEFAULT_TAGS_PATH.stat().st_size / 1024:>7.1f} KB  读取 {json_ms:.3f} ms")
+    print(f"  紧凑   {stats_path.stat().st_size / 1024:>7.1f} KB  读取 {stats_ms:.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
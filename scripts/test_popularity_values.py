@@ -5,9 +5,10 @@
 import os
 import sys
 import json
-import requests
 from dotenv import load_dotenv
 
+from jamendo_client import DEFAULT_CLIENT_ID, get_client
+
 if sys.platform == 'win32':
     import io
     sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
@@ -15,8 +16,7 @@ if sys.platform == 'win32':
 
 load_dotenv()
 
-CLIENT_ID = os.environ.get("JAMENDO_CLIENT_ID", "f2567443")
-BASE_URL = "https://api.jamendo.com/v3.0"
+CLIENT_ID = os.environ.get("JAMENDO_CLIENT_ID", DEFAULT_CLIENT_ID)
 
 
 def test_track_details():
@@ -26,19 +26,10 @@ def test_track_details():
     print("=" * 80)
     
     # 先搜索一首音乐获取 ID
-    url = f"{BASE_URL}/tracks/"
-    params = {
-        "client_id": CLIENT_ID,
-        "format": "json",
-        "limit": 1,
-        "search": "lofi",
-        "include": "musicinfo"
-    }
+    client = get_client(CLIENT_ID)
     
     try:
-        response = requests.get(url, params=params, timeout=30)
-        response.raise_for_status()
-        data = response.json()
+        data = client.search_tracks("lofi", limit=1)
         
         if not data.get("results"):
             print("❌ 未找到音乐")
@@ -51,30 +42,21 @@ def test_track_details():
         test_cases = [
             {
                 "name": "使用 tracks/ 端点，指定 ID",
-                "url": f"{BASE_URL}/tracks/",
                 "params": {
-                    "client_id": CLIENT_ID,
-                    "format": "json",
                     "id": track_id,
                     "include": "musicinfo"
                 }
             },
             {
                 "name": "尝试添加 stats 参数",
-                "url": f"{BASE_URL}/tracks/",
                 "params": {
-                    "client_id": CLIENT_ID,
-                    "format": "json",
                     "id": track_id,
                     "include": "musicinfo,stats"
                 }
             },
             {
                 "name": "尝试添加 popularity 参数",
-                "url": f"{BASE_URL}/tracks/",
                 "params": {
-                    "client_id": CLIENT_ID,
-                    "format": "json",
                     "id": track_id,
                     "include": "musicinfo,popularity"
                 }
@@ -85,9 +67,7 @@ def test_track_details():
             print(f"\n[测试] {test_case['name']}")
             print("-" * 80)
             try:
-                response = requests.get(test_case['url'], params=test_case['params'], timeout=30)
-                response.raise_for_status()
-                data = response.json()
+                data = client.tracks(**test_case['params'])
                 
                 if data.get("results") and len(data["results"]) > 0:
                     track = data["results"][0]
@@ -134,19 +114,7 @@ def test_orderby_effectiveness():
         print(f"\n[测试] 排序方式: {orderby}")
         print("-" * 80)
         try:
-            url = f"{BASE_URL}/tracks/"
-            params = {
-                "client_id": CLIENT_ID,
-                "format": "json",
-                "limit": 3,
-                "search": "lofi",
-                "include": "musicinfo",
-                "orderby": orderby
-            }
-            
-            response = requests.get(url, params=params, timeout=30)
-            response.raise_for_status()
-            data = response.json()
+            data = get_client(CLIENT_ID).search_tracks("lofi", limit=3, orderby=orderby)
             
             if data.get("results"):
                 print(f"✅ 成功获取 {len(data['results'])} 首音乐")
@@ -0,0 +1,175 @@
+"""批量补全 track 详情（hydration）
+
+用途：给一批 track ID 补上 musicinfo / stats 等详情字段。待补全的 ID 按
+      Jamendo /tracks/ 单次最多 100 个 ID 的限制合并成批量 id= 请求，
+      补全 500 首只需要几次调用，而不是逐条请求 500 次
+特性：
+    - 已缓存且包含所需 include 的记录直接返回，不再请求
+    - 多个线程同时请求同一 ID 时合并为一次（in-flight 去重），后来者等待同一个结果
+    - 新取到的字段合并进缓存记录（musicinfo / stats 等嵌套字段逐层合并），
+      搜索结果也可以先 absorb 进缓存，之后只需补全缺少的部分
+
+用法：
+    python scripts/track_hydrator.py lofi --count 500
+"""
+import time
+import argparse
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, FrozenSet, Iterable, List, Optional, Sequence, Tuple
+
+from jamendo_client import JamendoAPIError, get_client
+
+# Jamendo /tracks/ 的 id 参数单次最多接受的 ID 数
+MAX_IDS_PER_CALL = 100
+DEFAULT_INCLUDE = ("musicinfo", "stats")
+DEFAULT_MAX_WORKERS = 4
+
+
+def merge_record(base: Dict, update: Dict) -> Dict:
+    """把 update 合并进 base（原地修改），嵌套 dict 逐层合并"""
+    for key, value in update.items():
+        if isinstance(value, dict) and isinstance(base.get(key), dict):
+            merge_record(base[key], value)
+        else:
+            base[key] = value
+    return base
+
+
+class TrackHydrator:
+    """带缓存与请求合并的 track 详情补全器（线程安全）"""
+
+    def __init__(
+        self,
+        client=None,
+        include: Sequence[str] = DEFAULT_INCLUDE,
+        batch_size: int = MAX_IDS_PER_CALL,
+        max_workers: int = DEFAULT_MAX_WORKERS,
+    ):
+        self.client = client or get_client()
+        self.include = tuple(include)
+        self.batch_size = max(1, min(batch_size, MAX_IDS_PER_CALL))
+        self.max_workers = max_workers
+        self.calls = 0
+        self.records: Dict[int, Dict] = {}
+        self._includes: Dict[int, FrozenSet[str]] = {}
+        self._inflight: Dict[Tuple[int, FrozenSet[str]], Future] = {}
+        self._lock = threading.Lock()
+
+    def absorb(self, tracks: Iterable[Dict], include: Iterable[str] = ("musicinfo",)) -> None:
+        """把搜索等接口已经拿到的 track 并入缓存，include 为这些结果实际带的详情"""
+        include = frozenset(include)
+        with self._lock:
+            for track in tracks:
+                self._merge(int(track["id"]), track, include)
+
+    def _merge(self, track_id: int, track: Dict, include: FrozenSet[str]) -> None:
+        """调用方持有锁"""
+        record = self.records.get(track_id)
+        if record is None:
+            self.records[track_id] = dict(track)
+        else:
+            merge_record(record, track)
+        self._includes[track_id] = self._includes.get(track_id, frozenset()) | include
+
+    def hydrate(self, track_ids: Iterable, include: Optional[Sequence[str]] = None) -> Dict[int, Dict]:
+        """补全并返回 {track_id: 记录}；API 中不存在的 ID 不出现在结果里
+
+        Raises:
+            JamendoAPIError: 任一批次请求失败（等待同一 ID 的其他调用方也会收到该异常）
+        """
+        needed = frozenset(include or self.include)
+        wanted: List[int] = list(dict.fromkeys(int(i) for i in track_ids))
+        waiting: Dict[Tuple[int, FrozenSet[str]], Future] = {}
+        owned: List[int] = []
+        with self._lock:
+            for track_id in wanted:
+                if needed <= self._includes.get(track_id, frozenset()):
+                    continue
+                # 按 (ID, include) 合并：只有请求相同详情的调用方才共享同一个请求
+                key = (track_id, needed)
+                future = self._inflight.get(key)
+                if future is None:
+                    future = self._inflight[key] = Future()
+                    owned.append(track_id)
+                waiting[key] = future
+
+        batches = [owned[i:i + self.batch_size] for i in range(0, len(owned), self.batch_size)]
+        if batches:
+            workers = min(self.max_workers, len(batches))
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                for batch in batches:
+                    executor.submit(self._fetch, batch, needed)
+
+        for future in waiting.values():
+            future.result()
+        with self._lock:
+            return {i: self.records[i] for i in wanted if i in self.records}
+
+    def _fetch(self, batch: List[int], include: FrozenSet[str]) -> None:
+        """请求一批 ID，把结果并入缓存并完成对应的 Future
+
+        无论成功与否，batch 中每个 Future 都会被完成并移出 in-flight 表，
+        等待方不会永远阻塞。
+        """
+        error: Optional[BaseException] = None
+        try:
+            with self._lock:
+                self.calls += 1
+            results = self.client.tracks(
+                id=" ".join(str(i) for i in batch),
+                include=" ".join(sorted(include)),
+                limit=len(batch),
+            ).get("results") or []
+            with self._lock:
+                for track in results:
+                    self._merge(int(track["id"]), track, include)
+                # 不存在的 ID 也记下已查询过，避免反复请求
+                for track_id in batch:
+                    self._includes[track_id] = self._includes.get(track_id, frozenset()) | include
+        except Exception as e:
+            error = e
+        finally:
+            with self._lock:
+                futures = [self._inflight.pop((i, include)) for i in batch]
+            for future in futures:
+                if error is None:
+                    future.set_result(None)
+                else:
+                    future.set_exception(error)
+
+
+def main():
+    """命令行：搜索后批量补全，并输出调用次数"""
+    parser = argparse.ArgumentParser(description="批量补全 track 详情")
+    parser.add_argument("keyword")
+    parser.add_argument("--count", type=int, default=500, help="搜索多少首后补全")
+    args = parser.parse_args()
+
+    client = get_client()
+    hydrator = TrackHydrator(client)
+    track_ids: List[int] = []
+    try:
+        for offset in range(0, args.count, 200):
+            results = client.search_tracks(
+                args.keyword, limit=min(200, args.count - offset), offset=offset
+            ).get("results") or []
+            hydrator.absorb(results)
+            track_ids.extend(int(t["id"]) for t in results)
+            if len(results) < 200:
+                break
+
+        started = time.perf_counter()
+        records = hydrator.hydrate(track_ids)
+        elapsed = (time.perf_counter() - started) * 1000
+    except JamendoAPIError as e:
+        print(f"[错误] {e}")
+        return
+
+    with_stats = sum(1 for r in records.values() if r.get("stats"))
+    print(f"[补全] {len(track_ids)} 首 → {hydrator.calls} 次请求（{elapsed:.0f} ms），"
+          f"{with_stats} 首带 stats")
+
+
+if __name__ == "__main__":
+    main()
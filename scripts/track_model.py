@@ -0,0 +1,169 @@
+"""Jamendo / YouTube Music 的共享 track 模型
+
+用途：抓取、打分和展示代码不再各自用 .get() 链翻嵌套 dict
+      （track.get("musicinfo", {}).get("tags", {}) / track.get("artists", [{}])[0].get("name")），
+      而是把每首 track 解码一次成 __slots__ 对象，之后只做属性访问
+特性：
+    - 标签保留 API 返回的原始大小写（展示用）并驻留（sys.intern），同一标签在所有 track 间
+      共享一个字符串对象；统计 / 存储需要的小写形式经 lower_tags 取得，同样有缓存
+    - JamendoTrack 的推荐度字段与 API 字段同名，ranking 可以直接按字段名取值
+    - 缺少 ID 的 track 其 id 为 None（与 dict 的 .get("id") 一致）
+"""
+import sys
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# 推荐度字段按优先级排列（ranking.pick_score 的降级顺序）
+POPULARITY_KEYS = ("popularity_total", "popularity_month", "likes", "listens")
+TAG_KINDS = ("genres", "instruments", "vartags")
+
+# 原始标签 → 小写驻留后的标签；重复出现的标签不再分配新字符串
+_LOWER: Dict[str, str] = {}
+
+
+def intern_tags(tags: Optional[Iterable[str]]) -> Tuple[str, ...]:
+    return tuple(sys.intern(tag) for tag in tags or ())
+
+
+def lower_tag(tag: str) -> str:
+    cached = _LOWER.get(tag)
+    if cached is None:
+        cached = _LOWER[tag] = sys.intern(tag.lower())
+    return cached
+
+
+def lower_tags(tags: Iterable[str]) -> List[str]:
+    """统计、列式存储使用的小写标签"""
+    return [lower_tag(tag) for tag in tags]
+
+
+def parse_duration(value) -> int:
+    """'3:45' / '1:02:03' / 225 → 秒"""
+    if isinstance(value, (int, float)):
+        return int(value)
+    seconds = 0
+    try:
+        for part in str(value or "").split(":"):
+            seconds = seconds * 60 + int(part)
+    except ValueError:
+        return 0
+    return seconds
+
+
+class JamendoTrack:
+    """Jamendo /tracks/ 返回的一首 track"""
+
+    __slots__ = (
+        "id", "name", "artist_name", "duration", "position", "releasedate",
+        "audio", "audiodownload", "audiodownload_allowed", "shareurl", "image",
+        "genres", "instruments", "vartags", "vocalinstrumental", "acousticelectric", "speed",
+    ) + POPULARITY_KEYS
+
+    def __init__(
+        self, id, name="", artist_name="", duration=0, position=None, releasedate="",
+        audio="", audiodownload="", audiodownload_allowed=False, shareurl="", image="",
+        genres=(), instruments=(), vartags=(), vocalinstrumental="", acousticelectric="", speed="",
+        popularity_total=None, popularity_month=None, likes=None, listens=None,
+    ):
+        self.id = id
+        self.name = name
+        self.artist_name = artist_name
+        self.duration = duration
+        self.position = position
+        self.releasedate = releasedate
+        self.audio = audio
+        self.audiodownload = audiodownload
+        self.audiodownload_allowed = audiodownload_allowed
+        self.shareurl = shareurl
+        self.image = image
+        self.genres = genres
+        self.instruments = instruments
+        self.vartags = vartags
+        self.vocalinstrumental = vocalinstrumental
+        self.acousticelectric = acousticelectric
+        self.speed = speed
+        self.popularity_total = popularity_total
+        self.popularity_month = popularity_month
+        self.likes = likes
+        self.listens = listens
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "JamendoTrack":
+        musicinfo = data.get("musicinfo") or {}
+        tags = musicinfo.get("tags") or {}
+        track_id = data.get("id")
+        return cls(
+            id=int(track_id) if track_id not in (None, "") else None,
+            name=data.get("name") or "",
+            artist_name=data.get("artist_name") or "",
+            duration=parse_duration(data.get("duration")),
+            position=data.get("position"),
+            releasedate=data.get("releasedate") or "",
+            audio=data.get("audio") or "",
+            audiodownload=data.get("audiodownload") or "",
+            audiodownload_allowed=bool(data.get("audiodownload_allowed")),
+            shareurl=data.get("shareurl") or "",
+            image=data.get("image") or data.get("album_image") or "",
+            genres=intern_tags(tags.get("genres")),
+            instruments=intern_tags(tags.get("instruments")),
+            vartags=intern_tags(tags.get("vartags")),
+            vocalinstrumental=musicinfo.get("vocalinstrumental") or "",
+            acousticelectric=musicinfo.get("acousticelectric") or "",
+            speed=musicinfo.get("speed") or "",
+            popularity_total=data.get("popularity_total"),
+            popularity_month=data.get("popularity_month"),
+            likes=data.get("likes"),
+            listens=data.get("listens"),
+        )
+
+    @property
+    def tags(self) -> Tuple[str, ...]:
+        return self.genres + self.instruments + self.vartags
+
+    def __repr__(self) -> str:
+        return f"JamendoTrack(id={self.id}, name={self.name!r}, artist_name={self.artist_name!r})"
+
+
+class YTMusicTrack:
+    """ytmusicapi search(filter="songs") 返回的一首歌"""
+
+    __slots__ = ("video_id", "title", "artists", "album", "duration", "cover_url", "cover_size")
+
+    def __init__(self, video_id, title="", artists=(), album="", duration=0, cover_url="", cover_size=(0, 0)):
+        self.video_id = video_id
+        self.title = title
+        self.artists = artists
+        self.album = album
+        self.duration = duration
+        self.cover_url = cover_url
+        self.cover_size = cover_size
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "YTMusicTrack":
+        album = data.get("album")
+        thumbnails = data.get("thumbnails") or []
+        largest = max(thumbnails, key=lambda x: x.get("width", 0) * x.get("height", 0), default={})
+        return cls(
+            video_id=data.get("videoId") or "",
+            title=data.get("title") or "",
+            artists=tuple(sys.intern(a["name"]) for a in data.get("artists") or () if a.get("name")),
+            album=(album.get("name") or "") if isinstance(album, dict) else "",
+            duration=parse_duration(data.get("duration_seconds") or data.get("duration")),
+            cover_url=largest.get("url", ""),
+            cover_size=(largest.get("width", 0), largest.get("height", 0)),
+        )
+
+    @property
+    def artist(self) -> str:
+        return self.artists[0] if self.artists else ""
+
+    @property
+    def page_url(self) -> str:
+        return f"https://music.youtube.com/watch?v={self.video_id}" if self.video_id else ""
+
+    def __repr__(self) -> str:
+        return f"YTMusicTrack(video_id={self.video_id!r}, title={self.title!r}, artist={self.artist!r})"
+
+
+def from_results(results: Optional[Iterable[Dict]]) -> List[JamendoTrack]:
+    """一页 Jamendo 结果 → JamendoTrack 列表"""
+    return [JamendoTrack.from_dict(track) for track in results or ()]
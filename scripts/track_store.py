@@ -0,0 +1,320 @@
+"""紧凑的列式 track 存储
+
+用途：抓取脚本把 track 元数据写成一个二进制文件（默认 data/jamendo_tracks.bin），
+      排序和查询工具用 numpy.memmap 直接映射读取，不再解析 JSON
+布局：
+    - 整数 track ID（按 ID 升序存放，可二分查找）
+    - 标签驻留为整数 tag ID，按 CSR 方式存放（tag_offsets / tag_ids）
+    - duration / position / releasedate(YYYYMMDD) 定宽数值列
+    - name / artist_name 以 UTF-8 字节块 + 偏移数组存放
+
+文件格式：MAGIC(8 字节) + 头部长度(uint32) + JSON 头部 + 8 字节对齐的各列原始数据
+
+用法：
+    python scripts/track_store.py                 # 查看统计
+    python scripts/track_store.py --id 1234567    # 按 ID 查询
+"""
+import sys
+import json
+import struct
+import argparse
+from array import array
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple, Union
+
+import numpy as np
+
+from ranking import POPULARITY_KEYS
+from track_model import JamendoTrack, lower_tag
+
+MAGIC = b"BGMTRK01"
+DEFAULT_STORE_PATH = Path(__file__).parent.parent / "data" / "jamendo_tracks.bin"
+TAG_KINDS = ("genres", "instruments", "vartags")
+
+# 列名 → numpy dtype（统一小端）
+COLUMN_DTYPES = {
+    "ids": "<u4",
+    "duration": "<i4",
+    "position": "<i4",
+    "releasedate": "<i4",
+    "tag_offsets": "<u4",
+    "tag_ids": "<u4",
+    "name_offsets": "<u4",
+    "names": "u1",
+    "artist_offsets": "<u4",
+    "artists": "u1",
+}
+
+
+def parse_releasedate(value) -> int:
+    """'2021-03-04' → 20210304，无法解析时返回 0"""
+    if not value or not isinstance(value, str):
+        return 0
+    parts = value.split("-")
+    try:
+        year = int(parts[0])
+        month = int(parts[1]) if len(parts) > 1 else 0
+        day = int(parts[2][:2]) if len(parts) > 2 else 0
+    except ValueError:
+        return 0
+    return year * 10000 + month * 100 + day
+
+
+def format_releasedate(value: int) -> str:
+    if not value:
+        return ""
+    return f"{value // 10000:04d}-{value // 100 % 100:02d}-{value % 100:02d}"
+
+
+class TrackRecord:
+    """单条 track 的只读视图"""
+
+    __slots__ = ("id", "name", "artist_name", "duration", "position", "releasedate", "tags")
+
+    def __init__(self, id, name, artist_name, duration, position, releasedate, tags):
+        self.id = id
+        self.name = name
+        self.artist_name = artist_name
+        self.duration = duration
+        self.position = position
+        self.releasedate = releasedate
+        self.tags = tags
+
+    def __repr__(self) -> str:
+        return f"TrackRecord(id={self.id}, name={self.name!r}, artist_name={self.artist_name!r})"
+
+
+class TagVocabulary:
+    """(kind, tag) ↔ 整数 tag ID 的驻留表"""
+
+    def __init__(self, entries: Optional[List[Tuple[str, str]]] = None):
+        self.entries: List[Tuple[str, str]] = []
+        self._ids: Dict[Tuple[str, str], int] = {}
+        for kind, tag in entries or []:
+            self.intern(kind, tag)
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def intern(self, kind: str, tag: str) -> int:
+        key = (kind, sys.intern(tag))
+        tag_id = self._ids.get(key)
+        if tag_id is None:
+            tag_id = self._ids[key] = len(self.entries)
+            self.entries.append(key)
+        return tag_id
+
+    def lookup(self, kind: str, tag: str) -> Optional[int]:
+        return self._ids.get((kind, tag))
+
+
+class TrackStoreBuilder:
+    """逐条累积 track，最后按 ID 排序写出二进制文件
+
+    同一 ID 多次加入时以最后一次为准（增量刷新时用于更新标签）。
+    """
+
+    def __init__(self):
+        self.vocab = TagVocabulary()
+        self._rows: Dict[int, Tuple] = {}
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def add(self, track: Union[Dict, JamendoTrack]) -> None:
+        """加入 Jamendo API 返回的 track（dict 或已解码的 JamendoTrack）"""
+        if not isinstance(track, JamendoTrack):
+            track = JamendoTrack.from_dict(track)
+        tag_ids = [
+            self.vocab.intern(kind, lower_tag(tag))
+            for kind in TAG_KINDS
+            for tag in getattr(track, kind)
+        ]
+        self.add_row(
+            track.id,
+            track.name,
+            track.artist_name,
+            track.duration,
+            track.position or 0,
+            parse_releasedate(track.releasedate),
+            tag_ids,
+        )
+
+    def add_row(self, track_id, name, artist_name, duration, position, releasedate, tag_ids) -> None:
+        self._rows[track_id] = (
+            name,
+            artist_name,
+            int(duration) if isinstance(duration, (int, float)) else 0,
+            int(position) if isinstance(position, (int, float)) else 0,
+            releasedate,
+            tag_ids,
+        )
+
+    def extend_from(self, store: "TrackStore") -> None:
+        """把已有存储中的全部 track 并入（tag ID 重新驻留）"""
+        for record in store:
+            tag_ids = [self.vocab.intern(kind, tag) for kind, tag in record.tags]
+            self.add_row(
+                record.id, record.name, record.artist_name,
+                record.duration, record.position, parse_releasedate(record.releasedate), tag_ids,
+            )
+
+    def _columns(self) -> Dict[str, array]:
+        columns = {
+            "ids": array("I"), "duration": array("i"), "position": array("i"),
+            "releasedate": array("i"), "tag_offsets": array("I", [0]), "tag_ids": array("I"),
+            "name_offsets": array("I", [0]), "artist_offsets": array("I", [0]),
+        }
+        names = bytearray()
+        artists = bytearray()
+        for track_id in sorted(self._rows):
+            name, artist_name, duration, position, releasedate, tag_ids = self._rows[track_id]
+            columns["ids"].append(track_id)
+            columns["duration"].append(duration)
+            columns["position"].append(position)
+            columns["releasedate"].append(releasedate)
+            columns["tag_ids"].extend(tag_ids)
+            columns["tag_offsets"].append(len(columns["tag_ids"]))
+            names += name.encode("utf-8")
+            columns["name_offsets"].append(len(names))
+            artists += artist_name.encode("utf-8")
+            columns["artist_offsets"].append(len(artists))
+        columns["names"] = array("B", names)
+        columns["artists"] = array("B", artists)
+        return columns
+
+    def save(self, path: Path = DEFAULT_STORE_PATH) -> Path:
+        """写出二进制文件"""
+        columns = self._columns()
+        layout = {}
+        offset = 0
+        for name in COLUMN_DTYPES:
+            data = columns[name]
+            layout[name] = {"offset": offset, "length": len(data)}
+            offset += _aligned(len(data) * data.itemsize)
+        header = json.dumps({
+            "version": 1,
+            "count": len(self._rows),
+            "vocab": [list(entry) for entry in self.vocab.entries],
+            "columns": layout,
+        }, ensure_ascii=False).encode("utf-8")
+
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(path.suffix + ".tmp")
+        with open(tmp_path, "wb") as f:
+            prefix = MAGIC + struct.pack("<I", len(header)) + header
+            f.write(prefix + b"\0" * (_aligned(len(prefix)) - len(prefix)))
+            for name, dtype in COLUMN_DTYPES.items():
+                raw = np.frombuffer(columns[name], dtype=columns[name].typecode).astype(dtype).tobytes()
+                f.write(raw + b"\0" * (_aligned(len(raw)) - len(raw)))
+        tmp_path.replace(path)
+        return path
+
+
+def _aligned(size: int) -> int:
+    return (size + 7) // 8 * 8
+
+
+class TrackStore:
+    """memmap 方式打开的只读 track 存储"""
+
+    def __init__(self, path: Path = DEFAULT_STORE_PATH):
+        self.path = Path(path)
+        with open(self.path, "rb") as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                raise ValueError(f"不是 track 存储文件: {self.path}")
+            (header_len,) = struct.unpack("<I", f.read(4))
+            header = json.loads(f.read(header_len).decode("utf-8"))
+        base = _aligned(len(MAGIC) + 4 + header_len)
+
+        self.count: int = header["count"]
+        self.vocab = TagVocabulary([tuple(entry) for entry in header["vocab"]])
+        self.columns: Dict[str, np.ndarray] = {}
+        for name, dtype in COLUMN_DTYPES.items():
+            spec = header["columns"][name]
+            if spec["length"]:
+                self.columns[name] = np.memmap(
+                    self.path, dtype=dtype, mode="r",
+                    offset=base + spec["offset"], shape=(spec["length"],),
+                )
+            else:
+                self.columns[name] = np.empty(0, dtype=dtype)
+
+    @property
+    def ids(self) -> np.ndarray:
+        return self.columns["ids"]
+
+    def __len__(self) -> int:
+        return self.count
+
+    def __iter__(self) -> Iterator[TrackRecord]:
+        for i in range(self.count):
+            yield self.record(i)
+
+    def index_of(self, track_id: int) -> Optional[int]:
+        """按 ID 二分查找行号"""
+        i = int(np.searchsorted(self.ids, track_id))
+        if i < self.count and self.ids[i] == track_id:
+            return i
+        return None
+
+    def find(self, track_id: int) -> Optional[TrackRecord]:
+        i = self.index_of(track_id)
+        return None if i is None else self.record(i)
+
+    def tag_ids(self, i: int) -> np.ndarray:
+        offsets = self.columns["tag_offsets"]
+        return self.columns["tag_ids"][offsets[i]:offsets[i + 1]]
+
+    def _string(self, blob: str, i: int) -> str:
+        offsets = self.columns[blob[:-1] + "_offsets"]
+        return bytes(self.columns[blob][offsets[i]:offsets[i + 1]]).decode("utf-8")
+
+    def record(self, i: int) -> TrackRecord:
+        return TrackRecord(
+            id=int(self.ids[i]),
+            name=self._string("names", i),
+            artist_name=self._string("artists", i),
+            duration=int(self.columns["duration"][i]),
+            position=int(self.columns["position"][i]),
+            releasedate=format_releasedate(int(self.columns["releasedate"][i])),
+            tags=[self.vocab.entries[t] for t in self.tag_ids(i)],
+        )
+
+    def score_columns(self) -> Dict[str, np.ndarray]:
+        """生成 ranking.score_columns 需要的列（存储中没有 popularity 字段，全为 0）"""
+        zeros = np.zeros(self.count, dtype=np.float64)
+        columns = {key: zeros for key in POPULARITY_KEYS}
+        columns["position"] = self.columns["position"].astype(np.int64)
+        columns["release_year"] = (self.columns["releasedate"] // 10000).astype(np.int64)
+        return columns
+
+
+def main():
+    """命令行：查看存储统计或按 ID 查询"""
+    parser = argparse.ArgumentParser(description="查看 Jamendo track 列式存储")
+    parser.add_argument("path", nargs="?", default=str(DEFAULT_STORE_PATH))
+    parser.add_argument("--id", type=int, action="append", help="按 track ID 查询，可重复")
+    args = parser.parse_args()
+
+    store = TrackStore(Path(args.path))
+    print(f"存储文件: {store.path}")
+    print(f"track 数量: {len(store)}，标签词表: {len(store.vocab)}，"
+          f"标签引用: {len(store.columns['tag_ids'])}")
+
+    for track_id in args.id or []:
+        record = store.find(track_id)
+        if record is None:
+            print(f"[{track_id}] 未找到")
+            continue
+        print(f"[{record.id}] {record.name} - {record.artist_name}")
+        print(f"     时长: {record.duration}s | position: {record.position} | 发布: {record.releasedate}")
+        for kind in TAG_KINDS:
+            tags = [tag for k, tag in record.tags if k == kind]
+            if tags:
+                print(f"     {kind}: {', '.join(tags)}")
+
+
+if __name__ == "__main__":
+    main()
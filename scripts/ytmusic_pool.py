@@ -0,0 +1,145 @@
+"""进程级 YTMusic 客户端池
+
+用途：Cookie 文件只查找、解析一次；预热并复用已认证 / 匿名两类 YTMusic 客户端，
+      并发搜索时每个任务借出一个客户端，批量关键词不再为每次查询付初始化成本
+说明：Cookie 初始化失败会被记住，之后直接使用匿名客户端，不会反复重试
+"""
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from queue import Empty, LifoQueue
+from typing import Callable, Iterator, Optional
+
+PROJECT_ROOT = Path(__file__).parent.parent
+
+DEFAULT_POOL_SIZE = 4
+
+
+def find_cookie_file() -> Optional[Path]:
+    """查找 cookie 文件"""
+    possible_paths = [
+        PROJECT_ROOT / 'data' / 'youtube_cookies.txt',
+        PROJECT_ROOT / 'data' / 'youtube_cookies.json',
+        PROJECT_ROOT / 'youtube_cookies.txt',
+        PROJECT_ROOT / 'youtube_cookies.json',
+        Path.home() / '.ytmusic_cookies.txt',
+    ]
+
+    for path in possible_paths:
+        if path.exists():
+            return path
+
+    return None
+
+
+def _default_factory(auth: Optional[str] = None):
+    from ytmusicapi import YTMusic
+    return YTMusic(auth) if auth else YTMusic()
+
+
+class YTMusicPool:
+    """YTMusic 客户端池
+
+    checkout() 借出一个客户端，优先已认证客户端；没有可用 Cookie 时借出匿名客户端。
+    每类客户端最多创建 size 个，用尽时阻塞等待归还。
+    """
+
+    def __init__(
+        self,
+        size: int = DEFAULT_POOL_SIZE,
+        cookie_path: Optional[Path] = None,
+        factory: Callable = _default_factory,
+        discover: bool = True,
+    ):
+        self.size = size
+        self._factory = factory
+        self._cookie_path = cookie_path
+        self._discover = discover and cookie_path is None
+        self._auth_checked = False
+        self._auth_available = False
+        self._lock = threading.Lock()
+        self._idle = {True: LifoQueue(), False: LifoQueue()}
+        self._created = {True: 0, False: 0}
+
+    @property
+    def cookie_path(self) -> Optional[Path]:
+        self._ensure_auth()
+        return self._cookie_path
+
+    @property
+    def authenticated(self) -> bool:
+        """是否有可用的 Cookie 认证"""
+        self._ensure_auth()
+        return self._auth_available
+
+    def _ensure_auth(self) -> None:
+        """首次使用时查找并验证 Cookie（只做一次）"""
+        with self._lock:
+            if self._auth_checked:
+                return
+            self._auth_checked = True
+            if self._discover:
+                self._cookie_path = find_cookie_file()
+            if self._cookie_path is None:
+                return
+            print(f"[配置] 使用 Cookie 文件: {self._cookie_path}")
+            try:
+                client = self._factory(str(self._cookie_path))
+            except Exception as e:
+                print(f"[警告] Cookie 文件初始化失败: {e}")
+                print("[提示] 将使用无 Cookie 模式（功能受限）")
+                return
+            self._auth_available = True
+            self._created[True] += 1
+            self._idle[True].put(client)
+
+    def _acquire(self, authenticated: bool):
+        queue = self._idle[authenticated]
+        try:
+            return queue.get_nowait()
+        except Empty:
+            pass
+        with self._lock:
+            can_create = self._created[authenticated] < self.size
+            if can_create:
+                self._created[authenticated] += 1
+        if not can_create:
+            return queue.get()
+        try:
+            if authenticated:
+                return self._factory(str(self._cookie_path))
+            return self._factory()
+        except Exception:
+            with self._lock:
+                self._created[authenticated] -= 1
+            raise
+
+    @contextmanager
+    def checkout(self, prefer_auth: bool = True) -> Iterator:
+        """借出一个客户端，with 块结束后自动归还"""
+        authenticated = prefer_auth and self.authenticated
+        client = self._acquire(authenticated)
+        try:
+            yield client
+        finally:
+            self._idle[authenticated].put(client)
+
+    def warm_up(self, count: int = 1) -> None:
+        """预先创建 count 个客户端放入池中"""
+        authenticated = self.authenticated
+        clients = [self._acquire(authenticated) for _ in range(min(count, self.size))]
+        for client in clients:
+            self._idle[authenticated].put(client)
+
+
+_default_pool: Optional[YTMusicPool] = None
+_default_lock = threading.Lock()
+
+
+def get_pool() -> YTMusicPool:
+    """进程内共享的客户端池"""
+    global _default_pool
+    with _default_lock:
+        if _default_pool is None:
+            _default_pool = YTMusicPool()
+        return _default_pool
@@ -0,0 +1,106 @@
+"""YouTube Music 流媒体 URL 批量解析
+
+用途：一次性为多个 videoId 并发解析音频流 URL，替代逐条
+      get_watch_playlist + get_streaming_data 的串行调用
+缓存：解析结果缓存到 URL 中 expire 参数标注的过期时间（提前留出余量）
+测试：只依赖 ytmusic.get_streaming_data(video_id)，可传入任意桩对象
+"""
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, List, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+DEFAULT_MAX_WORKERS = 5
+# URL 中没有 expire 参数时的默认有效期（秒）
+DEFAULT_TTL = 3600
+# 提前这么多秒视为过期，避免拿到即将失效的链接
+EXPIRY_MARGIN = 60
+
+
+def extract_audio_url(streaming_data: Optional[Dict]) -> Optional[str]:
+    """从 streamingData 中取第一个音频格式的 URL"""
+    if not streaming_data or 'adaptiveFormats' not in streaming_data:
+        return None
+    for fmt in streaming_data['adaptiveFormats']:
+        if 'audio' in fmt.get('mimeType', '').lower() and fmt.get('url'):
+            return fmt['url']
+    return None
+
+
+def stream_expiry(url: str, now: Optional[float] = None) -> float:
+    """读取流 URL 中的 expire 参数（Unix 时间戳），缺失时按默认有效期估算"""
+    now = time.time() if now is None else now
+    try:
+        return float(parse_qs(urlsplit(url).query)['expire'][0])
+    except (KeyError, IndexError, ValueError):
+        return now + DEFAULT_TTL
+
+
+class StreamUrlCache:
+    """videoId → 音频 URL 的线程安全缓存，按 URL 自带的过期时间失效"""
+
+    def __init__(self, margin: float = EXPIRY_MARGIN):
+        self.margin = margin
+        self._entries: Dict[str, Tuple[str, float]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, video_id: str) -> Optional[str]:
+        with self._lock:
+            entry = self._entries.get(video_id)
+            if entry is None:
+                return None
+            url, expires_at = entry
+            if expires_at - self.margin <= time.time():
+                del self._entries[video_id]
+                return None
+            return url
+
+    def put(self, video_id: str, url: str) -> None:
+        with self._lock:
+            self._entries[video_id] = (url, stream_expiry(url))
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+_default_cache = StreamUrlCache()
+
+
+def resolve_stream_urls(
+    ytmusic,
+    video_ids: Iterable[Optional[str]],
+    max_workers: int = DEFAULT_MAX_WORKERS,
+    cache: Optional[StreamUrlCache] = None,
+) -> Dict[str, Optional[str]]:
+    """并发解析一批 videoId 的音频流 URL
+
+    已缓存且未过期的直接返回；其余在有界线程池里并发调用 get_streaming_data。
+    单个解析失败（无 Cookie、权限等）只把该条记为 None，不影响其他条目。
+    """
+    cache = _default_cache if cache is None else cache
+    resolved: Dict[str, Optional[str]] = {}
+    pending: List[str] = []
+    for video_id in video_ids:
+        if not video_id or video_id in resolved or video_id in pending:
+            continue
+        url = cache.get(video_id)
+        if url:
+            resolved[video_id] = url
+        else:
+            pending.append(video_id)
+
+    def fetch(video_id: str) -> Optional[str]:
+        try:
+            return extract_audio_url(ytmusic.get_streaming_data(video_id))
+        except Exception:
+            # 获取流媒体 URL 失败（可能是无 Cookie 或权限问题）
+            return None
+
+    if pending:
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(pending))) as executor:
+            for video_id, url in zip(pending, executor.map(fetch, pending)):
+                resolved[video_id] = url
+                if url:
+                    cache.put(video_id, url)
+    return resolved